@@ -0,0 +1,403 @@
+"""
+Detector Backends
+Pluggable inference engines behind the shared detector
+- ultralytics: PyTorch eager path (default)
+- onnxruntime: exported ONNX model on CPU
+- openvino: exported OpenVINO IR (or ONNX) on CPU
+All backends return the same detection dicts the modules consume.
+"""
+import ast
+import os
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.ai.model_registry import model_registry, yolo_loader
+from app.ai.threads import thread_budget
+from config.settings import settings
+
+BACKEND_ULTRALYTICS = 'ultralytics'
+BACKEND_ONNXRUNTIME = 'onnxruntime'
+BACKEND_OPENVINO = 'openvino'
+BACKENDS = (BACKEND_ULTRALYTICS, BACKEND_ONNXRUNTIME, BACKEND_OPENVINO)
+
+PRECISION_FP32 = 'fp32'
+PRECISION_INT8 = 'int8'
+
+DEFAULT_IMGSZ = 640
+NMS_IOU = 0.45
+
+
+def _coco_names() -> Dict[int, str]:
+    from app.ai.detector import COCO_CLASS_NAMES
+    return dict(enumerate(COCO_CLASS_NAMES))
+
+
+def _artifact_name(weights: str, precision: str, ext: str) -> str:
+    suffix = '' if precision == PRECISION_FP32 else f'.{precision}'
+    return os.path.join(settings.models_dir, f"{Path(weights).stem}{suffix}{ext}")
+
+
+def onnx_path(weights: str, precision: str = PRECISION_FP32) -> str:
+    """Location of the exported ONNX artifact for a weight file"""
+    return _artifact_name(weights, precision, '.onnx')
+
+
+def openvino_path(weights: str, precision: str = PRECISION_FP32) -> str:
+    """Location of the exported OpenVINO IR artifact for a weight file"""
+    return _artifact_name(weights, precision, '.xml')
+
+
+def letterbox(frame: np.ndarray, imgsz: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize with unchanged aspect ratio and pad to a square input
+    Returns (RGB float32 CHW blob, scale ratio, (pad_x, pad_y))
+    """
+    import cv2
+
+    h, w = frame.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas[top:top + new_h, left:left + new_w] = resized
+
+    blob = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return blob, ratio, (left, top)
+
+
+def make_detection(x1: float, y1: float, x2: float, y2: float, confidence: float, class_id: int, names: Dict[int, str]) -> Dict:
+    return {
+        'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+        'confidence': float(confidence),
+        'class_id': int(class_id),
+        'class': names.get(int(class_id), f'class_{int(class_id)}'),
+        'center': (int((x1 + x2) / 2), int((y1 + y2) / 2))
+    }
+
+
+class DetectorBackend(ABC):
+    """Base class for detector inference engines"""
+
+    name = ''
+    # Whether predict() honours a per-call imgsz
+    supports_imgsz = False
+
+    def __init__(self, weights: str):
+        self.weights = weights
+        self.model_key = ''
+        self.names: Dict[int, str] = _coco_names()
+        self._model = None
+
+    @abstractmethod
+    def _loader(self):
+        """Callable building the underlying model"""
+
+    def load(self) -> bool:
+        """Load the model through the shared registry"""
+        if self._model is not None:
+            return True
+        self._model = model_registry.acquire(self.model_key, self._loader())
+        self._on_loaded()
+        return True
+
+    def _on_loaded(self):
+        pass
+
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @abstractmethod
+    def predict(
+        self,
+        frames: List[np.ndarray],
+        classes: Optional[Iterable[int]] = None,
+        conf: float = 0.25,
+        imgsz: Optional[int] = None
+    ) -> List[List[Dict]]:
+        """
+        Run detection, one list of detection dicts per frame
+        imgsz overrides the input size when supports_imgsz is set.
+        """
+
+    def warmup(self, shapes: Iterable[Tuple[int, int]], runs: int = 2) -> float:
+        """
+        Push dummy frames of the given (height, width) shapes through the
+        model so lazy graph setup and allocator growth happen now
+        Returns the elapsed time in milliseconds.
+        """
+        started = time.perf_counter()
+        for height, width in shapes:
+            frame = np.zeros((height, width, 3), dtype=np.uint8)
+            for _ in range(runs):
+                self.predict([frame])
+        return (time.perf_counter() - started) * 1000
+
+    def release(self):
+        if self._model is not None:
+            self._model = None
+            model_registry.release(self.model_key)
+
+
+class UltralyticsBackend(DetectorBackend):
+    """PyTorch eager inference through ultralytics"""
+
+    name = BACKEND_ULTRALYTICS
+    supports_imgsz = True
+
+    def __init__(self, weights: str):
+        super().__init__(weights)
+        self.model_key = f'yolo:{weights}'
+
+    def _loader(self):
+        return yolo_loader(self.weights)
+
+    def _on_loaded(self):
+        names = getattr(self._model, 'names', None)
+        if isinstance(names, dict) and names:
+            self.names = {int(k): v for k, v in names.items()}
+
+    def predict(self, frames, classes=None, conf=0.25, imgsz=None):
+        results = self._model(
+            frames,
+            classes=sorted(classes) if classes is not None else None,
+            conf=conf,
+            imgsz=imgsz or DEFAULT_IMGSZ,
+            verbose=False
+        )
+
+        outputs = []
+        for result in results:
+            detections = []
+            for box in result.boxes:
+                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+                confidence = float(box.conf[0].cpu().numpy())
+                class_id = int(box.cls[0].cpu().numpy())
+                detections.append(make_detection(x1, y1, x2, y2, confidence, class_id, self.names))
+            outputs.append(detections)
+        return outputs
+
+
+class _ExportedYoloBackend(DetectorBackend):
+    """
+    Shared pre/post-processing for exported YOLOv8 graphs
+    Input: letterboxed RGB float32 NCHW; output: (N, 4 + classes, anchors)
+    """
+
+    def __init__(self, weights: str, model_path: str):
+        super().__init__(weights)
+        self.model_path = model_path
+        self.imgsz = DEFAULT_IMGSZ
+        self.dynamic_batch = True
+        self.supports_imgsz = True  # cleared when the graph has a static input size
+
+    def _postprocess(
+        self,
+        output: np.ndarray,
+        ratio: float,
+        pad: Tuple[float, float],
+        shape: Tuple[int, int],
+        classes: Optional[Iterable[int]],
+        conf: float
+    ) -> List[Dict]:
+        import cv2
+
+        predictions = output.T  # (anchors, 4 + classes)
+        scores = predictions[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences >= conf
+        if classes is not None:
+            keep &= np.isin(class_ids, list(classes))
+        if not keep.any():
+            return []
+
+        boxes = predictions[keep, :4]
+        confidences = confidences[keep]
+        class_ids = class_ids[keep]
+
+        # cx, cy, w, h in letterbox space -> x, y, w, h in frame space
+        xywh = np.empty_like(boxes)
+        xywh[:, 0] = (boxes[:, 0] - boxes[:, 2] / 2 - pad[0]) / ratio
+        xywh[:, 1] = (boxes[:, 1] - boxes[:, 3] / 2 - pad[1]) / ratio
+        xywh[:, 2] = boxes[:, 2] / ratio
+        xywh[:, 3] = boxes[:, 3] / ratio
+
+        indices = cv2.dnn.NMSBoxesBatched(
+            xywh.tolist(), confidences.tolist(), class_ids.tolist(), conf, NMS_IOU
+        )
+
+        h, w = shape
+        detections = []
+        for i in np.array(indices).flatten():
+            x, y, bw, bh = xywh[i]
+            x1, y1 = max(0.0, x), max(0.0, y)
+            x2, y2 = min(float(w), x + bw), min(float(h), y + bh)
+            detections.append(make_detection(x1, y1, x2, y2, confidences[i], class_ids[i], self.names))
+        return detections
+
+    @abstractmethod
+    def _infer(self, batch: np.ndarray) -> np.ndarray:
+        """Run the graph on a (N, 3, imgsz, imgsz) batch"""
+
+    def predict(self, frames, classes=None, conf=0.25, imgsz=None):
+        size = imgsz if imgsz and self.supports_imgsz else self.imgsz
+        prepared = [letterbox(frame, size) for frame in frames]
+        blobs = np.stack([blob for blob, _, _ in prepared])
+
+        if self.dynamic_batch:
+            outputs = self._infer(blobs)
+        else:
+            outputs = np.concatenate([self._infer(blobs[i:i + 1]) for i in range(len(blobs))])
+
+        return [
+            self._postprocess(output, ratio, pad, frame.shape[:2], classes, conf)
+            for output, (_, ratio, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+
+class OnnxRuntimeBackend(_ExportedYoloBackend):
+    """ONNX Runtime on CPU"""
+
+    name = BACKEND_ONNXRUNTIME
+
+    def __init__(self, weights: str, model_path: Optional[str] = None, precision: str = PRECISION_FP32):
+        super().__init__(weights, model_path or onnx_path(weights, precision))
+        self.precision = precision
+        self.model_key = f'onnxruntime:{self.model_path}'
+
+    def _loader(self):
+        path = self.model_path
+
+        def load():
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            threads = thread_budget.limit('onnxruntime')
+            if threads:
+                options.intra_op_num_threads = threads
+                options.inter_op_num_threads = 1
+            return ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        return load
+
+    def _on_loaded(self):
+        model_input = self._model.get_inputs()[0]
+        self._input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        self.dynamic_batch = not isinstance(batch, int)
+        if isinstance(height, int):
+            self.imgsz = height
+            self.supports_imgsz = False
+
+        names = self._model.get_modelmeta().custom_metadata_map.get('names')
+        if names:
+            try:
+                self.names = {int(k): v for k, v in ast.literal_eval(names).items()}
+            except (ValueError, SyntaxError):
+                pass
+
+    def _infer(self, batch):
+        return self._model.run(None, {self._input_name: batch})[0]
+
+
+class OpenVINOBackend(_ExportedYoloBackend):
+    """OpenVINO on CPU (IR .xml or ONNX)"""
+
+    name = BACKEND_OPENVINO
+
+    def __init__(self, weights: str, model_path: Optional[str] = None, precision: str = PRECISION_FP32):
+        if model_path is None:
+            model_path = openvino_path(weights, precision)
+            if not os.path.exists(model_path):
+                model_path = onnx_path(weights, precision)
+        super().__init__(weights, model_path)
+        self.precision = precision
+        self.model_key = f'openvino:{self.model_path}'
+
+    def _loader(self):
+        path = self.model_path
+
+        def load():
+            import openvino as ov
+
+            core = ov.Core()
+            if settings.DETECTOR_COMPILE_CACHE:
+                # Reuse the compiled blob across restarts instead of recompiling
+                core.set_property({'CACHE_DIR': os.path.join(settings.cache_dir, 'openvino')})
+            threads = thread_budget.limit('openvino')
+            config = {'INFERENCE_NUM_THREADS': threads} if threads else {}
+            return core.compile_model(core.read_model(path), 'CPU', config)
+        return load
+
+    def _on_loaded(self):
+        partial_shape = self._model.input(0).get_partial_shape()
+        self.dynamic_batch = partial_shape[0].is_dynamic
+        if partial_shape[2].is_static:
+            self.imgsz = partial_shape[2].get_length()
+            self.supports_imgsz = False
+
+    def _infer(self, batch):
+        return self._model(batch)[self._model.output(0)]
+
+
+def create_backend(name: str, weights: str, precision: Optional[str] = None) -> DetectorBackend:
+    """
+    Build a detector backend for a weight file
+    INT8 falls back to FP32 when no quantized artifact exists, and
+    exported backends fall back to ultralytics when nothing was exported.
+    """
+    precision = precision or settings.DETECTOR_PRECISION
+
+    if name == BACKEND_ONNXRUNTIME:
+        if precision != PRECISION_FP32 and os.path.exists(onnx_path(weights, precision)):
+            return OnnxRuntimeBackend(weights, precision=precision)
+        if os.path.exists(onnx_path(weights)):
+            return OnnxRuntimeBackend(weights)
+        logger.warning(f"No ONNX export for {weights} in {settings.models_dir} - using ultralytics")
+    elif name == BACKEND_OPENVINO:
+        if precision != PRECISION_FP32 and (
+            os.path.exists(openvino_path(weights, precision)) or os.path.exists(onnx_path(weights, precision))
+        ):
+            return OpenVINOBackend(weights, precision=precision)
+        if os.path.exists(openvino_path(weights)) or os.path.exists(onnx_path(weights)):
+            return OpenVINOBackend(weights)
+        logger.warning(f"No OpenVINO/ONNX export for {weights} in {settings.models_dir} - using ultralytics")
+    elif name != BACKEND_ULTRALYTICS:
+        logger.warning(f"Unknown detector backend '{name}' - using ultralytics")
+
+    return UltralyticsBackend(weights)
+
+
+def export_model(weights: str, backend: str = BACKEND_ONNXRUNTIME, imgsz: int = DEFAULT_IMGSZ) -> str:
+    """
+    Convert a YOLO weight file into the artifact a CPU backend loads
+    Writes into settings.models_dir and returns the artifact path.
+    """
+    from ultralytics import YOLO
+
+    os.makedirs(settings.models_dir, exist_ok=True)
+    target = onnx_path(weights)
+
+    exported = YOLO(weights).export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+    if os.path.abspath(exported) != os.path.abspath(target):
+        os.replace(exported, target)
+    logger.info(f"Exported {weights} -> {target}")
+
+    if backend == BACKEND_OPENVINO:
+        import openvino as ov
+
+        xml_path = openvino_path(weights)
+        ov.save_model(ov.convert_model(target), xml_path)
+        logger.info(f"Converted {target} -> {xml_path}")
+        return xml_path
+
+    return target
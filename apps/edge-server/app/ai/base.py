@@ -2,17 +2,71 @@
 Base AI Module
 All AI modules inherit from this base class
 """
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Any, Tuple
 import numpy as np
 from loguru import logger
 
+from app.ai.hot_swap import ModelSlot
+from app.ai.model_registry import model_registry
+from app.ai.threads import thread_budget
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+FALSE_VALUES = ('false', '0', 'no', 'off')
+
+
+def _coerce(default: Any, value: Any) -> Any:
+    """Convert a parameter value to the type of its default; raises ValueError when it cannot"""
+    if isinstance(default, bool):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in TRUE_VALUES + FALSE_VALUES:
+            return value.strip().lower() in TRUE_VALUES
+        if isinstance(value, (int, float)) and value in (0, 1):
+            return bool(value)
+        raise ValueError(f"not a boolean: {value!r}")
+    if isinstance(value, bool):
+        # bool is an int subclass: True would silently become 1 / 1.0
+        raise ValueError(f"boolean for a {type(default).__name__} parameter")
+    return type(default)(value)
+
 
 class BaseAIModule(ABC):
     """
     Base class for all AI processing modules
     All modules must implement process_frame method
     """
+
+    # COCO class ids this module reads from the manager's shared detector pass.
+    # None means the module does not consume shared detections.
+    detector_classes: Optional[List[int]] = None
+
+    # Processing rate in frames per second; None runs on every frame.
+    # Overridable per module and per camera (settings.MODULE_FPS / CAMERA_MODULE_FPS).
+    target_fps: Optional[float] = None
+    # Rate used while the last result on a camera had detections (burst mode)
+    burst_fps: Optional[float] = None
+    # Latency budget of one process_frame call in milliseconds (see ModuleWatchdog);
+    # None uses settings.MODULE_DEADLINE_MS
+    deadline_ms: Optional[float] = None
+    # Return the last detections on frames where the module is not due
+    reuse_last_result: bool = False
+    # Reuse the last detections while the camera frame is unchanged
+    # (see StaticSceneCache); for modules without per-frame state
+    cache_static_results: bool = False
+    # Module only looks at its configured zones, so the shared pass may
+    # be restricted to them (see get_zones)
+    roi_zones: bool = False
+    # Intermediate products (app/ai/products.py) read from metadata['products'],
+    # and those this module can compute for others via compute_product.
+    # Shared detections are declared through detector_classes instead.
+    consumes: Tuple[str, ...] = ()
+    produces: Tuple[str, ...] = ()
+    # Attributes a camera may override (settings.CAMERA_MODULE_PARAMS or the
+    # camera config), read on the hot path through params(camera_id)
+    camera_params: Tuple[str, ...] = ('confidence_threshold',)
     
     def __init__(self, module_id: str, module_name: str, confidence_threshold: float = 0.5):
         self.module_id = module_id
@@ -20,6 +74,11 @@ class BaseAIModule(ABC):
         self.confidence_threshold = confidence_threshold
         self.enabled = False
         self._initialized = False
+        self._model_keys: List[str] = []
+        self._params_type = namedtuple(f'{type(self).__name__}Params', self.camera_params)
+        self._overrides: Dict[str, Dict[str, Any]] = {}  # camera_id -> overridden values
+        self._params: Dict[str, Any] = {}  # camera_id -> resolved parameter set
+        self._unproduced: set = set()  # products in produces without a compute_product, already logged
 
     @abstractmethod
     def initialize(self) -> bool:
@@ -59,6 +118,8 @@ class BaseAIModule(ABC):
         """Enable the module"""
         if not self._initialized:
             if self.initialize():
+                # Size the thread pools of the libraries the module just loaded
+                thread_budget.apply()
                 self.enabled = True
                 logger.info(f"AI Module '{self.module_name}' enabled")
             else:
@@ -79,9 +140,121 @@ class BaseAIModule(ABC):
         """Update confidence threshold"""
         self.confidence_threshold = max(0.0, min(1.0, threshold))
         logger.debug(f"Module '{self.module_name}' confidence threshold: {self.confidence_threshold}")
+        # Cameras without their own threshold follow the module default
+        for camera_id in list(self._params):
+            self._resolve_params(camera_id)
+
+    def configure_camera(self, camera_id: str, overrides: Optional[Dict[str, Any]]):
+        """
+        Set a camera's parameter overrides, resolved once into the set
+        params() returns; unknown names are ignored, empty resets to the defaults
+        """
+        values: Dict[str, Any] = {}
+        for name, value in (overrides or {}).items():
+            if name not in self.camera_params:
+                logger.warning(f"Module '{self.module_id}' has no per-camera parameter '{name}'")
+                continue
+            try:
+                values[name] = _coerce(getattr(self, name), value)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid value {value!r} for '{name}' of module '{self.module_id}' on camera {camera_id}")
+
+        if values:
+            self._overrides[camera_id] = values
+            self._resolve_params(camera_id)
+        else:
+            self._overrides.pop(camera_id, None)
+            self._params.pop(camera_id, None)
+
+    def _resolve_params(self, camera_id: str):
+        overrides = self._overrides.get(camera_id, {})
+        self._params[camera_id] = self._params_type(
+            *(overrides.get(name, getattr(self, name)) for name in self.camera_params)
+        )
+
+    def params(self, camera_id: str) -> Any:
+        """Parameter set of a camera; the module itself when it has no overrides"""
+        return self._params.get(camera_id, self)
+
+    def remove_camera(self, camera_id: str):
+        """Free everything the module holds for a camera; extend for per-camera state"""
+        self._overrides.pop(camera_id, None)
+        self._params.pop(camera_id, None)
+
+    def get_shared_detections(self, metadata: Optional[Dict]) -> Optional[List[Dict]]:
+        """
+        Detections from the manager's shared pass, already filtered
+        for this module's classes and confidence threshold.
+        Returns None when the module should run its own detection.
+        """
+        if not metadata:
+            return None
+        return metadata.get('shared_detections')
+
+    def get_product(self, metadata: Optional[Dict], product: str) -> Optional[Any]:
+        """
+        Product computed by the manager for this frame
+        Returns None when it is unavailable and the module should compute it itself.
+        """
+        if not metadata:
+            return None
+        return metadata.get('products', {}).get(product)
+
+    def compute_product(self, product: str, frame: np.ndarray, camera_id: str, inputs: Dict[str, Any]) -> Any:
+        """
+        Compute one of the products listed in produces; inputs holds the
+        products computed so far. None leaves the consumers to fall back
+        to their own processing.
+        """
+        if product not in self._unproduced:
+            self._unproduced.add(product)
+            logger.error(f"Module '{self.module_id}' lists '{product}' in produces but does not compute it")
+        return None
+
+    def warmup(self, shapes: Iterable[Tuple[int, int]], camera_id: str, metadata: Optional[Dict] = None) -> float:
+        """
+        Run process_frame once per (height, width) on a black frame so
+        the module's own models are loaded and traced before real frames
+        Returns the elapsed time in milliseconds.
+        """
+        started = time.perf_counter()
+        for height, width in shapes:
+            self.process_frame(np.zeros((height, width, 3), dtype=np.uint8), camera_id, metadata)
+        return (time.perf_counter() - started) * 1000
+
+    def get_zones(self, camera_id: str, metadata: Optional[Dict]) -> Optional[Any]:
+        """Zones configured for a camera, as given in metadata['zones']"""
+        if metadata and metadata.get('zones'):
+            return metadata['zones']
+        return None
+
+    def acquire_model(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a shared model from the process-wide registry
+        The reference is released by cleanup()
+        """
+        model = model_registry.acquire(key, loader)
+        self._model_keys.append(key)
+        return model
+
+    def get_model_slot(self) -> Optional[ModelSlot]:
+        """Holder of the module's own detector model for hot-swapping, None if it has none"""
+        return None
+
+    @property
+    def model_keys(self) -> List[str]:
+        """Registry keys of the models this module currently holds"""
+        return list(self._model_keys)
+
+    def release_models(self):
+        """Release every model this module acquired"""
+        for key in self._model_keys:
+            model_registry.release(key)
+        self._model_keys = []
 
     def cleanup(self):
         """Cleanup resources"""
+        self.release_models()
         self.enabled = False
         self._initialized = False
 
@@ -0,0 +1,228 @@
+"""
+Hardware Calibration
+Benchmarks the enabled detectors and modules on synthetic frames and
+derives the processing fps, frame width and camera count this host can
+sustain
+"""
+import json
+import os
+import platform
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+
+# Camera id used for benchmark frames so no real camera state is touched
+CALIBRATION_CAMERA_ID = '__calibration__'
+
+WIDTH_STEPS = (1920, 1280, 960, 640)  # candidate processing widths (16:9 frames)
+FPS_STEPS = (1, 2, 3, 5, 8, 10, 15)
+MAX_RECOMMENDED_CAMERAS = 64
+
+
+def synthetic_frame(height: int, width: int, seed: int = 0) -> np.ndarray:
+    """Smooth colored noise, so color- and edge-based stages do realistic work"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    return cv2.resize(coarse, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+def _median_ms(run, frames: List[np.ndarray]) -> float:
+    run(frames[0])  # first call pays for lazy setup, keep it out of the timing
+    times = []
+    for frame in frames:
+        started = time.perf_counter()
+        run(frame)
+        times.append((time.perf_counter() - started) * 1000)
+    return round(float(np.median(times)), 2)
+
+
+def benchmark(manager, widths: Iterable[int] = WIDTH_STEPS, runs: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Median per-frame cost in milliseconds of every available detector and
+    enabled module of an AIModuleManager, per frame width
+
+    Detector consumers get an empty shared result, so their figure is the
+    module's own work on top of the shared detector pass.
+    """
+    runs = max(1, runs or settings.CALIBRATION_RUNS)
+    result: Dict[str, Any] = {'detectors': {}, 'modules': {}}
+
+    for module_id, module in manager.modules.items():
+        if module.is_enabled():
+            result['modules'][module_id] = {
+                'fps': manager.frame_scheduler.rate_for(CALIBRATION_CAMERA_ID, module),
+                'backend': settings.detector_backend_for(module_id) if module.detector_classes else None,
+                'ms': {},
+            }
+
+    for width in widths:
+        height = int(round(width * 9 / 16))
+        frames = [synthetic_frame(height, width, seed) for seed in range(runs)]
+
+        for backend, detector in manager.detectors.items():
+            if detector.is_available():
+                result['detectors'].setdefault(backend, {})[str(width)] = _median_ms(
+                    lambda frame: detector.detect_batch([frame]), frames
+                )
+
+        for module_id, entry in result['modules'].items():
+            module = manager.modules[module_id]
+            metadata = {'shared_detections': []} if module.detector_classes else {}
+            try:
+                entry['ms'][str(width)] = _median_ms(
+                    lambda frame: module.process_frame(frame, CALIBRATION_CAMERA_ID, metadata), frames
+                )
+            except Exception as e:
+                logger.warning(f"Benchmark of module '{module_id}' failed: {e}")
+
+    manager.remove_camera(CALIBRATION_CAMERA_ID)
+    return result
+
+
+def camera_cost_ms(bench: Dict[str, Any], fps: float, width: int) -> float:
+    """Inference milliseconds one camera needs per second at this fps and width"""
+    key = str(width)
+    cost = 0.0
+    detector_rates: Dict[str, float] = {}
+
+    for entry in bench['modules'].values():
+        rate = min(fps, entry['fps'] or fps)
+        cost += rate * entry['ms'].get(key, 0.0)
+        if entry['backend']:
+            # The shared pass runs whenever any of its consumers is due
+            detector_rates[entry['backend']] = max(detector_rates.get(entry['backend'], 0.0), rate)
+
+    for backend, rate in detector_rates.items():
+        cost += rate * bench['detectors'].get(backend, {}).get(key, 0.0)
+
+    return cost
+
+
+def recommend(bench: Dict[str, Any], cameras: int = 1) -> Dict[str, Any]:
+    """
+    Highest quality setting that fits the cameras on this host
+
+    Capacity is one second of inference per worker process (or per host
+    when modules run in-process), scaled by CALIBRATION_HEADROOM. Wider
+    frames win over higher fps; fps stays at or below CALIBRATION_MAX_FPS.
+    """
+    workers = max(1, min(settings.INFERENCE_WORKERS, os.cpu_count() or 1))
+    capacity_ms = 1000.0 * workers * settings.CALIBRATION_HEADROOM
+    cameras = max(1, cameras)
+
+    fps_steps = [fps for fps in FPS_STEPS if fps <= settings.CALIBRATION_MAX_FPS] or [1]
+    table = []
+    for width in WIDTH_STEPS:
+        for fps in fps_steps:
+            cost = camera_cost_ms(bench, fps, width)
+            table.append({
+                'width': width,
+                'fps': fps,
+                'camera_ms_per_s': round(cost, 1),
+                'max_cameras': min(MAX_RECOMMENDED_CAMERAS, int(capacity_ms // cost)) if cost else MAX_RECOMMENDED_CAMERAS,
+            })
+
+    fitting = [row for row in table if row['max_cameras'] >= cameras]
+    if fitting:
+        best = max(fitting, key=lambda row: (row['width'], row['fps']))
+    else:
+        # Nothing fits: the cheapest setting, serving as many cameras as possible
+        best = max(table, key=lambda row: (row['max_cameras'], row['width'], row['fps']))
+
+    return {
+        'processing_fps': best['fps'],
+        # The widest step means native resolution
+        'max_width': 0 if best['width'] == WIDTH_STEPS[0] else best['width'],
+        'max_cameras': max(1, best['max_cameras']),
+        'cameras': cameras,
+        'capacity_ms_per_s': round(capacity_ms, 1),
+        'table': table,
+    }
+
+
+def _calibration_file() -> str:
+    return os.path.join(settings.cache_dir, 'calibration.json')
+
+
+def load_calibration() -> Optional[Dict[str, Any]]:
+    """Last stored calibration, None before the first run"""
+    try:
+        with open(_calibration_file(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def apply_recommendation(recommendation: Dict[str, Any]):
+    """Apply recommended limits to the running settings"""
+    settings.PROCESSING_FPS = recommendation['processing_fps']
+    settings.PROCESSING_MAX_WIDTH = recommendation['max_width']
+    settings.MAX_CAMERAS = recommendation['max_cameras']
+    logger.info(
+        f"Applied calibration: {settings.PROCESSING_FPS} fps, "
+        f"max width {settings.PROCESSING_MAX_WIDTH or 'native'}, {settings.MAX_CAMERAS} cameras"
+    )
+
+
+def refit(cameras: int, apply: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Recommendation for another camera count from the stored benchmark
+    (no new run), applied when it changes the running limits; None
+    before the first calibration
+    """
+    calibration = load_calibration()
+    if calibration is None:
+        return None
+    recommendation = recommend(calibration['benchmark'], cameras)
+    limits = (recommendation['processing_fps'], recommendation['max_width'], recommendation['max_cameras'])
+    if apply and limits != (settings.PROCESSING_FPS, settings.PROCESSING_MAX_WIDTH, settings.MAX_CAMERAS):
+        apply_recommendation(recommendation)
+    return recommendation
+
+
+def calibrate(engine, cameras: int = 1, apply: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Benchmark an AIModuleManager or InferenceWorkerPool, store the result
+    and optionally apply the recommendation (CALIBRATION_AUTO_APPLY)
+
+    Runs inference on the engine, so call it where it cannot overlap live
+    batches (InferenceScheduler.run_exclusive).
+    """
+    started = time.perf_counter()
+    bench = engine.benchmark(WIDTH_STEPS, settings.CALIBRATION_RUNS)
+    result = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'duration_s': round(time.perf_counter() - started, 1),
+        'host': {
+            'cpu_count': os.cpu_count(),
+            'machine': platform.machine(),
+            'workers': settings.INFERENCE_WORKERS,
+        },
+        'benchmark': bench,
+        'recommendation': recommend(bench, cameras),
+        'applied': False,
+    }
+
+    if settings.CALIBRATION_AUTO_APPLY if apply is None else apply:
+        apply_recommendation(result['recommendation'])
+        result['applied'] = True
+
+    try:
+        os.makedirs(settings.cache_dir, exist_ok=True)
+        with open(_calibration_file(), 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Could not store calibration: {e}")
+
+    recommendation = result['recommendation']
+    logger.info(
+        f"Calibration done in {result['duration_s']}s: {recommendation['processing_fps']} fps, "
+        f"max width {recommendation['max_width'] or 'native'}, up to {recommendation['max_cameras']} cameras"
+    )
+    return result
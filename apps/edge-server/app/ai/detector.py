@@ -0,0 +1,162 @@
+"""
+Shared Detector
+Runs one detector pass per frame for every detector-based AI module
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import numpy as np
+from loguru import logger
+
+from app.ai.hot_swap import ModelSlot
+
+
+# COCO class names (YOLOv8 uses COCO dataset)
+COCO_CLASS_NAMES = [
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck',
+    'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench',
+    'bird', 'cat', 'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra',
+    'giraffe', 'backpack', 'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee',
+    'skis', 'snowboard', 'sports ball', 'kite', 'baseball bat', 'baseball glove',
+    'skateboard', 'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup',
+    'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
+    'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'couch',
+    'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush'
+]
+
+
+def class_name(class_id: int) -> str:
+    """Map a COCO class id to its name"""
+    return COCO_CLASS_NAMES[class_id] if 0 <= class_id < len(COCO_CLASS_NAMES) else f'class_{class_id}'
+
+
+class SharedDetector:
+    """
+    Single-pass object detector shared by all modules
+
+    The manager asks for the union of the classes its enabled modules need,
+    runs the model once and hands every module a filtered view.
+    """
+
+    def __init__(self, weights: str = 'yolov8n.pt', backend: str = 'ultralytics'):
+        self.weights = weights
+        self.backend_name = backend
+        self._slot = ModelSlot()
+        self._initialized = False
+
+    @property
+    def _backend(self):
+        return self._slot.current
+
+    @property
+    def slot(self) -> ModelSlot:
+        """Backend holder used for hot-swapping the model (app.ai.hot_swap)"""
+        return self._slot
+
+    def initialize(self) -> bool:
+        """Load the detection model"""
+        if self._initialized or self._backend is not None:
+            return self._backend is not None
+
+        self._initialized = True
+        try:
+            from app.ai.backends import create_backend
+
+            backend = create_backend(self.backend_name, self.weights)
+            backend.load()
+            self._slot.swap(backend)
+            logger.info(f"Shared detector initialized with {self.weights} ({backend.name})")
+        except ImportError as e:
+            logger.warning(f"Detector backend not installed ({e}) - shared detection disabled")
+        except Exception as e:
+            logger.warning(f"Could not load shared detector model: {e}")
+
+        return self._backend is not None
+
+    def is_available(self) -> bool:
+        """Check if the detector can run"""
+        return self._backend is not None
+
+    def supports_imgsz(self) -> bool:
+        """Check if the input size can change per call"""
+        return self._backend is not None and self._backend.supports_imgsz
+
+    def detect(
+        self,
+        frame: np.ndarray,
+        classes: Optional[Iterable[int]] = None,
+        conf: float = 0.25
+    ) -> Optional[List[Dict]]:
+        """
+        Run one detection pass
+
+        Args:
+            frame: OpenCV frame (numpy array)
+            classes: COCO class ids to keep, None for all classes
+            conf: Minimum confidence
+
+        Returns:
+            List of detections, or None if the detector is unavailable:
+            [{
+                'bbox': [x, y, w, h],
+                'confidence': float,
+                'class_id': int,
+                'class': str,
+                'center': (x, y)
+            }]
+        """
+        return self.detect_batch([frame], classes=classes, conf=conf)[0]
+
+    def detect_batch(
+        self,
+        frames: List[np.ndarray],
+        classes: Optional[Iterable[int]] = None,
+        conf: float = 0.25,
+        imgsz: Optional[int] = None
+    ) -> List[Optional[List[Dict]]]:
+        """
+        Run one detection call over several frames
+
+        Returns one detection list per frame, in input order
+        (None entries if the detector is unavailable or failed).
+        """
+        with self._slot.use() as backend:
+            if backend is None or not frames:
+                return [None] * len(frames)
+
+            try:
+                return backend.predict(frames, classes=classes, conf=conf, imgsz=imgsz)
+            except Exception as e:
+                logger.error(f"Error in shared detection: {e}")
+                return [None] * len(frames)
+
+    def warmup(self, shapes: Iterable[Tuple[int, int]], runs: int = 2) -> Optional[float]:
+        """Warm the backend on dummy frames, returns milliseconds or None"""
+        with self._slot.use() as backend:
+            if backend is None:
+                return None
+            try:
+                return backend.warmup(shapes, runs)
+            except Exception as e:
+                logger.warning(f"Detector warm-up failed: {e}")
+                return None
+
+    @staticmethod
+    def filter(
+        detections: List[Dict],
+        classes: Optional[Iterable[int]] = None,
+        conf: float = 0.0
+    ) -> List[Dict]:
+        """Return the subset of detections matching classes and confidence"""
+        wanted: Optional[Set[int]] = set(classes) if classes is not None else None
+        return [
+            det for det in detections
+            if det['confidence'] >= conf
+            and (wanted is None or det['class_id'] in wanted)
+        ]
+
+    def cleanup(self):
+        """Release the model"""
+        self._slot.retire(self._slot.swap(None))
+        self._initialized = False
@@ -0,0 +1,45 @@
+"""
+Model Export
+Converts YOLO weights into ONNX / OpenVINO artifacts for CPU backends
+
+Usage (from the edge-server directory):
+    python -m app.ai.export yolov8n.pt --backend onnxruntime
+    python -m app.ai.export fire_detection.pt --backend openvino
+"""
+import argparse
+import sys
+
+from loguru import logger
+
+from app.ai.backends import BACKEND_ONNXRUNTIME, BACKEND_OPENVINO, DEFAULT_IMGSZ, export_model
+from config.settings import settings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export detector weights for CPU inference backends")
+    parser.add_argument("weights", nargs="+", help="YOLO weight files, e.g. yolov8n.pt")
+    parser.add_argument(
+        "--backend",
+        choices=[BACKEND_ONNXRUNTIME, BACKEND_OPENVINO],
+        default=BACKEND_ONNXRUNTIME,
+        help="Target backend (default: onnxruntime)"
+    )
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ, help="Export input size")
+    args = parser.parse_args(argv)
+
+    settings.ensure_directories()
+
+    failed = 0
+    for weights in args.weights:
+        try:
+            path = export_model(weights, backend=args.backend, imgsz=args.imgsz)
+            print(f"{weights} -> {path}")
+        except Exception as e:
+            logger.error(f"Export failed for {weights}: {e}")
+            failed += 1
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Module Frame Scheduling
+Decides per camera which modules are due on a frame
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from config.settings import settings
+
+# Frames arrive with jitter, so a module is due slightly before its interval
+DUE_TOLERANCE = 0.9
+RATE_WINDOW = 20
+
+
+@dataclass
+class ModuleSchedule:
+    """Run history of one module on one camera"""
+    last_run: Optional[float] = None
+    last_result: Optional[Dict[str, Any]] = None
+    runs: int = 0
+    skips: int = 0
+    run_times: Deque[float] = field(default_factory=lambda: deque(maxlen=RATE_WINDOW))
+
+
+class FrameScheduler:
+    """
+    Per-camera, per-module rate limiter
+
+    Rates resolve in this order: runtime override for the camera,
+    settings.CAMERA_MODULE_FPS, settings.MODULE_FPS, the module's
+    target_fps. A module with burst_fps runs at that rate while its
+    last result on the camera had detections. A temporary demotion
+    (demote()) caps whichever rate applies.
+    """
+
+    def __init__(self):
+        self._schedules: Dict[Tuple[str, str], ModuleSchedule] = {}
+        self._overrides: Dict[str, Dict[str, float]] = {}
+        self._demotions: Dict[Tuple[str, str], Tuple[float, float]] = {}  # -> (fps, until)
+
+    def set_rate(self, camera_id: str, module_id: str, fps: Optional[float]):
+        """Override a module's rate on one camera (None removes the override)"""
+        overrides = self._overrides.setdefault(camera_id, {})
+        if fps is None:
+            overrides.pop(module_id, None)
+        else:
+            overrides[module_id] = fps
+
+    def demote(self, camera_id: str, module_id: str, fps: float, seconds: float):
+        """Cap a module's rate on one camera for a while"""
+        self._demotions[(camera_id, module_id)] = (fps, time.monotonic() + seconds)
+
+    def demotion(self, camera_id: str, module_id: str) -> Optional[float]:
+        """Active rate cap of a module on a camera, None when not demoted"""
+        demotion = self._demotions.get((camera_id, module_id))
+        if demotion is None:
+            return None
+        if time.monotonic() >= demotion[1]:
+            del self._demotions[(camera_id, module_id)]
+            return None
+        return demotion[0]
+
+    def rate_for(self, camera_id: str, module) -> Optional[float]:
+        """Target rate of a module on a camera, None for every frame"""
+        fps = self._configured_rate(camera_id, module)
+        cap = self.demotion(camera_id, module.module_id)
+        if cap is not None and (not fps or cap < fps):
+            return cap
+        return fps
+
+    def _configured_rate(self, camera_id: str, module) -> Optional[float]:
+        module_id = module.module_id
+        for rates in (
+            self._overrides.get(camera_id, {}),
+            settings.CAMERA_MODULE_FPS.get(camera_id, {}),
+            settings.MODULE_FPS,
+        ):
+            if module_id in rates:
+                return rates[module_id] or None
+
+        schedule = self._schedules.get((camera_id, module_id))
+        if module.burst_fps and schedule and schedule.last_result and schedule.last_result.get('detections'):
+            return module.burst_fps
+        return module.target_fps
+
+    def is_due(self, camera_id: str, module, now: Optional[float] = None) -> bool:
+        """Check whether a module should run on this camera's current frame"""
+        schedule = self._schedules.get((camera_id, module.module_id))
+        if schedule is None or schedule.last_run is None:
+            return True
+
+        fps = self.rate_for(camera_id, module)
+        if not fps:
+            return True
+
+        now = time.monotonic() if now is None else now
+        return now - schedule.last_run >= DUE_TOLERANCE / fps
+
+    def record_run(self, camera_id: str, module_id: str, result: Optional[Dict[str, Any]], now: Optional[float] = None):
+        schedule = self._schedules.setdefault((camera_id, module_id), ModuleSchedule())
+        now = time.monotonic() if now is None else now
+        schedule.last_run = now
+        schedule.last_result = result
+        schedule.runs += 1
+        schedule.run_times.append(now)
+
+    def record_skip(self, camera_id: str, module_id: str) -> Optional[Dict[str, Any]]:
+        """Count a skipped frame and return the module's last result"""
+        schedule = self._schedules.setdefault((camera_id, module_id), ModuleSchedule())
+        schedule.skips += 1
+        return schedule.last_result
+
+    def effective_fps(self, camera_id: str, module_id: str) -> float:
+        schedule = self._schedules.get((camera_id, module_id))
+        if not schedule or len(schedule.run_times) < 2:
+            return 0.0
+        span = schedule.run_times[-1] - schedule.run_times[0]
+        return (len(schedule.run_times) - 1) / span if span > 0 else 0.0
+
+    def remove_camera(self, camera_id: str):
+        """Forget the schedule state of a removed camera"""
+        for key in [key for key in self._schedules if key[0] == camera_id]:
+            del self._schedules[key]
+        for key in [key for key in self._demotions if key[0] == camera_id]:
+            del self._demotions[key]
+        self._overrides.pop(camera_id, None)
+
+    def get_stats(self, modules: Dict[str, Any]) -> Dict[str, Dict[str, Dict]]:
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for (camera_id, module_id), schedule in self._schedules.items():
+            module = modules.get(module_id)
+            stats.setdefault(camera_id, {})[module_id] = {
+                'target_fps': self.rate_for(camera_id, module) if module else None,
+                'demoted_fps': self.demotion(camera_id, module_id),
+                'effective_fps': round(self.effective_fps(camera_id, module_id), 2),
+                'runs': schedule.runs,
+                'skips': schedule.skips,
+            }
+        return stats
@@ -0,0 +1,164 @@
+"""
+Model Hot-Swap
+Replaces a running detector model without pausing inference: the new
+model is loaded and validated beside the old one, swapped in atomically,
+and the old one is released once the frames still using it finish
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from loguru import logger
+
+from app.ai.backends import (
+    BACKEND_OPENVINO,
+    DetectorBackend,
+    OnnxRuntimeBackend,
+    OpenVINOBackend,
+    create_backend,
+)
+from app.ai.calibration import synthetic_frame
+from app.ai.model_registry import model_registry
+from config.settings import settings
+
+# Target name of the shared detector(s); any other target is a module id
+DETECTOR_TARGET = 'detector'
+
+
+class ModelSlot:
+    """
+    Holder of the backend a detector or module currently runs
+
+    use() pins the current backend for one inference call, so a swap never
+    releases a model under a running call: retire() waits until the calls
+    that started before the swap are done.
+    """
+
+    def __init__(self, backend: Optional[DetectorBackend] = None):
+        self._current = backend
+        self._active: Dict[int, int] = {}  # id(backend) -> calls in flight
+        self._cond = threading.Condition()
+
+    @property
+    def current(self) -> Optional[DetectorBackend]:
+        return self._current
+
+    @contextmanager
+    def use(self) -> Iterator[Optional[DetectorBackend]]:
+        with self._cond:
+            backend = self._current
+            if backend is not None:
+                self._active[id(backend)] = self._active.get(id(backend), 0) + 1
+        try:
+            yield backend
+        finally:
+            if backend is not None:
+                with self._cond:
+                    remaining = self._active[id(backend)] - 1
+                    if remaining:
+                        self._active[id(backend)] = remaining
+                    else:
+                        del self._active[id(backend)]
+                    self._cond.notify_all()
+
+    def swap(self, backend: Optional[DetectorBackend]) -> Optional[DetectorBackend]:
+        """Make backend current, returns the previous one"""
+        with self._cond:
+            previous, self._current = self._current, backend
+        return previous
+
+    def retire(self, backend: Optional[DetectorBackend], timeout: float = 30.0) -> bool:
+        """Release a swapped-out backend once no call uses it anymore"""
+        if backend is None:
+            return True
+        with self._cond:
+            drained = self._cond.wait_for(lambda: id(backend) not in self._active, timeout)
+        if not drained:
+            logger.warning(f"Model {backend.model_key} still in use after {timeout:.0f}s - releasing anyway")
+        backend.release()
+        return drained
+
+
+def build_backend(model: str, backend: Optional[str] = None) -> DetectorBackend:
+    """
+    Backend for a model reference
+    .onnx and .xml files are loaded as given (ONNX on OpenVINO when asked
+    for); anything else is a weight file resolved like at startup.
+    """
+    path = model if os.path.isabs(model) or os.path.exists(model) else os.path.join(settings.models_dir, model)
+    weights = f"{Path(model).stem}.pt"
+    suffix = Path(model).suffix.lower()
+
+    if suffix == '.xml' or (suffix == '.onnx' and backend == BACKEND_OPENVINO):
+        built: DetectorBackend = OpenVINOBackend(weights, model_path=path)
+    elif suffix == '.onnx':
+        built = OnnxRuntimeBackend(weights, model_path=path)
+    else:
+        built = create_backend(backend or settings.DETECTOR_BACKEND, model)
+    return built
+
+
+def _revision(backend: DetectorBackend) -> str:
+    path = getattr(backend, 'model_path', backend.weights)
+    return str(int(os.path.getmtime(path))) if os.path.exists(path) else '0'
+
+
+def validate_backend(
+    backend: DetectorBackend,
+    shapes: Iterable[Tuple[int, int]],
+    classes: Optional[Iterable[int]] = None,
+    runs: int = 1
+):
+    """
+    Warm a loaded backend up and check it on a warm-up frame
+    classes are COCO ids the consumers read; the model must map them to
+    the same names. Raises ValueError when the model is unusable.
+    """
+    from app.ai.detector import class_name
+
+    shapes = list(shapes)
+    backend.warmup(shapes, runs)
+
+    height, width = shapes[0]
+    outputs = backend.predict([synthetic_frame(height, width)])
+    if not isinstance(outputs, list) or len(outputs) != 1 or not isinstance(outputs[0], list):
+        raise ValueError("model returned no per-frame detection list")
+    for detection in outputs[0]:
+        if not {'bbox', 'confidence', 'class_id'} <= detection.keys():
+            raise ValueError("model returned malformed detections")
+
+    missing = [c for c in (classes or ()) if backend.names.get(c) != class_name(c)]
+    if missing:
+        raise ValueError(f"model lacks classes needed by enabled modules: {[class_name(c) for c in missing]}")
+
+
+def swap_into(
+    slot: ModelSlot,
+    model: str,
+    backend: Optional[str],
+    shapes: Iterable[Tuple[int, int]],
+    classes: Optional[Iterable[int]] = None
+) -> Optional[str]:
+    """
+    Load and validate a new backend, swap it into the slot and release
+    the old one after its in-flight calls
+    Returns the replaced model key. The slot is untouched when the new
+    model fails to load or validate.
+    """
+    candidate = build_backend(model, backend)
+    # A changed file behind an already loaded key would hit the registry cache
+    if model_registry.get(candidate.model_key) is not None:
+        candidate.model_key = f"{candidate.model_key}@{_revision(candidate)}"
+
+    candidate.load()
+    try:
+        validate_backend(candidate, shapes, classes, settings.WARMUP_RUNS)
+    except Exception:
+        candidate.release()
+        raise
+
+    previous = slot.swap(candidate)
+    slot.retire(previous)
+    return previous.model_key if previous else None
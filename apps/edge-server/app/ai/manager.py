@@ -2,13 +2,35 @@
 AI Module Manager
 Manages all AI processing modules
 """
-from typing import Dict, List, Optional, Any
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 import numpy as np
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.calibration import benchmark
+from app.ai.detector import SharedDetector
+from app.ai.frame_schedule import FrameScheduler
+from app.ai.hot_swap import DETECTOR_TARGET, ModelSlot, swap_into
+from app.ai.motion import MotionGate
+from app.ai.products import TRACKS, ModuleProvider, ProductGraph
+from app.ai.resolution import ResolutionTuner
+from app.ai.result_cache import StaticSceneCache, frame_signature
+from app.ai.roi import offset_detections, roi_rects, zone_polygons
+from app.ai.threads import thread_budget
+from app.ai.tiling import merge_detections, tile_grid
+from app.ai.tracking import PersonTracks
+from app.ai.watchdog import DeadlineExceeded, ModuleWatchdog
 from config.settings import settings
 
+# Camera id used for warm-up frames so no real camera state is touched
+WARMUP_CAMERA_ID = '__warmup__'
+
 
 class AIModuleManager:
     """
@@ -18,7 +40,39 @@ class AIModuleManager:
     
     def __init__(self):
         self.modules: Dict[str, BaseAIModule] = {}
+        self.detectors: Dict[str, SharedDetector] = {}  # backend -> detector
+        self.frame_scheduler = FrameScheduler()
+        self.products = ProductGraph()
+        self.products.register(TRACKS, PersonTracks())
+        self.motion_gate: Optional[MotionGate] = MotionGate() if settings.MOTION_GATE else None
+        self.resolution_tuner: Optional[ResolutionTuner] = (
+            ResolutionTuner() if settings.ADAPTIVE_RESOLUTION else None
+        )
+        self.result_cache: Optional[StaticSceneCache] = (
+            StaticSceneCache() if settings.STATIC_CACHE else None
+        )
+        self._roi_stats: Dict[str, Dict] = {}  # camera_id -> last ROI crop
+        self._tile_stats: Dict[str, Dict] = {}  # camera_id -> last tiled pass
+        self._resolutions: Dict[str, Tuple[int, int]] = self._load_resolutions()
+        self._warmed: set = set()  # 'detector:<backend>' and module ids
+        self.warmup_stats: Dict[str, Any] = {'detectors': {}, 'modules': {}}
+        self._swap_lock = threading.Lock()
+        self._swaps: deque = deque(maxlen=20)  # recent hot-swaps, newest last
+        self._camera_params: Dict[str, Dict[str, Dict[str, Any]]] = {}  # camera_id -> module -> overrides
+        self._module_executor: Optional[ThreadPoolExecutor] = None
+        if settings.MODULE_EXECUTION == 'parallel' and settings.MODULE_THREADS > 1:
+            self._module_executor = ThreadPoolExecutor(
+                max_workers=settings.MODULE_THREADS,
+                thread_name_prefix="ai-module"
+            )
         self._load_modules()
+        for camera_id in settings.CAMERA_MODULE_PARAMS:
+            self.configure_camera(camera_id)
+        self.watchdog = ModuleWatchdog(
+            self.frame_scheduler,
+            # One thread per module may be held by a stalled call
+            workers=len(self.modules) + max(1, settings.MODULE_THREADS)
+        )
 
     def _load_modules(self):
         """Load all available AI modules"""
@@ -67,25 +121,218 @@ class AIModuleManager:
                 confidence_threshold=settings.OBJECT_CONFIDENCE
             )
 
+            # Modules computing products for others (e.g. face embeddings)
+            for module in self.modules.values():
+                for product in module.produces:
+                    self.products.register(product, ModuleProvider(module, product))
+
             logger.info(f"Loaded {len(self.modules)} AI modules")
         except ImportError as e:
             logger.warning(f"Some AI modules could not be loaded: {e}")
             logger.warning("AI processing will be limited")
 
     def enable_modules(self, module_ids: List[str]):
-        """Enable specific modules"""
+        """Enable specific modules; warmup() is separate so callers run it between batches"""
         for module_id in module_ids:
             if module_id in self.modules:
                 self.modules[module_id].enable()
             else:
                 logger.warning(f"Unknown module: {module_id}")
 
+        # Load the shared detector(s) once any detector-based module is on
+        for module in self.modules.values():
+            if module.detector_classes and module.is_enabled():
+                self._detector_for(module).initialize()
+
+        # Producers of consumed products load their models even when disabled
+        self.products.prepare(
+            product for module in self.modules.values() if module.is_enabled() for product in module.consumes
+        )
+        thread_budget.apply()
+
+    def warmup(self) -> Dict[str, Any]:
+        """
+        Run dummy frames at each camera's resolution through every enabled
+        detector and module that has not been warmed up yet, so the first
+        real frames do not pay for lazy graph setup and allocator growth
+        """
+        shapes = self._warmup_shapes()
+        started = time.perf_counter()
+
+        for backend, detector in self.detectors.items():
+            key = f'detector:{backend}'
+            if key in self._warmed or not detector.is_available():
+                continue
+            elapsed = detector.warmup(shapes, settings.WARMUP_RUNS)
+            self._warmed.add(key)
+            if elapsed is not None:
+                self.warmup_stats['detectors'][backend] = round(elapsed, 1)
+                logger.info(f"Detector '{backend}' warmed up in {elapsed:.0f} ms on {len(shapes)} resolution(s)")
+
+        for module_id, module in self.modules.items():
+            if module_id in self._warmed or not module.is_enabled():
+                continue
+            # Detector consumers get an empty shared result so only their own path warms up
+            metadata = {'shared_detections': []} if module.detector_classes else {}
+            try:
+                elapsed = module.warmup(shapes, WARMUP_CAMERA_ID, metadata)
+                self.warmup_stats['modules'][module_id] = round(elapsed, 1)
+            except Exception as e:
+                logger.warning(f"Warm-up of module '{module_id}' failed: {e}")
+            self._warmed.add(module_id)
+        # Warm-up frames leave no tracks, counters or scene state behind
+        self.remove_camera(WARMUP_CAMERA_ID)
+
+        self.warmup_stats['resolutions'] = [list(shape) for shape in shapes]
+        self.warmup_stats['last_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return self.warmup_stats
+
+    def benchmark(self, widths: Iterable[int], runs: Optional[int] = None) -> Dict[str, Any]:
+        """Per-frame cost of the enabled detectors and modules on this host (see calibration)"""
+        return benchmark(self, widths, runs)
+
+    def swap_model(self, target: str, model: str, backend: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Hot-swap the model of the shared detector(s) or of a module
+
+        target is 'detector' (every shared detector, or only the one of
+        `backend`) or the id of a module with its own model (e.g. 'fire');
+        model is a weight file or an .onnx / .xml export. The new model is
+        loaded and validated beside the running one, so call this off the
+        inference thread: frames keep running on the old model meanwhile.
+        """
+        started = time.perf_counter()
+        record: Dict[str, Any] = {
+            'target': target,
+            'model': model,
+            'backend': backend,
+            'started_at': time.time(),
+        }
+
+        with self._swap_lock:
+            try:
+                record['replaced'] = self._swap_slots(target, model, backend)
+                record['status'] = 'swapped'
+                logger.info(f"Hot-swapped {target} model to {model}")
+            except Exception as e:
+                record['status'] = 'failed'
+                record['error'] = str(e)
+                logger.error(f"Hot-swap of {target} model to {model} failed: {e}")
+
+        record['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self._swaps.append(record)
+        return record
+
+    def _swap_slots(self, target: str, model: str, backend: Optional[str]) -> Dict[str, Optional[str]]:
+        """Swap into every slot of a target, returns {slot: replaced model key}"""
+        shapes = self._warmup_shapes()
+
+        if target == DETECTOR_TARGET:
+            detectors = {
+                name: detector for name, detector in self.detectors.items()
+                if backend is None or name == backend
+            }
+            if not detectors:
+                raise ValueError("No shared detector is running")
+
+            replaced = {}
+            for name, detector in detectors.items():
+                # The consumers' classes must keep their meaning in the new model
+                classes = set()
+                for module_id, module in self.modules.items():
+                    if module.detector_classes and module.is_enabled() and settings.detector_backend_for(module_id) == name:
+                        classes.update(module.detector_classes)
+                replaced[name] = swap_into(detector.slot, model, name, shapes, classes)
+                detector.weights = model
+            return replaced
+
+        module = self.modules.get(target)
+        slot: Optional[ModelSlot] = module.get_model_slot() if module else None
+        if slot is None:
+            raise ValueError(f"'{target}' is not a detector or a module with its own model")
+        backend = backend or settings.detector_backend_for(target)
+        return {target: swap_into(slot, model, backend, shapes)}
+
+    def _warmup_shapes(self) -> List[Tuple[int, int]]:
+        """Distinct camera resolutions seen before, else the configured defaults"""
+        shapes = sorted(set(self._resolutions.values()))
+        return shapes or [tuple(shape) for shape in settings.WARMUP_RESOLUTIONS]
+
+    @staticmethod
+    def _resolutions_file() -> str:
+        return os.path.join(settings.cache_dir, 'camera_resolutions.json')
+
+    def _load_resolutions(self) -> Dict[str, Tuple[int, int]]:
+        try:
+            with open(self._resolutions_file(), 'r', encoding='utf-8') as f:
+                return {camera_id: tuple(shape) for camera_id, shape in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def _note_resolution(self, camera_id: str, frame: np.ndarray):
+        """Remember camera resolutions so the next start warms up at the real size"""
+        shape = tuple(frame.shape[:2])
+        if self._resolutions.get(camera_id) == shape:
+            return
+
+        self._resolutions[camera_id] = shape
+        try:
+            # Merge with what other worker processes wrote
+            known = self._load_resolutions()
+            known.update(self._resolutions)
+            os.makedirs(settings.cache_dir, exist_ok=True)
+            with open(self._resolutions_file(), 'w', encoding='utf-8') as f:
+                json.dump({camera_id: list(shape) for camera_id, shape in known.items()}, f)
+        except OSError as e:
+            logger.debug(f"Could not store camera resolutions: {e}")
+
     def disable_modules(self, module_ids: List[str]):
         """Disable specific modules"""
         for module_id in module_ids:
             if module_id in self.modules:
                 self.modules[module_id].disable()
 
+    def unload_modules(self, module_ids: List[str]) -> List[str]:
+        """
+        Disable modules and release their models, e.g. outside their schedule
+        enable_modules loads them again. Producers still feeding an enabled
+        module are kept, and shared detectors no enabled module uses any
+        more are released too. Call between batches. Returns the ids unloaded.
+        """
+        consumed = {
+            product for module_id, module in self.modules.items()
+            if module.is_enabled() and module_id not in module_ids for product in module.consumes
+        }
+        unloaded = []
+        for module_id in module_ids:
+            module = self.modules.get(module_id)
+            if module is None or not module._initialized or consumed.intersection(module.produces):
+                continue
+            module.cleanup()
+            self._warmed.discard(module_id)
+            unloaded.append(module_id)
+
+        # Producers loaded only for consumers that are gone now
+        consumed = {product for module in self.modules.values() if module.is_enabled() for product in module.consumes}
+        for module_id, module in self.modules.items():
+            if module.produces and module._initialized and not module.enabled and not consumed.intersection(module.produces):
+                module.cleanup()
+                self._warmed.discard(module_id)
+
+        needed = {
+            settings.detector_backend_for(module_id)
+            for module_id, module in self.modules.items()
+            if module.detector_classes and module.is_enabled()
+        }
+        for backend, detector in self.detectors.items():
+            if backend not in needed and detector.is_available():
+                # Keeps its weights (including a hot-swapped model) for the next initialize
+                detector.cleanup()
+                self._warmed.discard(f'detector:{backend}')
+                logger.info(f"Shared detector '{backend}' released")
+
+        return unloaded
+
     def process_frame(
         self,
         frame: np.ndarray,
@@ -104,6 +351,166 @@ class AIModuleManager:
                 'modules': {...}
             }
         """
+        self._note_resolution(camera_id, frame)
+        active_modules, skipped = self._due_modules(camera_id, frame, self._active_modules(enabled_modules))
+        rois = [self._roi_for(camera_id, frame, active_modules, metadata)]
+        shared_detections = self._run_shared_detection([frame], [active_modules], rois, [camera_id])[0]
+
+        return self._run_modules(frame, camera_id, active_modules, metadata, shared_detections, skipped)
+
+    def process_batch(self, requests: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Process frames from several cameras with one batched detector call
+
+        Args:
+            requests: [{'frame', 'camera_id', 'enabled_modules', 'metadata'}]
+
+        Returns:
+            One process_frame() result per request, in input order
+        """
+        for req in requests:
+            self._note_resolution(req['camera_id'], req['frame'])
+
+        scheduled = [
+            self._due_modules(req['camera_id'], req['frame'], self._active_modules(req['enabled_modules']))
+            for req in requests
+        ]
+        active = [due for due, _ in scheduled]
+        rois = [
+            self._roi_for(req['camera_id'], req['frame'], active_modules, req.get('metadata'))
+            for req, active_modules in zip(requests, active)
+        ]
+        shared = self._run_shared_detection(
+            [req['frame'] for req in requests],
+            active,
+            rois,
+            [req['camera_id'] for req in requests]
+        )
+
+        return [
+            self._run_modules(
+                req['frame'],
+                req['camera_id'],
+                active_modules,
+                req.get('metadata'),
+                detections,
+                skipped
+            )
+            for req, active_modules, (_, skipped), detections in zip(requests, active, scheduled, shared)
+        ]
+
+    def _active_modules(self, enabled_modules: List[str]) -> List[tuple]:
+        """Resolve requested module ids to (module_id, module) pairs that can run"""
+        return [
+            (module_id, self.modules[module_id])
+            for module_id in enabled_modules
+            if module_id in self.modules and self.modules[module_id].is_enabled()
+        ]
+
+    def _due_modules(
+        self,
+        camera_id: str,
+        frame: np.ndarray,
+        active_modules: List[tuple]
+    ) -> Tuple[List[tuple], List[tuple]]:
+        """
+        Split active modules into those due on this frame and
+        (module_id, module, reason) entries for those skipped
+        """
+        now = time.monotonic()
+        due, skipped = [], []
+        for module_id, module in active_modules:
+            if self.watchdog.is_stalled(module):
+                # An overrunning call still holds its model
+                skipped.append((module_id, module, 'stalled'))
+            elif self.frame_scheduler.is_due(camera_id, module, now):
+                due.append((module_id, module))
+            else:
+                skipped.append((module_id, module, 'not_due'))
+
+        # Static scene: detector-based modules wait for motion or the forced pass
+        if self.motion_gate and any(module.detector_classes for _, module in due):
+            if not self.motion_gate.check(camera_id, frame, now):
+                skipped.extend(
+                    (module_id, module, 'no_motion')
+                    for module_id, module in due if module.detector_classes
+                )
+                due = [(module_id, module) for module_id, module in due if not module.detector_classes]
+
+        # Unchanged frame: opted-in modules reuse the result computed on it
+        if self.result_cache and any(module.cache_static_results for _, module in due):
+            signature = frame_signature(frame)
+            hits = {
+                module_id for module_id, module in due
+                if module.cache_static_results
+                and self.result_cache.lookup(camera_id, module_id, signature, now)
+            }
+            skipped.extend((module_id, module, 'static_scene') for module_id, module in due if module_id in hits)
+            due = [(module_id, module) for module_id, module in due if module_id not in hits]
+
+        return due, skipped
+
+    def _roi_for(
+        self,
+        camera_id: str,
+        frame: np.ndarray,
+        active_modules: List[tuple],
+        metadata: Optional[Dict]
+    ) -> Optional[List[tuple]]:
+        """
+        Crop rectangles for the shared pass of a frame
+
+        Only used when every detector consumer on the frame is zone-driven
+        and has zones; any full-frame consumer needs the whole frame.
+        """
+        if not settings.ROI_INFERENCE:
+            return None
+
+        consumers = [module for _, module in active_modules if module.detector_classes]
+        if not consumers or not all(module.roi_zones for module in consumers):
+            return None
+
+        polygons = []
+        for module in consumers:
+            zones = module.get_zones(camera_id, metadata)
+            if not zones:
+                return None
+            polygons.extend(zone_polygons(zones))
+
+        rects = roi_rects(polygons, frame.shape, settings.ROI_MARGIN_PX, settings.ROI_MAX_COVERAGE)
+        height, width = frame.shape[:2]
+        self._roi_stats[camera_id] = {
+            'rects': len(rects) if rects else 0,
+            'pixel_ratio': round(sum(w * h for _, _, w, h in rects) / float(width * height), 4) if rects else 1.0,
+        }
+        return rects
+
+    def _tiled_for(self, camera_id: str, active_modules: List[tuple]) -> bool:
+        """Whether any detector consumer on this camera asked for tiled inference"""
+        return any(
+            module.detector_classes and settings.tiled_inference_for(camera_id, module_id)
+            for module_id, module in active_modules
+        )
+
+    def _detector_for(self, module: BaseAIModule) -> SharedDetector:
+        """Shared detector for the backend configured for this module"""
+        backend = settings.detector_backend_for(module.module_id)
+        detector = self.detectors.get(backend)
+        if detector is None:
+            detector = SharedDetector(settings.DETECTOR_WEIGHTS, backend=backend)
+            self.detectors[backend] = detector
+        return detector
+
+    def _run_modules(
+        self,
+        frame: np.ndarray,
+        camera_id: str,
+        active_modules: List[tuple],
+        metadata: Optional[Dict],
+        shared_detections: Dict[str, List[Dict]],
+        skipped: Optional[List[tuple]] = None
+    ) -> Dict[str, Any]:
+        """Run active modules on a frame and aggregate their results"""
         results = {
             'detections': [],
             'events': [],
@@ -111,45 +518,382 @@ class AIModuleManager:
             'modules': {},
         }
 
-        for module_id in enabled_modules:
-            if module_id not in self.modules:
-                continue
-
-            module = self.modules[module_id]
-            if not module.is_enabled():
-                continue
+        products = self.products.compute(frame, camera_id, active_modules, shared_detections)
+        tasks = [
+            (module_id, module, self._module_metadata(module_id, module, camera_id, metadata, shared_detections, products))
+            for module_id, module in active_modules
+        ]
 
-            try:
-                module_result = module.process_frame(frame, camera_id, metadata)
-                
-                # Aggregate results
-                if 'detections' in module_result:
-                    results['detections'].extend(module_result['detections'])
-                
-                if 'events' in module_result:
-                    results['events'].extend(module_result['events'])
-                
-                if 'alerts' in module_result:
-                    results['alerts'].extend(module_result['alerts'])
-                
-                results['modules'][module_id] = {
-                    'processed': True,
-                    'detections_count': len(module_result.get('detections', [])),
-                }
+        if self._module_executor and len(tasks) > 1:
+            outcomes = self._run_concurrent(frame, camera_id, tasks)
+        else:
+            outcomes = [self._run_module(frame, camera_id, *task) for task in tasks]
 
-            except Exception as e:
-                logger.error(f"Error processing frame with module '{module_id}': {e}")
+        # Merge in request order so output does not depend on thread timing
+        for (module_id, module, _), (module_result, error) in zip(tasks, outcomes):
+            self.frame_scheduler.record_run(camera_id, module_id, module_result)
+            if self.result_cache and module.cache_static_results:
+                if error is None:
+                    self.result_cache.store(camera_id, module_id)
+                else:
+                    self.result_cache.invalidate(camera_id, module_id)
+            if error is not None:
                 results['modules'][module_id] = {
                     'processed': False,
-                    'error': str(e),
+                    'error': error,
                 }
+                continue
+
+            # Aggregate results
+            if 'detections' in module_result:
+                results['detections'].extend(module_result['detections'])
+
+            if 'events' in module_result:
+                results['events'].extend(module_result['events'])
+
+            if 'alerts' in module_result:
+                results['alerts'].extend(module_result['alerts'])
+
+            results['modules'][module_id] = {
+                'processed': True,
+                'detections_count': len(module_result.get('detections', [])),
+            }
+
+        # Modules skipped on this frame: optionally carry their last detections
+        for module_id, module, reason in skipped or []:
+            last_result = self.frame_scheduler.record_skip(camera_id, module_id)
+            entry = {'processed': False, 'skipped': reason}
+            if (module.reuse_last_result or reason == 'static_scene') and last_result:
+                detections = last_result.get('detections', [])
+                results['detections'].extend(detections)
+                entry['reused'] = True
+                entry['detections_count'] = len(detections)
+            results['modules'][module_id] = entry
 
         return results
 
+    def _module_metadata(
+        self,
+        module_id: str,
+        module: BaseAIModule,
+        camera_id: str,
+        metadata: Optional[Dict],
+        shared_detections: Dict[str, List[Dict]],
+        products: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict]:
+        """Metadata for one module, with its view of the shared detections and products"""
+        module_metadata = None
+        if module.consumes and products:
+            module_metadata = dict(metadata or {})
+            module_metadata['products'] = {product: products.get(product) for product in module.consumes}
+
+        detections = shared_detections.get(settings.detector_backend_for(module_id)) if module.detector_classes else None
+        if detections is not None:
+            module_metadata = module_metadata if module_metadata is not None else dict(metadata or {})
+            module_metadata['shared_detections'] = SharedDetector.filter(
+                detections,
+                module.detector_classes,
+                module.params(camera_id).confidence_threshold
+            )
+
+        return module_metadata if module_metadata is not None else metadata
+
+    def _run_module(
+        self,
+        frame: np.ndarray,
+        camera_id: str,
+        module_id: str,
+        module: BaseAIModule,
+        metadata: Optional[Dict]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Run one module within its deadline, returning (result, error) so
+        failures and overruns stay isolated
+        """
+        try:
+            return self.watchdog.call(module, camera_id, module.process_frame, frame, camera_id, metadata), None
+        except DeadlineExceeded as e:
+            return None, str(e)  # reported by the watchdog
+        except Exception as e:
+            logger.error(f"Error processing frame with module '{module_id}': {e}")
+            return None, str(e)
+
+    def _run_concurrent(
+        self,
+        frame: np.ndarray,
+        camera_id: str,
+        tasks: List[tuple]
+    ) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Run independent modules on the module thread pool
+
+        Modules holding the same registry model are not independent (the
+        model object is not safe to call from two threads), so they are
+        chained in one group and run serially inside it.
+        """
+        groups: List[Tuple[set, List[int]]] = []
+        for index, (_, module, _) in enumerate(tasks):
+            keys = set(module.model_keys)
+            merged = (keys, [index])
+            for group in [g for g in groups if g[0] & keys]:
+                groups.remove(group)
+                merged[0].update(group[0])
+                merged[1][:0] = group[1]
+            groups.append(merged)
+
+        def run_group(indexes: List[int]):
+            return [(index, self._run_module(frame, camera_id, *tasks[index])) for index in sorted(indexes)]
+
+        outcomes: List = [None] * len(tasks)
+        futures = [self._module_executor.submit(run_group, indexes) for _, indexes in groups]
+        for future in futures:
+            for index, outcome in future.result():
+                outcomes[index] = outcome
+        return outcomes
+
+    def _run_shared_detection(
+        self,
+        frames: List[np.ndarray],
+        active: List[List[tuple]],
+        rois: Optional[List[Optional[List[tuple]]]] = None,
+        camera_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, List[Dict]]]:
+        """
+        Run one detector call per backend over the union of classes
+        requested by the active modules of every frame.
+
+        Frames with ROI rectangles are detected on those crops only and
+        the boxes are mapped back to full-frame coordinates. Cameras with
+        tiled inference add overlapping tiles of each region to the same
+        call and the tile detections are merged with cross-tile NMS.
+
+        Returns one {backend: detections} dict per frame. A backend is
+        missing when no module needs it or its detector is unavailable,
+        so those modules fall back to their own model.
+        """
+        shared: List[Dict[str, List[Dict]]] = [{} for _ in frames]
+
+        # backend -> (frame indexes, consumer modules, their thresholds on those cameras)
+        passes: Dict[str, tuple] = {}
+        for index, active_modules in enumerate(active):
+            for module_id, module in active_modules:
+                if not module.detector_classes:
+                    continue
+                backend = settings.detector_backend_for(module_id)
+                indexes, consumers, thresholds = passes.setdefault(backend, (set(), [], []))
+                indexes.add(index)
+                consumers.append(module)
+                thresholds.append(
+                    module.params(camera_ids[index]).confidence_threshold if camera_ids else module.confidence_threshold
+                )
+
+        for backend, (indexes, consumers, thresholds) in passes.items():
+            detector = self.detectors.get(backend)
+            if detector is None or not detector.is_available():
+                continue
+
+            classes = set()
+            for module in consumers:
+                classes.update(module.detector_classes)
+            conf = min(thresholds)
+
+            adaptive = self.resolution_tuner is not None and camera_ids and detector.supports_imgsz()
+
+            # (frame index, image, x offset, y offset, input size) per detector input
+            inputs = []
+            tiled = set()
+            for index in sorted(indexes):
+                frame = frames[index]
+                height, width = frame.shape[:2]
+                regions = (rois[index] if rois else None) or [(0, 0, width, height)]
+                imgsz = None
+
+                if camera_ids and self._tiled_for(camera_ids[index], active[index]):
+                    tiled.add(index)
+                    rects = []
+                    for region in regions:
+                        tiles = tile_grid(region, settings.TILE_SIZE, settings.TILE_OVERLAP)
+                        rects.extend(tiles)
+                        if len(tiles) > 1:
+                            # Whole-region pass keeps objects larger than a tile intact
+                            rects.append(region)
+                else:
+                    rects = regions
+                    if adaptive:
+                        imgsz = self.resolution_tuner.imgsz_for(camera_ids[index])
+
+                inputs.extend((index, frame[y:y + h, x:x + w], x, y, imgsz) for x, y, w, h in rects)
+
+            # One detector call per input size (all cameras at the same size share it)
+            started = time.monotonic()
+            batch_results: List[Optional[List[Dict]]] = [None] * len(inputs)
+            for imgsz in {item[4] for item in inputs}:
+                positions = [n for n, item in enumerate(inputs) if item[4] == imgsz]
+                outputs = detector.detect_batch(
+                    [inputs[n][1] for n in positions],
+                    classes=classes,
+                    conf=conf,
+                    imgsz=imgsz
+                )
+                for n, detections in zip(positions, outputs):
+                    batch_results[n] = detections
+            elapsed_ms = (time.monotonic() - started) * 1000
+
+            if adaptive:
+                for (index, image, _, _, imgsz), detections in zip(inputs, batch_results):
+                    if imgsz is not None and detections is not None:
+                        self.resolution_tuner.observe(camera_ids[index], detections, image.shape)
+
+            merged: Dict[int, Optional[List[Dict]]] = {}
+            for (index, _, dx, dy, _), detections in zip(inputs, batch_results):
+                if detections is None or (index in merged and merged[index] is None):
+                    merged[index] = None
+                    continue
+                merged.setdefault(index, []).extend(offset_detections(detections, dx, dy))
+
+            for index, detections in merged.items():
+                if detections is None:
+                    continue
+                if index in tiled:
+                    detections = merge_detections(detections)
+                    tiles = sum(1 for item in inputs if item[0] == index)
+                    self._tile_stats[camera_ids[index]] = {
+                        'tiles': tiles,
+                        # Share of the batched detector call spent on this frame
+                        'latency_ms': round(elapsed_ms * tiles / len(inputs), 1),
+                        'detections': len(detections),
+                    }
+                shared[index][backend] = detections
+
+        return shared
+
     def get_module(self, module_id: str) -> Optional[BaseAIModule]:
         """Get a specific module"""
         return self.modules.get(module_id)
 
+    def get_schedule_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """Target and effective rate of every module per camera"""
+        return self.frame_scheduler.get_stats(self.modules)
+
+    def get_roi_stats(self) -> Dict[str, Dict]:
+        """Crop count and share of pixels processed per camera in the last ROI pass"""
+        return dict(self._roi_stats)
+
+    def get_resolution_stats(self) -> Dict[str, Dict]:
+        """Detector input size chosen per camera"""
+        return self.resolution_tuner.get_stats() if self.resolution_tuner else {}
+
+    def get_warmup_stats(self) -> Dict[str, Any]:
+        """Warm-up time per detector backend and module, in milliseconds"""
+        return self.warmup_stats
+
+    def get_tile_stats(self) -> Dict[str, Dict]:
+        """Tile count, latency and merged detections of the last tiled pass per camera"""
+        return dict(self._tile_stats)
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """Static-scene cache hits and misses per camera and module"""
+        return self.result_cache.get_stats() if self.result_cache else {}
+
+    def set_camera_count(self, cameras: int):
+        """Re-budget library thread pools for the number of cameras on the host"""
+        thread_budget.set_cameras(cameras)
+
+    def get_thread_stats(self) -> Dict[str, Any]:
+        """Thread budget and measured oversubscription of this process"""
+        return thread_budget.get_stats()
+
+    def get_watchdog_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Deadline overruns per module and current demotions per camera"""
+        stats = self.watchdog.get_stats()
+        for module_id, entry in stats.items():
+            module = self.modules.get(module_id)
+            deadline = self.watchdog.deadline_for(module) if module else None
+            entry['deadline_ms'] = round(deadline * 1000) if deadline else None
+        return stats
+
+    def get_swap_stats(self) -> Dict[str, Any]:
+        """Models currently in the swappable slots and recent hot-swaps"""
+        models: Dict[str, Optional[str]] = {
+            f'{DETECTOR_TARGET}:{name}': detector.slot.current.model_key if detector.slot.current else None
+            for name, detector in self.detectors.items()
+        }
+        for module_id, module in self.modules.items():
+            slot = module.get_model_slot()
+            if slot is not None:
+                models[module_id] = slot.current.model_key if slot.current else None
+        return {'models': models, 'history': list(self._swaps)}
+
+    def get_product_stats(self) -> Dict[str, Dict]:
+        """Product plan per camera and compute counts/latency per product"""
+        return self.products.get_stats()
+
+    def get_motion_stats(self) -> Dict[str, Dict]:
+        """Motion area statistics per camera"""
+        return self.motion_gate.get_stats() if self.motion_gate else {}
+
+    def get_runtime_stats(self) -> Dict[str, Any]:
+        """Statistics of this process's inference path, as reported by /ai/stats"""
+        return {
+            "module_rates": self.get_schedule_stats(),
+            "motion": self.get_motion_stats(),
+            "result_cache": self.get_cache_stats(),
+            "products": self.get_product_stats(),
+            "roi": self.get_roi_stats(),
+            "tiles": self.get_tile_stats(),
+            "warmup": self.get_warmup_stats(),
+            "resolution": self.get_resolution_stats(),
+            "threads": self.get_thread_stats(),
+            "models": self.get_swap_stats(),
+            "watchdog": self.get_watchdog_stats(),
+        }
+
+    def configure_camera(self, camera_id: str, module_params: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Resolve a camera's per-module parameters once, from the camera
+        config ({module_id: {param: value}}) overlaid with
+        settings.CAMERA_MODULE_PARAMS; frames then read the resolved sets
+        """
+        local = settings.CAMERA_MODULE_PARAMS.get(camera_id, {})
+        resolved = {
+            module_id: {**(module_params or {}).get(module_id, {}), **local.get(module_id, {})}
+            for module_id in set(module_params or {}) | set(local)
+        }
+        if self._camera_params.get(camera_id) == resolved:
+            return
+        self._camera_params[camera_id] = resolved
+
+        for module_id in resolved:
+            if module_id not in self.modules:
+                logger.warning(f"Parameters for unknown module '{module_id}' on camera {camera_id}")
+        for module_id, module in self.modules.items():
+            module.configure_camera(camera_id, resolved.get(module_id))
+        logger.info(f"Camera {camera_id} module parameters: {resolved or 'defaults'}")
+
+    def get_camera_params(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Applied per-camera parameter overrides by camera and module"""
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for module_id, module in self.modules.items():
+            for camera_id, overrides in module._overrides.items():
+                stats.setdefault(camera_id, {})[module_id] = dict(overrides)
+        return stats
+
+    def remove_camera(self, camera_id: str):
+        """Free the scheduling, module and parameter state of a removed camera"""
+        self.frame_scheduler.remove_camera(camera_id)
+        self._roi_stats.pop(camera_id, None)
+        self._tile_stats.pop(camera_id, None)
+        if self.resolution_tuner:
+            self.resolution_tuner.remove_camera(camera_id)
+        if self.motion_gate:
+            self.motion_gate.remove_camera(camera_id)
+        if self.result_cache:
+            self.result_cache.remove_camera(camera_id)
+        self.products.remove_camera(camera_id)
+        self._camera_params.pop(camera_id, None)
+        for module in self.modules.values():
+            module.remove_camera(camera_id)
+
     def list_modules(self) -> List[Dict]:
         """List all available modules"""
         return [
@@ -166,6 +910,13 @@ class AIModuleManager:
         for module in self.modules.values():
             module.cleanup()
         self.modules.clear()
+        for detector in self.detectors.values():
+            detector.cleanup()
+        self.detectors.clear()
+        if self._module_executor:
+            self._module_executor.shutdown(wait=False)
+            self._module_executor = None
+        self.watchdog.shutdown()
 
 
 
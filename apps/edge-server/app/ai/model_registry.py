@@ -0,0 +1,141 @@
+"""
+Model Registry
+Process-wide cache of loaded AI models
+Each weight file is loaded once and shared between modules
+"""
+import gc
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+
+@dataclass
+class ModelEntry:
+    key: str
+    model: Any
+    ref_count: int = 0
+    memory_bytes: int = 0
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def yolo_loader(weights: str) -> Callable[[], Any]:
+    """Loader for an ultralytics YOLO weight file"""
+    def load():
+        from ultralytics import YOLO
+        return YOLO(weights)
+    return load
+
+
+def easyocr_loader(languages: List[str]) -> Callable[[], Any]:
+    """Loader for an EasyOCR reader"""
+    def load():
+        import easyocr
+        return easyocr.Reader(languages, gpu=False)
+    return load
+
+
+def _process_rss() -> int:
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def _estimate_model_bytes(model: Any) -> int:
+    """Size of torch parameters and buffers, 0 if not a torch model"""
+    module = getattr(model, 'model', model)
+    try:
+        total = sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+        return int(total)
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Reference-counted model cache
+    - acquire() loads a model on first use and returns the shared handle
+    - release() drops a reference and unloads the model with its last user
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, ModelEntry] = {}
+        self._lock = threading.RLock()
+
+    def acquire(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Get a shared model handle, loading it if needed
+
+        Args:
+            key: Unique model key, e.g. 'yolo:yolov8n.pt'
+            loader: Callable that builds the model on first use
+
+        Raises whatever the loader raises; nothing is registered on failure.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                rss_before = _process_rss()
+                model = loader()
+                memory = _estimate_model_bytes(model) or max(0, _process_rss() - rss_before)
+
+                entry = ModelEntry(key=key, model=model, memory_bytes=memory)
+                self._entries[key] = entry
+                logger.info(f"Model loaded: {key} ({memory / (1024 * 1024):.1f} MB)")
+
+            entry.ref_count += 1
+            return entry.model
+
+    def release(self, key: str):
+        """Drop one reference, unloading the model when none remain"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+
+            entry.ref_count -= 1
+            if entry.ref_count > 0:
+                return
+
+            del self._entries[key]
+
+        close = getattr(entry.model, 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+        entry.model = None
+        gc.collect()
+        logger.info(f"Model unloaded: {key}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a loaded model without taking a reference"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.model if entry else None
+
+    def stats(self) -> List[Dict]:
+        """Loaded models with reference counts and resident memory"""
+        with self._lock:
+            return [
+                {
+                    'key': entry.key,
+                    'ref_count': entry.ref_count,
+                    'memory_bytes': entry.memory_bytes,
+                    'memory_mb': round(entry.memory_bytes / (1024 * 1024), 1),
+                    'loaded_at': entry.loaded_at.isoformat(),
+                }
+                for entry in self._entries.values()
+            ]
+
+    def total_memory_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.memory_bytes for entry in self._entries.values())
+
+
+model_registry = ModelRegistry()
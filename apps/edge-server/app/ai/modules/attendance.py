@@ -8,6 +8,7 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.products import FACES
 from config.settings import settings
 
 
@@ -16,6 +17,12 @@ class AttendanceModule(BaseAIModule):
     Attendance AI Module
     Tracks employee attendance using face recognition
     """
+
+    # Idle at 1 fps, full rate while faces are in view
+    target_fps = 1.0
+    burst_fps = 5.0
+    # Face embeddings computed by the face recognition module
+    consumes = (FACES,)
     
     def __init__(self, confidence_threshold: float = 0.6):
         super().__init__(
@@ -61,6 +68,7 @@ class AttendanceModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement attendance tracking
             # 1. Detect and recognize faces
@@ -68,7 +76,11 @@ class AttendanceModule(BaseAIModule):
             # 3. Log check-in/check-out
             # 4. Prevent duplicate check-ins within time window
             
-            faces = self._detect_and_recognize_faces(frame)
+            detected_faces = self.get_product(metadata, FACES)
+            if detected_faces is not None:
+                faces = self._match_employees(detected_faces, params.confidence_threshold)
+            else:
+                faces = self._detect_and_recognize_faces(frame)
             
             for face in faces:
                 employee_id = face.get('employee_id')
@@ -124,6 +136,33 @@ class AttendanceModule(BaseAIModule):
         # TODO: Use face recognition model
         return []
 
+    def _match_employees(self, faces: List[Dict], threshold: float) -> List[Dict]:
+        """Match face embeddings against employee embeddings"""
+        employees = [
+            (employee_id, np.asarray(employee['embedding'], dtype=np.float64))
+            for employee_id, employee in self.employee_database.items()
+            if employee.get('embedding')
+        ]
+        if not employees:
+            return []
+
+        stored = np.stack([embedding for _, embedding in employees])
+        matches = []
+        for face in faces:
+            embedding = face.get('embedding')
+            if embedding is None:
+                continue
+            distances = np.linalg.norm(stored - np.asarray(embedding), axis=1)
+            best = int(np.argmin(distances))
+            confidence = 1.0 - float(distances[best])
+            if confidence > threshold:
+                matches.append({
+                    'employee_id': employees[best][0],
+                    'confidence': confidence,
+                    'bbox': face.get('bbox'),
+                })
+        return matches
+
     def _determine_check_type(self, employee_id: str, timestamp: datetime) -> bool:
         """Determine if this is check-in or check-out"""
         # Simple logic: if last check was more than 4 hours ago, it's check-in
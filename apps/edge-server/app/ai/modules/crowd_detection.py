@@ -8,6 +8,8 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.model_registry import yolo_loader
+from app.ai.tiling import merge_detections, tile_grid
 from config.settings import settings
 
 
@@ -16,6 +18,11 @@ class CrowdDetectionModule(BaseAIModule):
     Crowd Detection AI Module
     Detects crowd density and generates alerts for overcrowding
     """
+
+    detector_classes = [0]  # person
+    target_fps = 1.0  # density changes slowly
+    reuse_last_result = True
+    camera_params = ('confidence_threshold', 'count_threshold', 'density_threshold')
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -33,7 +40,7 @@ class CrowdDetectionModule(BaseAIModule):
             from ultralytics import YOLO
             
             try:
-                self._model = YOLO('yolov8n.pt')
+                self._model = self.acquire_model('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))
                 logger.info("Crowd Detection module initialized with YOLOv8")
             except Exception as e:
                 logger.warning(f"Could not load YOLOv8 model: {e}")
@@ -65,6 +72,7 @@ class CrowdDetectionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement crowd detection
             # 1. Detect all people in frame
@@ -72,7 +80,13 @@ class CrowdDetectionModule(BaseAIModule):
             # 3. Count total people
             # 4. Generate alerts if thresholds exceeded
             
-            people = self._detect_people(frame)
+            people = self.get_shared_detections(metadata)
+            if people is None:
+                people = self._detect_people(
+                    frame,
+                    params.confidence_threshold,
+                    tiled=settings.tiled_inference_for(camera_id, self.module_id)
+                )
             frame_area = frame.shape[0] * frame.shape[1]
             
             # Calculate density
@@ -89,12 +103,12 @@ class CrowdDetectionModule(BaseAIModule):
             results['detections'].append(detection)
             
             # Check thresholds
-            if person_count > self.count_threshold or density > self.density_threshold:
+            if person_count > params.count_threshold or density > params.density_threshold:
                 # Create alert
                 results['alerts'].append({
                     'type': 'crowd',
                     'camera_id': camera_id,
-                    'severity': 'high' if person_count > self.count_threshold * 2 else 'medium',
+                    'severity': 'high' if person_count > params.count_threshold * 2 else 'medium',
                     'title': 'Crowd Detected',
                     'description': f'Crowd detected: {person_count} people (density: {density:.2f})',
                     'timestamp': datetime.utcnow().isoformat(),
@@ -117,29 +131,41 @@ class CrowdDetectionModule(BaseAIModule):
 
         return results
 
-    def _detect_people(self, frame: np.ndarray) -> List[Dict]:
-        """Detect people in frame using YOLOv8"""
+    def _detect_people(self, frame: np.ndarray, conf: float, tiled: bool = False) -> List[Dict]:
+        """Detect people in frame using YOLOv8, optionally on overlapping tiles"""
         if not self._model:
             return []
         
         try:
+            height, width = frame.shape[:2]
+            rects = [(0, 0, width, height)]
+            if tiled:
+                tiles = tile_grid(rects[0], settings.TILE_SIZE, settings.TILE_OVERLAP)
+                if len(tiles) > 1:
+                    rects = tiles + rects
+
             # Person class ID is 0
-            results = self._model(frame, classes=[0], conf=self.confidence_threshold, verbose=False)
+            crops = [frame[y:y + h, x:x + w] for x, y, w, h in rects]
+            results = self._model(crops, classes=[0], conf=conf, verbose=False)
             
             detections = []
-            for result in results:
+            for (dx, dy, _, _), result in zip(rects, results):
                 boxes = result.boxes
                 for box in boxes:
                     x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
                     confidence = float(box.conf[0].cpu().numpy())
                     
                     detections.append({
-                        'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+                        'bbox': [int(x1) + dx, int(y1) + dy, int(x2 - x1), int(y2 - y1)],
                         'confidence': confidence
                     })
             
-            return detections
+            return merge_detections(detections) if len(rects) > 1 else detections
         except Exception as e:
             logger.error(f"Error detecting people: {e}")
             return []
 
+    def cleanup(self):
+        """Release shared models"""
+        self._model = None
+        super().cleanup()
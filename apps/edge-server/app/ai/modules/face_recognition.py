@@ -8,6 +8,7 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.products import FACES
 from config.settings import settings
 
 
@@ -16,6 +17,10 @@ class FaceRecognitionModule(BaseAIModule):
     Face Recognition AI Module
     Detects faces and matches them against registered faces database
     """
+
+    # Face boxes with embeddings, shared with attendance
+    consumes = (FACES,)
+    produces = (FACES,)
     
     def __init__(self, confidence_threshold: float = 0.6):
         super().__init__(
@@ -98,6 +103,7 @@ class FaceRecognitionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Replace with actual face detection and recognition
             # Example workflow:
@@ -113,11 +119,13 @@ class FaceRecognitionModule(BaseAIModule):
             # - InsightFace model inference
             # - Custom trained models
             
-            detected_faces = self._detect_faces(frame)
+            detected_faces = self.get_product(metadata, FACES)
+            if detected_faces is None:
+                detected_faces = self._detect_faces(frame)
             
             for face_data in detected_faces:
                 # Try to recognize face
-                recognized = self._recognize_face(face_data, frame)
+                recognized = self._recognize_face(face_data, frame, params.confidence_threshold)
                 
                 detection = {
                     'type': 'face',
@@ -148,7 +156,7 @@ class FaceRecognitionModule(BaseAIModule):
                     detection['person_name'] = 'Unknown'
                     
                     # Create alert for unknown face (if configured)
-                    if face_data.get('confidence', 0) > self.confidence_threshold:
+                    if face_data.get('confidence', 0) > params.confidence_threshold:
                         results['alerts'].append({
                             'type': 'unknown_face',
                             'camera_id': camera_id,
@@ -211,7 +219,21 @@ class FaceRecognitionModule(BaseAIModule):
         
         return faces
 
-    def _recognize_face(self, face_data: Dict, frame: np.ndarray) -> Optional[Dict]:
+    def compute_product(self, product: str, frame: np.ndarray, camera_id: str, inputs: Dict[str, Any]) -> List[Dict]:
+        """FACES: detected faces, with embeddings when face_recognition is available"""
+        faces = self._detect_faces(frame)
+        if self._face_recognition and faces:
+            # One encoding call for every face in the frame
+            rgb_frame = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
+            encodings = self._face_recognition.face_encodings(
+                rgb_frame,
+                [face['location'] for face in faces]
+            )
+            for face, encoding in zip(faces, encodings):
+                face['embedding'] = encoding
+        return faces
+
+    def _recognize_face(self, face_data: Dict, frame: np.ndarray, threshold: float) -> Optional[Dict]:
         """
         Recognize a detected face against database
         
@@ -225,19 +247,21 @@ class FaceRecognitionModule(BaseAIModule):
             return None
         
         try:
-            rgb_frame = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
-            top, right, bottom, left = face_data['location']
-            
-            # Extract face encoding
-            face_encoding = self._face_recognition.face_encodings(
-                rgb_frame,
-                [(top, right, bottom, left)]
-            )
-            
-            if not face_encoding:
-                return None
-            
-            face_encoding = face_encoding[0]
+            face_encoding = face_data.get('embedding')
+            if face_encoding is None:
+                rgb_frame = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
+                top, right, bottom, left = face_data['location']
+
+                # Extract face encoding
+                face_encoding = self._face_recognition.face_encodings(
+                    rgb_frame,
+                    [(top, right, bottom, left)]
+                )
+
+                if not face_encoding:
+                    return None
+
+                face_encoding = face_encoding[0]
             
             # Compare with database
             best_match = None
@@ -265,7 +289,7 @@ class FaceRecognitionModule(BaseAIModule):
                     }
             
             # Return match if confidence is above threshold
-            if best_match and best_match['confidence'] > self.confidence_threshold:
+            if best_match and best_match['confidence'] > threshold:
                 return best_match
             
         except Exception as e:
@@ -3,19 +3,42 @@ Fire Detection Module
 Detects fire and smoke in video frames
 """
 import numpy as np
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
 from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.backends import create_backend
+from app.ai.hot_swap import ModelSlot
+from app.ai.roi import offset_detections, roi_rects
 from config.settings import settings
 
+SCAN_WIDTH = 320  # stage one runs on frames downscaled to this width
+FIRE_HSV_LOWER = np.array([0, 50, 50])  # red/orange/yellow
+FIRE_HSV_UPPER = np.array([35, 255, 255])
+FIRE_MIN_AREA = 500  # full-frame pixels
+SMOKE_MIN_VALUE = 200
+SMOKE_MAX_SATURATION = 60
+SMOKE_MIN_AREA = 1000
+FLICKER_DELTA = 25  # brightness change between scans counted as flicker
+FLICKER_MIN = 0.15  # share of a fire candidate that must flicker
+CROP_MARGIN_PX = 32
+WARMUP_CROP = (256, 256)  # (height, width) of the dummy candidate crop run through the fire model
+
+
+def _rect_polygon(bbox: List[int]) -> List[List[int]]:
+    x, y, w, h = bbox
+    return [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+
 
 class FireDetectionModule(BaseAIModule):
     """
     Fire Detection AI Module
     Detects fire and smoke using computer vision
     """
+
+    target_fps = 2.0
+    reuse_last_result = True
     
     def __init__(self, confidence_threshold: float = 0.7):
         super().__init__(
@@ -23,39 +46,32 @@ class FireDetectionModule(BaseAIModule):
             module_name="Fire Detection",
             confidence_threshold=confidence_threshold
         )
-        self._model = None
+        self._model = ModelSlot()
+        self._previous: Dict[str, np.ndarray] = {}  # camera_id -> last scan brightness
 
     def initialize(self) -> bool:
         """Initialize fire detection model"""
         try:
-            from ultralytics import YOLO
             import cv2
             
-            # Try to load custom fire detection model
-            # If not available, use YOLOv8 with custom training or color-based detection
+            # Try to load custom fire detection model on the configured backend
+            # The generic COCO model has no fire class, so without a custom
+            # model we use color-based detection instead of a second YOLO pass
             try:
-                # Try custom model first
-                self._model = YOLO('fire_detection.pt')  # Custom trained model
-                logger.info("Fire Detection module initialized with custom model")
-            except:
-                # Fallback to YOLOv8 for general object detection
-                try:
-                    self._model = YOLO('yolov8n.pt')
-                    logger.info("Fire Detection module initialized with YOLOv8 (general detection)")
-                except:
-                    self._model = None
-                    logger.warning("No YOLOv8 model available, using color-based detection")
+                model = create_backend(
+                    settings.detector_backend_for(self.module_id), 'fire_detection.pt'
+                )  # Custom trained model
+                model.load()
+                self._model.swap(model)
+                logger.info(f"Fire Detection module initialized with custom model ({model.name})")
+            except ImportError:
+                logger.warning("No inference backend installed. Using color-based fire detection only")
+            except Exception:
+                logger.warning("No custom fire model available, using color-based detection")
             
             self._cv2 = cv2
             self._initialized = True
             return True
-        except ImportError:
-            logger.warning("ultralytics not installed. Using color-based fire detection only")
-            import cv2
-            self._cv2 = cv2
-            self._model = None
-            self._initialized = True
-            return True
         except Exception as e:
             logger.error(f"Failed to initialize Fire Detection: {e}")
             return False
@@ -76,18 +92,15 @@ class FireDetectionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
-            # TODO: Implement fire detection
-            # 1. Detect fire regions in frame
-            # 2. Detect smoke regions
-            # 3. Calculate confidence scores
-            # 4. Generate alerts for high-confidence detections
-            
-            fire_detections = self._detect_fire(frame)
-            smoke_detections = self._detect_smoke(frame)
+            # Cheap color/flicker scan first; the fire model only sees candidate crops
+            fire_candidates, smoke_candidates = self._scan(frame, camera_id)
+            fire_detections = self._detect_fire(frame, fire_candidates, params.confidence_threshold)
+            smoke_detections = self._detect_smoke(smoke_candidates)
             
             for fire in fire_detections:
-                if fire.get('confidence', 0) > self.confidence_threshold:
+                if fire.get('confidence', 0) > params.confidence_threshold:
                     detection = {
                         'type': 'fire',
                         'camera_id': camera_id,
@@ -119,7 +132,7 @@ class FireDetectionModule(BaseAIModule):
                     })
             
             for smoke in smoke_detections:
-                if smoke.get('confidence', 0) > self.confidence_threshold:
+                if smoke.get('confidence', 0) > params.confidence_threshold:
                     detection = {
                         'type': 'smoke',
                         'camera_id': camera_id,
@@ -148,95 +161,132 @@ class FireDetectionModule(BaseAIModule):
 
         return results
 
-    def _detect_fire(self, frame: np.ndarray) -> List[Dict]:
-        """Detect fire in frame"""
-        if self._model:
-            # Use YOLOv8 model if available
-            try:
-                results = self._model(frame, conf=self.confidence_threshold, verbose=False)
-                detections = []
-                for result in results:
-                    boxes = result.boxes
-                    for box in boxes:
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = float(box.conf[0].cpu().numpy())
-                        detections.append({
-                            'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
-                            'confidence': confidence
-                        })
-                return detections
-            except Exception as e:
-                logger.error(f"Error in model-based fire detection: {e}")
-        
-        # Fallback to color-based detection
-        return self._detect_fire_color(frame)
-
-    def _detect_smoke(self, frame: np.ndarray) -> List[Dict]:
-        """Detect smoke in frame"""
-        # Use color-based detection for smoke
-        return self._detect_smoke_color(frame)
-
-    def _detect_fire_color(self, frame: np.ndarray) -> List[Dict]:
-        """Color-based fire detection (fallback)"""
-        try:
-            # Convert to HSV
-            hsv = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2HSV)
-            
-            # Fire color range (red/orange/yellow)
-            lower_fire = np.array([0, 50, 50])
-            upper_fire = np.array([35, 255, 255])
-            
-            mask = self._cv2.inRange(hsv, lower_fire, upper_fire)
-            
-            # Find contours
-            contours, _ = self._cv2.findContours(mask, self._cv2.RETR_EXTERNAL, self._cv2.CHAIN_APPROX_SIMPLE)
-            
-            detections = []
-            for contour in contours:
-                area = self._cv2.contourArea(contour)
-                if area > 500:  # Minimum fire area
-                    x, y, w, h = self._cv2.boundingRect(contour)
-                    # Estimate confidence based on area and color intensity
-                    confidence = min(0.9, 0.5 + (area / 10000))
-                    detections.append({
-                        'bbox': [x, y, w, h],
-                        'confidence': confidence
-                    })
-            
-            return detections
-        except Exception as e:
-            logger.error(f"Error in color-based fire detection: {e}")
-            return []
+    def _scan(self, frame: np.ndarray, camera_id: str) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Stage one: propose fire and smoke regions from color and flicker
+        on a downscaled frame
 
-    def _detect_smoke_color(self, frame: np.ndarray) -> List[Dict]:
-        """Color-based smoke detection"""
-        try:
-            # Convert to grayscale
-            gray = self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2GRAY)
-            
-            # Smoke appears as gray/white regions with specific texture
-            # Use threshold and morphology
-            _, thresh = self._cv2.threshold(gray, 200, 255, self._cv2.THRESH_BINARY)
-            
-            # Morphological operations to find smoke-like regions
-            kernel = np.ones((5, 5), np.uint8)
-            thresh = self._cv2.morphologyEx(thresh, self._cv2.MORPH_CLOSE, kernel)
-            
-            contours, _ = self._cv2.findContours(thresh, self._cv2.RETR_EXTERNAL, self._cv2.CHAIN_APPROX_SIMPLE)
-            
-            detections = []
-            for contour in contours:
-                area = self._cv2.contourArea(contour)
-                if area > 1000:  # Minimum smoke area
-                    x, y, w, h = self._cv2.boundingRect(contour)
-                    confidence = min(0.8, 0.4 + (area / 20000))
-                    detections.append({
-                        'bbox': [x, y, w, h],
-                        'confidence': confidence
-                    })
-            
-            return detections
-        except Exception as e:
-            logger.error(f"Error in color-based smoke detection: {e}")
+        Fire candidates are flame-colored blobs whose brightness changed
+        since the previous scan of the camera (flames flicker, orange walls
+        do not); the first scan of a camera has no flicker reference and
+        keeps every flame-colored blob. Boxes are in full-frame pixels.
+        """
+        cv2 = self._cv2
+        height, width = frame.shape[:2]
+        scale = min(1.0, SCAN_WIDTH / float(width))
+        small = frame
+        if scale < 1.0:
+            small = cv2.resize(
+                frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA
+            )
+
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        value = hsv[..., 2]
+        previous = self._previous.get(camera_id)
+        flicker = None
+        if previous is not None and previous.shape == value.shape:
+            flicker = cv2.absdiff(value, previous) > FLICKER_DELTA
+        self._previous[camera_id] = value
+
+        fire_mask = cv2.inRange(hsv, FIRE_HSV_LOWER, FIRE_HSV_UPPER)
+        fire = [
+            region for region in self._regions(fire_mask, FIRE_MIN_AREA, scale, flicker)
+            if region['flicker'] is None or region['flicker'] >= FLICKER_MIN
+        ]
+
+        # Smoke appears as bright, unsaturated regions
+        smoke_mask = ((value > SMOKE_MIN_VALUE) & (hsv[..., 1] < SMOKE_MAX_SATURATION)).astype(np.uint8) * 255
+        smoke_mask = cv2.morphologyEx(smoke_mask, cv2.MORPH_CLOSE, np.ones((3, 3), np.uint8))
+        smoke = self._regions(smoke_mask, SMOKE_MIN_AREA, scale, flicker)
+
+        return fire, smoke
+
+    def _regions(
+        self,
+        mask: np.ndarray,
+        min_area: float,
+        scale: float,
+        flicker: Optional[np.ndarray]
+    ) -> List[Dict]:
+        """Connected components of a stage-one mask above min_area full-frame pixels"""
+        count, labels, stats, _ = self._cv2.connectedComponentsWithStats(mask, connectivity=8)
+        regions = []
+        for label in range(1, count):
+            x, y, w, h, area = stats[label]
+            area = area / (scale * scale)
+            if area <= min_area:
+                continue
+            share = None
+            if flicker is not None:
+                share = float(flicker[y:y + h, x:x + w][labels[y:y + h, x:x + w] == label].mean())
+            regions.append({
+                'bbox': [int(x / scale), int(y / scale), int(np.ceil(w / scale)), int(np.ceil(h / scale))],
+                'area': area,
+                'flicker': share,
+            })
+        return regions
+
+    def _detect_fire(self, frame: np.ndarray, candidates: List[Dict], conf: float) -> List[Dict]:
+        """Stage two: confirm fire candidates with the fire model on their crops"""
+        if not candidates:
             return []
 
+        with self._model.use() as model:
+            if model:
+                try:
+                    rects = roi_rects(
+                        [_rect_polygon(candidate['bbox']) for candidate in candidates],
+                        frame.shape, CROP_MARGIN_PX
+                    ) or []
+                    crops = [frame[y:y + h, x:x + w] for x, y, w, h in rects]
+                    outputs = model.predict(crops, conf=conf)
+                    detections = []
+                    for (x, y, _, _), crop_detections in zip(rects, outputs):
+                        detections.extend(offset_detections(crop_detections, x, y))
+                    return detections
+                except Exception as e:
+                    logger.error(f"Error in model-based fire detection: {e}")
+
+        # Fallback to color-based confidence
+        return [
+            {
+                'bbox': candidate['bbox'],
+                'confidence': min(0.9, 0.5 + (candidate['area'] / 10000)),
+            }
+            for candidate in candidates
+        ]
+
+    def _detect_smoke(self, candidates: List[Dict]) -> List[Dict]:
+        """Color-based smoke confidence for stage-one smoke regions"""
+        return [
+            {
+                'bbox': candidate['bbox'],
+                'confidence': min(0.8, 0.4 + (candidate['area'] / 20000)),
+            }
+            for candidate in candidates
+        ]
+
+    def warmup(self, shapes: Iterable[Tuple[int, int]], camera_id: str, metadata: Optional[Dict] = None) -> float:
+        """
+        Warm the scan on black frames and the fire model on a dummy crop:
+        black frames give no candidates, so the model would otherwise stay
+        cold until the first real fire candidate
+        """
+        elapsed = super().warmup(shapes, camera_id, metadata)
+        with self._model.use() as model:
+            if model:
+                elapsed += model.warmup([WARMUP_CROP], settings.WARMUP_RUNS)
+        return elapsed
+
+    def get_model_slot(self) -> ModelSlot:
+        return self._model
+
+    def remove_camera(self, camera_id: str):
+        self._previous.pop(camera_id, None)
+        super().remove_camera(camera_id)
+
+    def cleanup(self):
+        """Release shared models"""
+        self._model.retire(self._model.swap(None))
+        self._previous.clear()
+        super().cleanup()
@@ -8,6 +8,7 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.model_registry import yolo_loader
 from config.settings import settings
 
 
@@ -16,6 +17,9 @@ class IntrusionDetectionModule(BaseAIModule):
     Intrusion Detection AI Module
     Detects unauthorized access to restricted zones
     """
+
+    detector_classes = [0, 2, 3, 5, 7]  # person and vehicles
+    roi_zones = True
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -32,7 +36,7 @@ class IntrusionDetectionModule(BaseAIModule):
             from ultralytics import YOLO
             
             try:
-                self._model = YOLO('yolov8n.pt')
+                self._model = self.acquire_model('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))
                 logger.info("Intrusion Detection module initialized with YOLOv8")
             except Exception as e:
                 logger.warning(f"Could not load YOLOv8 model: {e}")
@@ -68,17 +72,20 @@ class IntrusionDetectionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement intrusion detection
             # 1. Detect objects/people in frame
             # 2. Check if they're in restricted zones
             # 3. Generate alerts for intrusions
             
-            detections = self._detect_objects(frame)
+            detections = self.get_shared_detections(metadata)
+            if detections is None:
+                detections = self._detect_objects(frame, params.confidence_threshold)
             zones = self.zones.get(camera_id, [])
             
             for detection in detections:
-                if detection.get('confidence', 0) > self.confidence_threshold:
+                if detection.get('confidence', 0) > params.confidence_threshold:
                     # Check if detection is in restricted zone
                     in_restricted_zone = self._check_zone(detection, zones)
                     
@@ -119,14 +126,18 @@ class IntrusionDetectionModule(BaseAIModule):
 
         return results
 
-    def _detect_objects(self, frame: np.ndarray) -> List[Dict]:
+    def get_zones(self, camera_id: str, metadata: Optional[Dict]) -> Optional[Any]:
+        """Zones from metadata, else the ones last seen for this camera"""
+        return super().get_zones(camera_id, metadata) or self.zones.get(camera_id)
+
+    def _detect_objects(self, frame: np.ndarray, conf: float) -> List[Dict]:
         """Detect objects/people in frame using YOLOv8"""
         if not self._model:
             return []
         
         try:
             # Detect people (class 0) and vehicles
-            results = self._model(frame, classes=[0, 2, 3, 5, 7], conf=self.confidence_threshold, verbose=False)
+            results = self._model(frame, classes=[0, 2, 3, 5, 7], conf=conf, verbose=False)
             
             detections = []
             for result in results:
@@ -152,3 +163,11 @@ class IntrusionDetectionModule(BaseAIModule):
         # Check if bbox center or any point is within zone polygon
         return None
 
+    def remove_camera(self, camera_id: str):
+        self.zones.pop(camera_id, None)
+        super().remove_camera(camera_id)
+
+    def cleanup(self):
+        """Release shared models"""
+        self._model = None
+        super().cleanup()
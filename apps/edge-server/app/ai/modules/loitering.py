@@ -8,14 +8,21 @@ from datetime import datetime, timedelta
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.products import TRACKS
 from config.settings import settings
 
+STALE_TRACK_SECONDS = 30  # forget tracks not seen for this long
+
 
 class LoiteringDetectionModule(BaseAIModule):
     """
     Loitering Detection AI Module
     Detects people staying in an area for too long
     """
+
+    detector_classes = [0]  # person, for the shared person tracks
+    consumes = (TRACKS,)
+    camera_params = ('confidence_threshold', 'loitering_threshold_seconds')
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -23,8 +30,8 @@ class LoiteringDetectionModule(BaseAIModule):
             module_name="Loitering Detection",
             confidence_threshold=confidence_threshold
         )
-        self.tracking_data: Dict[str, Dict] = {}  # track_id -> {start_time, location, duration}
-        self.loitering_threshold_seconds = 60  # Alert if person stays > 60 seconds
+        self.tracking_data: Dict[str, Dict] = {}  # camera_id -> track_id -> {start_time, location, last_seen}
+        self.loitering_threshold_seconds = 60.0  # Alert if person stays > 60 seconds
 
     def initialize(self) -> bool:
         """Initialize loitering detection"""
@@ -53,36 +60,41 @@ class LoiteringDetectionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement loitering detection
             # 1. Detect and track people
             # 2. Calculate time spent in same location
             # 3. Alert if exceeds threshold
             
-            tracked_people = self._track_people(camera_id, frame)
+            tracked_people = self.get_product(metadata, TRACKS)
+            if tracked_people is None:
+                tracked_people = self._track_people(camera_id, frame)
             now = datetime.utcnow()
+            # Track ids are only unique within a camera
+            tracking_data = self.tracking_data.setdefault(camera_id, {})
             
             for person in tracked_people:
                 track_id = person.get('track_id')
-                location = person.get('location')  # Center point of bbox
+                location = person.get('location') or person.get('center')  # Center point of bbox
                 
-                if track_id not in self.tracking_data:
+                if track_id not in tracking_data:
                     # New person detected
-                    self.tracking_data[track_id] = {
+                    tracking_data[track_id] = {
                         'start_time': now,
                         'location': location,
                         'last_seen': now,
                     }
                 else:
                     # Update tracking
-                    track_data = self.tracking_data[track_id]
+                    track_data = tracking_data[track_id]
                     track_data['last_seen'] = now
                     
                     # Check if person is in same location (within threshold)
                     if self._is_same_location(location, track_data['location']):
                         duration = (now - track_data['start_time']).total_seconds()
                         
-                        if duration > self.loitering_threshold_seconds:
+                        if duration > params.loitering_threshold_seconds:
                             # Loitering detected
                             detection = {
                                 'type': 'loitering',
@@ -120,6 +132,13 @@ class LoiteringDetectionModule(BaseAIModule):
                         track_data['start_time'] = now
                         track_data['location'] = location
 
+            # People who left keep no state
+            for track_id in [
+                track_id for track_id, track_data in tracking_data.items()
+                if (now - track_data['last_seen']).total_seconds() > STALE_TRACK_SECONDS
+            ]:
+                del tracking_data[track_id]
+
         except Exception as e:
             logger.error(f"Error processing frame in Loitering Detection: {e}")
 
@@ -130,6 +149,10 @@ class LoiteringDetectionModule(BaseAIModule):
         # TODO: Use person detection + tracking (DeepSORT)
         return []
 
+    def remove_camera(self, camera_id: str):
+        self.tracking_data.pop(camera_id, None)
+        super().remove_camera(camera_id)
+
     def _is_same_location(self, loc1: tuple, loc2: tuple, threshold: float = 50.0) -> bool:
         """Check if two locations are the same (within threshold pixels)"""
         if not loc1 or not loc2:
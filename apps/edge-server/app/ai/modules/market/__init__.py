@@ -2,3 +2,6 @@
 Market Module - Suspicious Behavior & Loss Prevention
 Enterprise AI module for retail environments
 """
+from app.ai.modules.market.module import MarketModule
+
+__all__ = ['MarketModule']
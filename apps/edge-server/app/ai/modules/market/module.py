@@ -14,6 +14,8 @@ import yaml
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.detector import SharedDetector
+from app.ai.products import TRACKS
 from config.settings import settings
 
 # Import market module components
@@ -43,6 +45,11 @@ class MarketModule(BaseAIModule):
     6. Risk Scoring Engine
     7. Event Dispatcher
     """
+
+    # Person (0) plus the retail items used by shelf interaction
+    detector_classes = [0, 39, 40, 41, 67]
+    roi_zones = True
+    consumes = (TRACKS,)
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -69,7 +76,7 @@ class MarketModule(BaseAIModule):
     def _load_config(self) -> Dict:
         """Load configuration from YAML file"""
         try:
-            config_path = Path(__file__).parent / "market" / "config.yaml"
+            config_path = Path(__file__).parent / "config.yaml"
             if config_path.exists():
                 with open(config_path, 'r') as f:
                     config = yaml.safe_load(f)
@@ -176,6 +183,7 @@ class MarketModule(BaseAIModule):
                 self._zones[camera_id] = metadata['zones']
             
             zones = self._zones.get(camera_id, {})
+            shared_detections = self.get_shared_detections(metadata)
             
             # Extract shelf zones
             shelf_zones = [
@@ -189,7 +197,10 @@ class MarketModule(BaseAIModule):
             if self._person_tracker:
                 try:
                     tracked_persons = self._person_tracker.process_frame(
-                        frame, camera_id, zones
+                        frame, camera_id, zones,
+                        detections=SharedDetector.filter(shared_detections, [0])
+                        if shared_detections is not None else None,
+                        tracks=self.get_product(metadata, TRACKS)
                     )
                 except Exception as e:
                     logger.error(f"Person tracking error: {e}")
@@ -204,7 +215,10 @@ class MarketModule(BaseAIModule):
             if self._shelf_interaction:
                 try:
                     interactions = self._shelf_interaction.process_frame(
-                        frame, camera_id, tracked_persons, shelf_zones
+                        frame, camera_id, tracked_persons, shelf_zones,
+                        objects=SharedDetector.filter(
+                            shared_detections, ShelfInteractionDetector.OBJECT_CLASSES
+                        ) if shared_detections is not None else None
                     )
                 except Exception as e:
                     logger.error(f"Shelf interaction error: {e}")
@@ -336,7 +350,29 @@ class MarketModule(BaseAIModule):
                 raise
         
         return results
-    
+
+    def get_zones(self, camera_id: str, metadata: Optional[Dict]) -> Optional[Any]:
+        """Zones from metadata, else the ones last seen for this camera"""
+        return super().get_zones(camera_id, metadata) or self._zones.get(camera_id)
+
+    @property
+    def model_keys(self) -> List[str]:
+        """Registry models held by the pipeline components"""
+        keys = super().model_keys
+        if self._person_tracker or self._shelf_interaction:
+            keys.append('yolo:yolov8n.pt')
+        if self._pose_concealment:
+            keys.append('mediapipe:pose')
+        return keys
+
+    def remove_camera(self, camera_id: str):
+        """Free the per-camera state of every pipeline stage"""
+        self._zones.pop(camera_id, None)
+        for stage in (self._person_tracker, self._shelf_interaction, self._temporal_filter, self._zone_logic):
+            if stage:
+                stage.remove_camera(camera_id)
+        super().remove_camera(camera_id)
+
     def cleanup(self):
         """Cleanup all resources"""
         if self._person_tracker:
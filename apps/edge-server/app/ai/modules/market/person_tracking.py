@@ -9,6 +9,9 @@ from datetime import datetime, timedelta
 from collections import defaultdict
 from loguru import logger
 
+from app.ai.model_registry import model_registry, yolo_loader
+from app.ai.tracking import SimpleTracker
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -60,7 +63,7 @@ class PersonTracker:
         
         try:
             # Use YOLOv8n (nano) for speed, or yolov8s for better accuracy
-            self._detection_model = YOLO('yolov8n.pt')
+            self._detection_model = model_registry.acquire('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))
             logger.info("Person Tracker initialized with YOLOv8")
             self._initialized = True
             return True
@@ -72,7 +75,9 @@ class PersonTracker:
         self,
         frame: np.ndarray,
         camera_id: str,
-        zones: Optional[Dict[str, List]] = None
+        zones: Optional[Dict[str, List]] = None,
+        detections: Optional[List[Dict]] = None,
+        tracks: Optional[List[Dict]] = None
     ) -> List[Dict]:
         """
         Process frame for person detection and tracking
@@ -81,6 +86,10 @@ class PersonTracker:
             frame: Input frame
             camera_id: Camera identifier
             zones: Zone definitions {zone_name: [polygon_points]}
+            detections: Person detections from the manager's shared pass;
+                        the tracker runs its own model when None
+            tracks: Person tracks from the manager's shared tracker;
+                    detection and tracking are skipped when given
             
         Returns:
             List of tracked persons:
@@ -93,9 +102,46 @@ class PersonTracker:
                 'age': float  # seconds since first detection
             }]
         """
-        if not self._initialized or not self._detection_model:
-            return []
+        if tracks is not None:
+            try:
+                tracked_persons = self._update_tracks(
+                    camera_id,
+                    [track for track in tracks if track['confidence'] >= self.confidence_threshold],
+                    zones
+                )
+                self._cleanup_expired_tracks(camera_id)
+                return tracked_persons
+            except Exception as e:
+                logger.error(f"Error in person tracking: {e}")
+                return []
+
+        if detections is None:
+            if not self._initialized or not self._detection_model:
+                return []
+            detections = self._detect_people(frame)
+            if detections is None:
+                return []
+        else:
+            detections = [
+                det for det in detections
+                if det['confidence'] >= self.confidence_threshold
+            ]
         
+        try:
+            # Update tracker
+            tracked_persons = self._update_tracking(camera_id, detections, zones)
+            
+            # Cleanup expired tracks
+            self._cleanup_expired_tracks(camera_id)
+            
+            return tracked_persons
+            
+        except Exception as e:
+            logger.error(f"Error in person tracking: {e}")
+            return []
+    
+    def _detect_people(self, frame: np.ndarray) -> Optional[List[Dict]]:
+        """Detect people in frame using the tracker's own model"""
         try:
             # Detect people (class 0 in COCO)
             results = self._detection_model(
@@ -119,17 +165,10 @@ class PersonTracker:
                         'center': (int((x1 + x2) / 2), int((y1 + y2) / 2))
                     })
             
-            # Update tracker
-            tracked_persons = self._update_tracking(camera_id, detections, zones)
-            
-            # Cleanup expired tracks
-            self._cleanup_expired_tracks(camera_id)
-            
-            return tracked_persons
-            
+            return detections
         except Exception as e:
-            logger.error(f"Error in person tracking: {e}")
-            return []
+            logger.error(f"Error detecting people: {e}")
+            return None
     
     def _update_tracking(
         self,
@@ -165,10 +204,7 @@ class PersonTracker:
         else:
             tracked_objects = tracker.update(tracker_detections)
         
-        # Process tracked objects
-        tracked_persons = []
-        now = datetime.utcnow()
-        
+        tracks = []
         for track in tracked_objects:
             track_id = int(track[4]) if len(track) > 4 else None
             
@@ -177,15 +213,42 @@ class PersonTracker:
             
             # Get bbox
             x1, y1, x2, y2 = track[0], track[1], track[2], track[3]
-            bbox = [int(x1), int(y1), int(x2 - x1), int(y2 - y1)]
-            center = (int((x1 + x2) / 2), int((y1 + y2) / 2))
+            tracks.append({
+                'track_id': track_id,
+                'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+                'center': (int((x1 + x2) / 2), int((y1 + y2) / 2)),
+                'confidence': track[5] if len(track) > 5 else 0.5,
+            })
+        
+        return self._update_tracks(camera_id, tracks, zones)
+    
+    def _update_tracks(
+        self,
+        camera_id: str,
+        tracks: List[Dict],
+        zones: Optional[Dict[str, List]] = None
+    ) -> List[Dict]:
+        """Update track records and zones from tracker output"""
+        if not tracks:
+            for track_id in list(self._tracks[camera_id].keys()):
+                self._tracks[camera_id][track_id]['seen'] = False
+            return []
+        
+        # Process tracked objects
+        tracked_persons = []
+        now = datetime.utcnow()
+        
+        for track in tracks:
+            track_id = track['track_id']
+            bbox = track['bbox']
+            center = track['center']
             
             # Initialize track if new
             if track_id not in self._tracks[camera_id]:
                 self._tracks[camera_id][track_id] = {
                     'bbox': bbox,
                     'center': center,
-                    'confidence': track[5] if len(track) > 5 else 0.5,
+                    'confidence': track['confidence'],
                     'seen': True,
                     'first_seen': now,
                     'last_seen': now,
@@ -273,84 +336,20 @@ class PersonTracker:
             'last_seen': self._tracks[camera_id][track_id].get('last_seen'),
         }
     
+    def remove_camera(self, camera_id: str):
+        """Drop the tracker and tracks of a removed camera"""
+        self._trackers.pop(camera_id, None)
+        self._tracks.pop(camera_id, None)
+        self._track_created.pop(camera_id, None)
+        self._track_zones.pop(camera_id, None)
+    
     def cleanup(self):
         """Cleanup resources"""
-        self._detection_model = None
+        if self._detection_model is not None:
+            self._detection_model = None
+            model_registry.release('yolo:yolov8n.pt')
         self._trackers.clear()
         self._tracks.clear()
         self._track_created.clear()
         self._track_zones.clear()
         self._initialized = False
-
-
-class SimpleTracker:
-    """
-    Simple IoU-based tracker (fallback when ByteTrack not available)
-    """
-    def __init__(self):
-        self.tracks = {}
-        self.next_id = 1
-        self.iou_threshold = 0.3
-    
-    def update(self, detections: List[List]) -> List:
-        """Update tracks with new detections"""
-        if not detections:
-            return []
-        
-        # Match detections to existing tracks
-        matched = set()
-        tracked = []
-        
-        for track_id, track_bbox in self.tracks.items():
-            best_iou = 0
-            best_idx = -1
-            
-            for idx, det in enumerate(detections):
-                if idx in matched:
-                    continue
-                
-                iou = self._calculate_iou(track_bbox, det[:4])
-                if iou > best_iou and iou > self.iou_threshold:
-                    best_iou = iou
-                    best_idx = idx
-            
-            if best_idx >= 0:
-                # Update track
-                det = detections[best_idx]
-                self.tracks[track_id] = det[:4]
-                tracked.append([*det[:4], det[4] if len(det) > 4 else 0.5, track_id])
-                matched.add(best_idx)
-            else:
-                # Track lost - keep for a few frames
-                pass
-        
-        # Create new tracks for unmatched detections
-        for idx, det in enumerate(detections):
-            if idx not in matched:
-                track_id = self.next_id
-                self.next_id += 1
-                self.tracks[track_id] = det[:4]
-                tracked.append([*det[:4], det[4] if len(det) > 4 else 0.5, track_id])
-        
-        return tracked
-    
-    def _calculate_iou(self, box1: List, box2: List) -> float:
-        """Calculate IoU between two boxes"""
-        x1_1, y1_1, x2_1, y2_1 = box1
-        x1_2, y1_2, x2_2, y2_2 = box2
-        
-        # Calculate intersection
-        x1_i = max(x1_1, x1_2)
-        y1_i = max(y1_1, y1_2)
-        x2_i = min(x2_1, x2_2)
-        y2_i = min(y2_1, y2_2)
-        
-        if x2_i < x1_i or y2_i < y1_i:
-            return 0.0
-        
-        intersection = (x2_i - x1_i) * (y2_i - y1_i)
-        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-        union = area1 + area2 - intersection
-        
-        return intersection / union if union > 0 else 0.0
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
 
+from app.ai.model_registry import model_registry
+
 try:
     import cv2
     CV2_AVAILABLE = True
@@ -49,12 +51,15 @@ class PoseConcealmentDetector:
             # Try MediaPipe for pose estimation
             try:
                 import mediapipe as mp
-                self._pose_model = mp.solutions.pose.Pose(
-                    static_image_mode=False,
-                    model_complexity=1,
-                    enable_segmentation=False,
-                    min_detection_confidence=0.5,
-                    min_tracking_confidence=0.5
+                self._pose_model = model_registry.acquire(
+                    'mediapipe:pose',
+                    lambda: mp.solutions.pose.Pose(
+                        static_image_mode=False,
+                        model_complexity=1,
+                        enable_segmentation=False,
+                        min_detection_confidence=0.5,
+                        min_tracking_confidence=0.5
+                    )
                 )
                 logger.info("Pose Concealment Detector initialized with MediaPipe")
                 self._initialized = True
@@ -280,10 +285,8 @@ class PoseConcealmentDetector:
     
     def cleanup(self):
         """Cleanup resources"""
-        if self._pose_model:
-            try:
-                self._pose_model.close()
-            except:
-                pass
-        self._pose_model = None
+        if self._pose_model is not None:
+            # The registry closes the model when its last user releases it
+            self._pose_model = None
+            model_registry.release('mediapipe:pose')
         self._initialized = False
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from loguru import logger
 
+from app.ai.model_registry import model_registry, yolo_loader
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -29,6 +31,9 @@ class ShelfInteractionDetector:
     - Temporal validation (≥ 2–3 seconds)
     - Ignore accidental or brief touches
     """
+
+    # Common retail items in COCO: 39=bottle, 40=wine glass, 41=cup, 67=cell phone
+    OBJECT_CLASSES = [39, 40, 41, 67]
     
     def __init__(
         self,
@@ -55,7 +60,7 @@ class ShelfInteractionDetector:
         
         try:
             # Use YOLO for object detection
-            self._object_model = YOLO('yolov8n.pt')
+            self._object_model = model_registry.acquire('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))
             logger.info("Shelf Interaction Detector initialized")
             self._initialized = True
             return True
@@ -68,7 +73,8 @@ class ShelfInteractionDetector:
         frame: np.ndarray,
         camera_id: str,
         tracked_persons: List[Dict],
-        shelf_zones: Optional[List[Dict]] = None
+        shelf_zones: Optional[List[Dict]] = None,
+        objects: Optional[List[Dict]] = None
     ) -> List[Dict]:
         """
         Detect shelf interactions
@@ -78,6 +84,8 @@ class ShelfInteractionDetector:
             camera_id: Camera identifier
             tracked_persons: List of tracked persons from Stage 1
             shelf_zones: List of shelf zone definitions
+            objects: Object detections from the manager's shared pass;
+                     the detector runs its own model when None
             
         Returns:
             List of detected interactions:
@@ -90,7 +98,7 @@ class ShelfInteractionDetector:
                 'bbox': [x, y, w, h]  # object bbox
             }]
         """
-        if not self._initialized or not shelf_zones:
+        if not shelf_zones or (objects is None and not self._initialized):
             return []
         
         interactions = []
@@ -101,7 +109,13 @@ class ShelfInteractionDetector:
             self._interactions[camera_id] = {}
         
         # Detect objects in frame
-        objects = self._detect_objects(frame)
+        if objects is None:
+            objects = self._detect_objects(frame)
+        else:
+            objects = [
+                obj for obj in objects
+                if obj['confidence'] >= self.confidence_threshold
+            ]
         
         # For each tracked person, check for shelf interactions
         for person in tracked_persons:
@@ -151,10 +165,9 @@ class ShelfInteractionDetector:
         
         try:
             # Detect common retail objects (bottles, bags, etc.)
-            # COCO classes: 39=bottle, 40=wine glass, 41=cup, 67=cell phone, etc.
             results = self._object_model(
                 frame,
-                classes=[39, 40, 41, 67],  # Common retail items
+                classes=self.OBJECT_CLASSES,
                 conf=self.confidence_threshold,
                 verbose=False
             )
@@ -361,8 +374,14 @@ class ShelfInteractionDetector:
             if not interactions:
                 self._interactions[camera_id].pop(track_id, None)
     
+    def remove_camera(self, camera_id: str):
+        """Drop the interactions of a removed camera"""
+        self._interactions.pop(camera_id, None)
+    
     def cleanup(self):
         """Cleanup resources"""
-        self._object_model = None
+        if self._object_model is not None:
+            self._object_model = None
+            model_registry.release('yolo:yolov8n.pt')
         self._interactions.clear()
         self._initialized = False
@@ -201,6 +201,11 @@ class TemporalFilter:
             'history_length': len(history),
         }
     
+    def remove_camera(self, camera_id: str):
+        """Drop the track history of a removed camera"""
+        self._track_history.pop(camera_id, None)
+        self._track_gaps.pop(camera_id, None)
+    
     def cleanup(self):
         """Cleanup resources"""
         self._track_history.clear()
@@ -135,6 +135,12 @@ class ZoneLogic:
         self._object_picks[camera_id].pop(track_id, None)
         self._checkout_status[camera_id].pop(track_id, None)
     
+    def remove_camera(self, camera_id: str):
+        """Drop the zone state of a removed camera"""
+        self._zone_history.pop(camera_id, None)
+        self._object_picks.pop(camera_id, None)
+        self._checkout_status.pop(camera_id, None)
+    
     def cleanup(self):
         """Cleanup all resources"""
         self._zone_history.clear()
@@ -8,6 +8,8 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.model_registry import yolo_loader
+from app.ai.detector import COCO_CLASS_NAMES, class_name as coco_class_name
 from config.settings import settings
 
 
@@ -16,6 +18,8 @@ class ObjectDetectionModule(BaseAIModule):
     Object Detection AI Module
     General purpose object detection (COCO classes)
     """
+
+    cache_static_results = True
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -24,6 +28,9 @@ class ObjectDetectionModule(BaseAIModule):
             confidence_threshold=confidence_threshold
         )
         self.target_classes = ['person', 'car', 'truck', 'bus', 'motorcycle', 'bicycle', 'bag', 'backpack']
+        self.detector_classes = [
+            COCO_CLASS_NAMES.index(name) for name in self.target_classes if name in COCO_CLASS_NAMES
+        ]
         self._model = None
 
     def initialize(self) -> bool:
@@ -33,28 +40,12 @@ class ObjectDetectionModule(BaseAIModule):
             
             # Load YOLOv8 model
             try:
-                self._model = YOLO('yolov8n.pt')  # nano model
+                self._model = self.acquire_model('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))  # nano model
                 logger.info("Object Detection module initialized with YOLOv8")
             except Exception as e:
                 logger.warning(f"Could not load YOLOv8 model: {e}")
                 self._model = None
             
-            # COCO class names (YOLOv8 uses COCO dataset)
-            self._class_names = [
-                'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck',
-                'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench',
-                'bird', 'cat', 'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra',
-                'giraffe', 'backpack', 'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee',
-                'skis', 'snowboard', 'sports ball', 'kite', 'baseball bat', 'baseball glove',
-                'skateboard', 'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup',
-                'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
-                'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'couch',
-                'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
-                'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
-                'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
-                'toothbrush'
-            ]
-            
             self._initialized = True
             return True
         except ImportError:
@@ -81,6 +72,7 @@ class ObjectDetectionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement object detection
             # 1. Detect objects in frame using YOLOv8
@@ -88,10 +80,12 @@ class ObjectDetectionModule(BaseAIModule):
             # 3. Filter by confidence threshold
             # 4. Generate detections and events
             
-            detections = self._detect_objects(frame)
+            detections = self.get_shared_detections(metadata)
+            if detections is None:
+                detections = self._detect_objects(frame, params.confidence_threshold)
             
             for obj in detections:
-                if obj.get('confidence', 0) > self.confidence_threshold:
+                if obj.get('confidence', 0) > params.confidence_threshold:
                     class_name = obj.get('class')
                     
                     # Only process target classes
@@ -124,13 +118,13 @@ class ObjectDetectionModule(BaseAIModule):
 
         return results
 
-    def _detect_objects(self, frame: np.ndarray) -> List[Dict]:
+    def _detect_objects(self, frame: np.ndarray, conf: float) -> List[Dict]:
         """Detect objects in frame using YOLOv8"""
         if not self._model:
             return []
         
         try:
-            results = self._model(frame, conf=self.confidence_threshold, verbose=False)
+            results = self._model(frame, conf=conf, verbose=False)
             
             detections = []
             for result in results:
@@ -139,7 +133,7 @@ class ObjectDetectionModule(BaseAIModule):
                     x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
                     confidence = float(box.conf[0].cpu().numpy())
                     class_id = int(box.cls[0].cpu().numpy())
-                    class_name = self._class_names[class_id] if class_id < len(self._class_names) else f'class_{class_id}'
+                    class_name = coco_class_name(class_id)
                     
                     detections.append({
                         'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
@@ -153,3 +147,7 @@ class ObjectDetectionModule(BaseAIModule):
             logger.error(f"Error detecting objects: {e}")
             return []
 
+    def cleanup(self):
+        """Release shared models"""
+        self._model = None
+        super().cleanup()
@@ -8,6 +8,8 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.model_registry import yolo_loader
+from app.ai.products import TRACKS
 from config.settings import settings
 
 
@@ -16,6 +18,9 @@ class PeopleCounterModule(BaseAIModule):
     People Counter AI Module
     Tracks people entering and exiting defined zones
     """
+
+    detector_classes = [0]  # person
+    consumes = (TRACKS,)
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -35,7 +40,7 @@ class PeopleCounterModule(BaseAIModule):
             
             # Load YOLOv8 model for person detection
             try:
-                self._model = YOLO('yolov8n.pt')  # nano model (fastest)
+                self._model = self.acquire_model('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))  # nano model (fastest)
                 # Alternative: YOLO('yolov8s.pt') for better accuracy
                 logger.info("People Counter module initialized with YOLOv8")
             except Exception as e:
@@ -76,6 +81,7 @@ class PeopleCounterModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement actual people detection and tracking
             # 1. Detect people in frame using YOLOv8 or similar
@@ -83,8 +89,12 @@ class PeopleCounterModule(BaseAIModule):
             # 3. Detect entry/exit based on zone boundaries
             # 4. Update counts
             
-            detected_people = self._detect_people(frame)
-            tracked_people = self._track_people(camera_id, detected_people, frame)
+            tracked_people = self.get_product(metadata, TRACKS)
+            if tracked_people is None:
+                detected_people = self.get_shared_detections(metadata)
+                if detected_people is None:
+                    detected_people = self._detect_people(frame, params.confidence_threshold)
+                tracked_people = self._track_people(camera_id, detected_people, frame)
             
             # Update counts based on tracking
             entered, exited = self._update_counts(camera_id, tracked_people, metadata)
@@ -124,14 +134,14 @@ class PeopleCounterModule(BaseAIModule):
 
         return results
 
-    def _detect_people(self, frame: np.ndarray) -> List[Dict]:
+    def _detect_people(self, frame: np.ndarray, conf: float) -> List[Dict]:
         """Detect people in frame using YOLOv8"""
         if not self._model:
             return []
         
         try:
             # YOLOv8 person class ID is 0
-            results = self._model(frame, classes=[0], conf=self.confidence_threshold, verbose=False)
+            results = self._model(frame, classes=[0], conf=conf, verbose=False)
             
             detections = []
             for result in results:
@@ -165,3 +175,12 @@ class PeopleCounterModule(BaseAIModule):
         """Get current count for camera"""
         return self.counts.get(camera_id, {'entered': 0, 'exited': 0, 'current': 0})
 
+    def remove_camera(self, camera_id: str):
+        self.counts.pop(camera_id, None)
+        self.tracking_data.pop(camera_id, None)
+        super().remove_camera(camera_id)
+
+    def cleanup(self):
+        """Release shared models"""
+        self._model = None
+        super().cleanup()
@@ -8,14 +8,22 @@ from datetime import datetime
 from loguru import logger
 
 from app.ai.base import BaseAIModule
+from app.ai.model_registry import easyocr_loader, yolo_loader
 from config.settings import settings
 
+# Vehicle classes in COCO: car(2), motorcycle(3), bus(5), truck(7)
+VEHICLE_TYPES = {2: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck'}
+
 
 class VehicleRecognitionModule(BaseAIModule):
     """
     Vehicle Recognition AI Module
     Detects vehicles and recognizes license plates
     """
+
+    detector_classes = list(VEHICLE_TYPES)
+    # Parked vehicles: skip detection and plate OCR until the scene changes
+    cache_static_results = True
     
     def __init__(self, confidence_threshold: float = 0.5):
         super().__init__(
@@ -35,7 +43,7 @@ class VehicleRecognitionModule(BaseAIModule):
             
             # Load vehicle detection model
             try:
-                self._vehicle_model = YOLO('yolov8n.pt')
+                self._vehicle_model = self.acquire_model('yolo:yolov8n.pt', yolo_loader('yolov8n.pt'))
                 logger.info("Vehicle Recognition module initialized with YOLOv8")
             except Exception as e:
                 logger.warning(f"Could not load YOLOv8 model: {e}")
@@ -44,7 +52,7 @@ class VehicleRecognitionModule(BaseAIModule):
             # Load license plate reader
             try:
                 import easyocr
-                self._plate_reader = easyocr.Reader(['en'], gpu=False)
+                self._plate_reader = self.acquire_model('easyocr:en', easyocr_loader(['en']))
                 logger.info("License plate reader initialized with EasyOCR")
             except ImportError:
                 logger.warning("EasyOCR not installed. Install with: pip install easyocr")
@@ -87,6 +95,7 @@ class VehicleRecognitionModule(BaseAIModule):
             'alerts': [],
         }
 
+        params = self.params(camera_id)
         try:
             # TODO: Implement vehicle recognition
             # 1. Detect vehicles in frame
@@ -94,10 +103,17 @@ class VehicleRecognitionModule(BaseAIModule):
             # 3. Read license plate text
             # 4. Match against database
             
-            vehicles = self._detect_vehicles(frame)
+            vehicles = self.get_shared_detections(metadata)
+            if vehicles is None:
+                vehicles = self._detect_vehicles(frame, params.confidence_threshold)
+            else:
+                vehicles = [
+                    dict(vehicle, type=VEHICLE_TYPES.get(vehicle['class_id'], 'vehicle'))
+                    for vehicle in vehicles
+                ]
             
             for vehicle in vehicles:
-                if vehicle.get('confidence', 0) > self.confidence_threshold:
+                if vehicle.get('confidence', 0) > params.confidence_threshold:
                     # Extract and read license plate
                     plate_text = self._read_license_plate(vehicle, frame)
                     
@@ -151,14 +167,13 @@ class VehicleRecognitionModule(BaseAIModule):
 
         return results
 
-    def _detect_vehicles(self, frame: np.ndarray) -> List[Dict]:
+    def _detect_vehicles(self, frame: np.ndarray, conf: float) -> List[Dict]:
         """Detect vehicles in frame using YOLOv8"""
         if not self._vehicle_model:
             return []
         
         try:
-            # Vehicle classes in COCO: car(2), motorcycle(3), bus(5), truck(7)
-            results = self._vehicle_model(frame, classes=[2, 3, 5, 7], conf=self.confidence_threshold, verbose=False)
+            results = self._vehicle_model(frame, classes=self.detector_classes, conf=conf, verbose=False)
             
             detections = []
             for result in results:
@@ -169,8 +184,7 @@ class VehicleRecognitionModule(BaseAIModule):
                     class_id = int(box.cls[0].cpu().numpy())
                     
                     # Map class IDs to vehicle types
-                    vehicle_types = {2: 'car', 3: 'motorcycle', 5: 'bus', 7: 'truck'}
-                    vehicle_type = vehicle_types.get(class_id, 'vehicle')
+                    vehicle_type = VEHICLE_TYPES.get(class_id, 'vehicle')
                     
                     detections.append({
                         'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
@@ -225,3 +239,8 @@ class VehicleRecognitionModule(BaseAIModule):
             logger.error(f"Error reading license plate: {e}")
             return None
 
+    def cleanup(self):
+        """Release shared models"""
+        self._vehicle_model = None
+        self._plate_reader = None
+        super().cleanup()
@@ -0,0 +1,168 @@
+"""
+Intermediate Products
+Per-frame results several modules need (detections, person tracks, face
+embeddings). Modules declare the products they consume and produce, and
+the manager computes each product once per frame, in dependency order,
+only for the modules due on that frame.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+from loguru import logger
+
+# {backend: detections} from the manager's shared detector pass (the root
+# product; modules consume it through detector_classes)
+DETECTIONS = 'detections'
+# [{'track_id', 'bbox', 'center', 'confidence'}] person tracks
+TRACKS = 'tracks'
+# [{'bbox', 'confidence', 'location', 'embedding'}] faces with encodings
+FACES = 'faces'
+
+
+class ModuleProvider:
+    """Computes a product with the module that produces it (see BaseAIModule.produces)"""
+
+    requires: Tuple[str, ...] = ()
+
+    def __init__(self, module: Any, product: str):
+        self.module = module
+        self.product = product
+
+    def prepare(self):
+        """Load the producer's models even when the module itself is not enabled"""
+        if not self.module._initialized:
+            self.module.initialize()
+
+    def compute(self, frame: np.ndarray, camera_id: str, inputs: Dict[str, Any], consumers: List[Any]) -> Any:
+        if not self.module._initialized:
+            return None
+        return self.module.compute_product(self.product, frame, camera_id, inputs)
+
+
+@dataclass
+class ProductStats:
+    computed: int = 0
+    failures: int = 0
+    total_ms: float = 0.0
+
+
+class ProductGraph:
+    """
+    Product providers and the per-camera order they run in
+
+    The plan of a camera is the dependency-ordered set of products its due
+    modules consume, directly or through other products. It is rebuilt
+    only when the camera's set of due modules changes.
+    """
+
+    def __init__(self):
+        self.providers: Dict[str, Any] = {}
+        self._plans: Dict[str, Tuple[Tuple[str, ...], List[str]]] = {}  # camera_id -> (module ids, products)
+        self._missing: Set[str] = set()  # consumed products without a provider, already logged
+        self._stats: Dict[str, ProductStats] = {}
+
+    def register(self, product: str, provider: Any):
+        self.providers[product] = provider
+
+    def prepare(self, products: Iterable[str]):
+        """Get the providers of these products (and their inputs) ready"""
+        for product in self._order(products):
+            prepare = getattr(self.providers[product], 'prepare', None)
+            if prepare:
+                prepare()
+
+    def _order(self, products: Iterable[str]) -> List[str]:
+        order: List[str] = []
+        visiting = set()
+
+        def visit(product: str):
+            if product in order or product not in self.providers:
+                return
+            if product in visiting:
+                logger.error(f"Product dependency cycle at '{product}'")
+                return
+            visiting.add(product)
+            for required in self.providers[product].requires:
+                visit(required)
+            visiting.discard(product)
+            order.append(product)
+
+        for product in products:
+            visit(product)
+        return order
+
+    def plan(self, camera_id: str, modules: List[tuple]) -> List[str]:
+        """Products to compute for these (module_id, module) pairs, in order"""
+        key = tuple(module_id for module_id, _ in modules)
+        cached = self._plans.get(camera_id)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        consumed = {product for _, module in modules for product in module.consumes}
+        for product in sorted(consumed - set(self.providers) - self._missing):
+            self._missing.add(product)
+            logger.warning(f"No provider for product '{product}' - its consumers fall back to their own processing")
+
+        order = self._order(product for _, module in modules for product in module.consumes)
+        self._plans[camera_id] = (key, order)
+        return order
+
+    def compute(
+        self,
+        frame: np.ndarray,
+        camera_id: str,
+        modules: List[tuple],
+        shared_detections: Dict[str, List[Dict]]
+    ) -> Dict[str, Any]:
+        """
+        Compute the camera's plan on a frame
+        A product whose inputs are missing, or whose provider fails, is
+        None and its consumers fall back to their own processing.
+        """
+        products: Dict[str, Any] = {DETECTIONS: shared_detections}
+        plan = self.plan(camera_id, modules)
+        # Products nobody provides are None for their consumers, like failed ones
+        for product in self._missing:
+            products[product] = None
+        for product in plan:
+            provider = self.providers[product]
+            if any(products.get(required) is None for required in provider.requires):
+                products[product] = None
+                continue
+
+            consumers = [module for _, module in modules if product in module.consumes]
+            stats = self._stats.setdefault(product, ProductStats())
+            started = time.perf_counter()
+            try:
+                products[product] = provider.compute(frame, camera_id, products, consumers)
+            except Exception as e:
+                logger.error(f"Error computing product '{product}' for camera {camera_id}: {e}")
+                stats.failures += 1
+                products[product] = None
+                continue
+            stats.computed += 1
+            stats.total_ms += (time.perf_counter() - started) * 1000
+
+        return products
+
+    def remove_camera(self, camera_id: str):
+        self._plans.pop(camera_id, None)
+        for provider in self.providers.values():
+            remove_camera = getattr(provider, 'remove_camera', None)
+            if remove_camera:
+                remove_camera(camera_id)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {
+            'plans': {camera_id: order for camera_id, (_, order) in self._plans.items()},
+            'products': {
+                product: {
+                    'computed': stats.computed,
+                    'failures': stats.failures,
+                    'avg_ms': round(stats.total_ms / stats.computed, 2) if stats.computed else None,
+                }
+                for product, stats in self._stats.items()
+            },
+        }
@@ -0,0 +1,299 @@
+"""
+INT8 Quantization
+Calibrates detector models on site footage and writes INT8 artifacts
+next to the FP32 exports in settings.models_dir
+
+Calibration frames come from the running cameras (CameraService) or from
+recorded clips. The report compares INT8 against FP32 on the same frames.
+
+Usage (from the edge-server directory):
+    python -m app.ai.quantize yolov8n.pt --clips lobby.mp4 gate.mp4 --frames 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.ai.backends import (
+    BACKEND_ONNXRUNTIME,
+    BACKEND_OPENVINO,
+    DEFAULT_IMGSZ,
+    PRECISION_INT8,
+    OnnxRuntimeBackend,
+    OpenVINOBackend,
+    export_model,
+    letterbox,
+    onnx_path,
+    openvino_path,
+)
+from config.settings import settings
+
+MATCH_IOU = 0.5
+
+
+def sample_clip_frames(paths: Iterable[str], count: int) -> List[np.ndarray]:
+    """Sample frames evenly across recorded clips"""
+    import cv2
+
+    paths = list(paths)
+    if not paths:
+        return []
+
+    per_clip = max(1, count // len(paths))
+    frames: List[np.ndarray] = []
+
+    for path in paths:
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            logger.warning(f"Could not open clip: {path}")
+            continue
+
+        total = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or per_clip
+        for position in np.linspace(0, max(0, total - 1), per_clip).astype(int):
+            capture.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = capture.read()
+            if ret and frame is not None:
+                frames.append(frame)
+        capture.release()
+
+    return frames[:count]
+
+
+async def sample_camera_frames(camera_service, count: int, interval: float = 1.0) -> List[np.ndarray]:
+    """
+    Sample frames the camera service is already capturing
+    Takes the latest frame of every active camera each interval.
+    """
+    frames: List[np.ndarray] = []
+    seen: Dict[str, object] = {}
+
+    while len(frames) < count:
+        added = False
+        for camera_id, stream in list(camera_service.cameras.items()):
+            if stream.last_frame_time is None or seen.get(camera_id) == stream.last_frame_time:
+                continue
+            frame = camera_service.get_frame(camera_id)
+            if frame is not None:
+                seen[camera_id] = stream.last_frame_time
+                frames.append(frame)
+                added = True
+            if len(frames) >= count:
+                break
+
+        if not added and not any(stream.is_active for stream in camera_service.cameras.values()):
+            break
+        await asyncio.sleep(interval)
+
+    return frames
+
+
+def _calibration_blobs(frames: List[np.ndarray], imgsz: int) -> List[np.ndarray]:
+    return [letterbox(frame, imgsz)[0][np.newaxis] for frame in frames]
+
+
+def _quantize_onnx(fp32_path: str, int8_path: str, frames: List[np.ndarray], imgsz: int):
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    input_name = ort.InferenceSession(fp32_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self):
+            self._blobs = iter(_calibration_blobs(frames, imgsz))
+
+        def get_next(self):
+            blob = next(self._blobs, None)
+            return {input_name: blob} if blob is not None else None
+
+    quantize_static(
+        fp32_path,
+        int8_path,
+        FrameReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+
+def _quantize_openvino(fp32_path: str, int8_path: str, frames: List[np.ndarray], imgsz: int):
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(fp32_path)
+    dataset = nncf.Dataset(_calibration_blobs(frames, imgsz))
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED, subset_size=len(frames))
+    ov.save_model(quantized, int8_path)
+
+
+def _iou(a: List[int], b: List[int]) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare_detections(reference: List[List[Dict]], candidate: List[List[Dict]]) -> Dict:
+    """
+    Agreement of candidate detections with reference detections
+    Greedy same-class matching at IoU >= MATCH_IOU, per frame.
+    """
+    matched = ref_total = cand_total = 0
+    ious: List[float] = []
+    conf_deltas: List[float] = []
+
+    for ref_frame, cand_frame in zip(reference, candidate):
+        ref_total += len(ref_frame)
+        cand_total += len(cand_frame)
+        used = set()
+
+        for ref in sorted(ref_frame, key=lambda d: -d['confidence']):
+            best, best_iou = None, MATCH_IOU
+            for index, cand in enumerate(cand_frame):
+                if index in used or cand['class_id'] != ref['class_id']:
+                    continue
+                iou = _iou(ref['bbox'], cand['bbox'])
+                if iou >= best_iou:
+                    best, best_iou = index, iou
+            if best is not None:
+                used.add(best)
+                matched += 1
+                ious.append(best_iou)
+                conf_deltas.append(cand_frame[best]['confidence'] - ref['confidence'])
+
+    recall = matched / ref_total if ref_total else 1.0
+    precision = matched / cand_total if cand_total else 1.0
+    return {
+        'reference_detections': ref_total,
+        'candidate_detections': cand_total,
+        'matched': matched,
+        'recall': round(recall, 4),
+        'precision': round(precision, 4),
+        'f1': round(2 * recall * precision / (recall + precision), 4) if recall + precision else 0.0,
+        'mean_iou': round(float(np.mean(ious)), 4) if ious else 0.0,
+        'mean_confidence_delta': round(float(np.mean(conf_deltas)), 4) if conf_deltas else 0.0,
+    }
+
+
+def _timed_predict(backend, frames: List[np.ndarray], conf: float):
+    outputs = []
+    started = time.perf_counter()
+    for frame in frames:
+        outputs.append(backend.predict([frame], conf=conf)[0])
+    elapsed = time.perf_counter() - started
+    return outputs, elapsed * 1000 / max(1, len(frames))
+
+
+def quantize_model(
+    weights: str,
+    frames: List[np.ndarray],
+    backend: str = BACKEND_ONNXRUNTIME,
+    imgsz: int = DEFAULT_IMGSZ,
+    conf: float = 0.25,
+    eval_frames: Optional[int] = None
+) -> Dict:
+    """
+    Produce an INT8 model calibrated on the given frames and report
+    its accuracy and speed against FP32 on the same frames.
+
+    Returns the report, which is also written as <stem>.int8.report.json.
+    """
+    if not frames:
+        raise ValueError("No calibration frames")
+
+    os.makedirs(settings.models_dir, exist_ok=True)
+    fp32_onnx = onnx_path(weights)
+    if not os.path.exists(fp32_onnx):
+        export_model(weights, backend=BACKEND_ONNXRUNTIME, imgsz=imgsz)
+
+    if backend == BACKEND_OPENVINO:
+        fp32_path = openvino_path(weights) if os.path.exists(openvino_path(weights)) else fp32_onnx
+        int8_path = openvino_path(weights, PRECISION_INT8)
+        _quantize_openvino(fp32_path, int8_path, frames, imgsz)
+        fp32_backend = OpenVINOBackend(weights, model_path=fp32_path)
+        int8_backend = OpenVINOBackend(weights, model_path=int8_path, precision=PRECISION_INT8)
+    else:
+        fp32_path = fp32_onnx
+        int8_path = onnx_path(weights, PRECISION_INT8)
+        _quantize_onnx(fp32_path, int8_path, frames, imgsz)
+        fp32_backend = OnnxRuntimeBackend(weights, model_path=fp32_path)
+        int8_backend = OnnxRuntimeBackend(weights, model_path=int8_path, precision=PRECISION_INT8)
+
+    logger.info(f"INT8 model written: {int8_path}")
+
+    evaluation = frames[:eval_frames] if eval_frames else frames
+    fp32_backend.load()
+    int8_backend.load()
+    try:
+        fp32_out, fp32_ms = _timed_predict(fp32_backend, evaluation, conf)
+        int8_out, int8_ms = _timed_predict(int8_backend, evaluation, conf)
+    finally:
+        fp32_backend.release()
+        int8_backend.release()
+
+    report = {
+        'weights': weights,
+        'backend': backend,
+        'fp32_model': fp32_path,
+        'int8_model': int8_path,
+        'calibration_frames': len(frames),
+        'evaluation_frames': len(evaluation),
+        'fp32_ms_per_frame': round(fp32_ms, 2),
+        'int8_ms_per_frame': round(int8_ms, 2),
+        'speedup': round(fp32_ms / int8_ms, 2) if int8_ms else None,
+        'accuracy_vs_fp32': compare_detections(fp32_out, int8_out),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+    report_path = os.path.splitext(int8_path)[0] + '.report.json'
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    logger.info(
+        f"INT8 report: {report['speedup']}x speedup, "
+        f"F1 {report['accuracy_vs_fp32']['f1']} vs FP32 ({report_path})"
+    )
+
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="INT8-quantize a detector on site footage")
+    parser.add_argument("weights", help="YOLO weight file, e.g. yolov8n.pt")
+    parser.add_argument("--clips", nargs="+", required=True, help="Recorded clips to sample calibration frames from")
+    parser.add_argument("--frames", type=int, default=300, help="Number of calibration frames")
+    parser.add_argument(
+        "--backend",
+        choices=[BACKEND_ONNXRUNTIME, BACKEND_OPENVINO],
+        default=BACKEND_ONNXRUNTIME
+    )
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ)
+    args = parser.parse_args(argv)
+
+    settings.ensure_directories()
+
+    frames = sample_clip_frames(args.clips, args.frames)
+    if not frames:
+        logger.error("No frames could be read from the clips")
+        return 1
+
+    report = quantize_model(args.weights, frames, backend=args.backend, imgsz=args.imgsz)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
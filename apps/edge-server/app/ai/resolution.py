@@ -0,0 +1,124 @@
+"""
+Adaptive Inference Resolution
+Tunes the detector input size per camera from the sizes of the
+objects it actually detects
+"""
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from app.ai.backends import DEFAULT_IMGSZ
+from config.settings import settings
+
+IMGSZ_STEPS = (320, 416, 512, 640, 768, 960, 1280)
+
+SMALL_OBJECT_PX = 20  # boxes below this size (in input pixels) lose recall
+COMFORT_PX = 48  # smallest boxes must stay above this after stepping down
+SMALL_SHARE = 0.1  # step up when more than this share of boxes is small
+MIN_SAMPLES = 60  # boxes observed before a decision
+EMPTY_INPUTS = 300  # detector inputs without boxes before stepping back up
+WINDOW = 500
+
+
+@dataclass
+class CameraResolution:
+    """Input size and recent relative box sizes of one camera"""
+    imgsz: int
+    sizes: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    empty_inputs: int = 0
+    changes: int = 0
+    last_change: Optional[float] = None
+
+
+class ResolutionTuner:
+    """
+    Per-camera detector input size within [ADAPTIVE_IMGSZ_MIN, ADAPTIVE_IMGSZ_MAX]
+
+    Box sizes are kept relative to the detector input image, so the pixel
+    size a box would have at any input size is known. The camera steps up
+    when too many boxes fall below SMALL_OBJECT_PX, and down when even the
+    small boxes would stay above COMFORT_PX at the next lower size.
+    Cameras listed in CAMERA_IMGSZ use that fixed size.
+    """
+
+    def __init__(self, min_imgsz: Optional[int] = None, max_imgsz: Optional[int] = None):
+        low = min_imgsz or settings.ADAPTIVE_IMGSZ_MIN
+        high = max_imgsz or settings.ADAPTIVE_IMGSZ_MAX
+        self.steps: List[int] = [size for size in IMGSZ_STEPS if low <= size <= high] or [DEFAULT_IMGSZ]
+        self.default = min(self.steps, key=lambda size: abs(size - DEFAULT_IMGSZ))
+        self._cameras: Dict[str, CameraResolution] = {}
+
+    def imgsz_for(self, camera_id: str) -> int:
+        fixed = settings.CAMERA_IMGSZ.get(camera_id)
+        if fixed:
+            return fixed
+        state = self._cameras.get(camera_id)
+        return state.imgsz if state else self.default
+
+    def observe(self, camera_id: str, detections: List[Dict], input_shape: Tuple[int, ...]):
+        """Record the boxes one detector input produced for a camera"""
+        if camera_id in settings.CAMERA_IMGSZ:
+            return
+
+        state = self._cameras.setdefault(camera_id, CameraResolution(self.default))
+        if not detections:
+            state.empty_inputs += 1
+            # A camera that stopped seeing anything may be too coarse to see it
+            if state.empty_inputs >= EMPTY_INPUTS and state.imgsz < self.default:
+                self._step(camera_id, state, +1, "no detections")
+            return
+
+        state.empty_inputs = 0
+        extent = float(max(input_shape[:2]))
+        for det in detections:
+            _, _, width, height = det['bbox']
+            state.sizes.append(np.sqrt(max(width, 0) * max(height, 0)) / extent)
+
+        if len(state.sizes) >= MIN_SAMPLES:
+            self._decide(camera_id, state)
+
+    def _decide(self, camera_id: str, state: CameraResolution):
+        sizes = np.asarray(state.sizes)
+        small_share = float(np.mean(sizes * state.imgsz < SMALL_OBJECT_PX))
+
+        if small_share > SMALL_SHARE:
+            self._step(camera_id, state, +1, f"{small_share:.0%} small objects")
+            return
+
+        index = self.steps.index(state.imgsz) if state.imgsz in self.steps else None
+        if index:
+            lower = self.steps[index - 1]
+            if float(np.percentile(sizes, 5)) * lower >= COMFORT_PX:
+                self._step(camera_id, state, -1, "objects large enough")
+
+    def _step(self, camera_id: str, state: CameraResolution, direction: int, reason: str):
+        index = self.steps.index(state.imgsz) if state.imgsz in self.steps else self.steps.index(self.default)
+        target = self.steps[max(0, min(len(self.steps) - 1, index + direction))]
+        if target != state.imgsz:
+            logger.info(f"Camera {camera_id}: detector input {state.imgsz} -> {target} px ({reason})")
+            state.imgsz = target
+            state.changes += 1
+            state.last_change = time.monotonic()
+        state.sizes.clear()
+        state.empty_inputs = 0
+
+    def remove_camera(self, camera_id: str):
+        self._cameras.pop(camera_id, None)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        stats = {}
+        for camera_id, state in self._cameras.items():
+            sizes = np.asarray(state.sizes) * state.imgsz
+            stats[camera_id] = {
+                'imgsz': state.imgsz,
+                'changes': state.changes,
+                'samples': len(sizes),
+                'median_box_px': round(float(np.median(sizes)), 1) if len(sizes) else None,
+            }
+        for camera_id, imgsz in settings.CAMERA_IMGSZ.items():
+            stats[camera_id] = {'imgsz': imgsz, 'fixed': True}
+        return stats
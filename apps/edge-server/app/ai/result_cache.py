@@ -0,0 +1,96 @@
+"""
+Static-Scene Result Cache
+Lets modules reuse their last detections while a camera's frame is
+practically unchanged since those detections were computed
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config.settings import settings
+
+SIGNATURE_SIZE = (32, 32)
+
+
+@dataclass
+class CacheEntry:
+    """Signature of the frame a module last ran on, plus hit counters"""
+    signature: Optional[np.ndarray] = None
+    computed_at: float = 0.0
+    pending: Optional[np.ndarray] = None
+    hits: int = 0
+    misses: int = 0
+
+
+def frame_signature(frame: np.ndarray) -> np.ndarray:
+    """Tiny grayscale thumbnail used to compare frames"""
+    small = cv2.resize(frame, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small.astype(np.float32) / 255.0
+
+
+class StaticSceneCache:
+    """
+    Per (camera, module) record of the frame signature behind the last
+    computed result
+
+    A lookup hits when the current signature differs from it by less than
+    STATIC_CACHE_THRESHOLD (mean absolute difference, 0-1) and the result
+    is younger than STATIC_CACHE_MAX_AGE seconds.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, max_age: Optional[float] = None):
+        self.threshold = settings.STATIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.max_age = settings.STATIC_CACHE_MAX_AGE if max_age is None else max_age
+        self._entries: Dict[Tuple[str, str], CacheEntry] = {}
+
+    def lookup(self, camera_id: str, module_id: str, signature: np.ndarray, now: Optional[float] = None) -> bool:
+        """Check whether the module's last result is still valid for this frame"""
+        now = time.monotonic() if now is None else now
+        entry = self._entries.setdefault((camera_id, module_id), CacheEntry())
+
+        if (
+            entry.signature is not None
+            and now - entry.computed_at <= self.max_age
+            and float(np.mean(np.abs(signature - entry.signature))) <= self.threshold
+        ):
+            entry.hits += 1
+            return True
+
+        entry.misses += 1
+        entry.pending = signature
+        return False
+
+    def store(self, camera_id: str, module_id: str, now: Optional[float] = None):
+        """The module ran on the frame of the last missed lookup"""
+        entry = self._entries.get((camera_id, module_id))
+        if entry is None or entry.pending is None:
+            return
+        entry.signature = entry.pending
+        entry.pending = None
+        entry.computed_at = time.monotonic() if now is None else now
+
+    def invalidate(self, camera_id: str, module_id: str):
+        entry = self._entries.get((camera_id, module_id))
+        if entry:
+            entry.signature = None
+            entry.pending = None
+
+    def remove_camera(self, camera_id: str):
+        for key in [key for key in self._entries if key[0] == camera_id]:
+            del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Dict[str, Dict]]:
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for (camera_id, module_id), entry in self._entries.items():
+            total = entry.hits + entry.misses
+            stats.setdefault(camera_id, {})[module_id] = {
+                'hits': entry.hits,
+                'misses': entry.misses,
+                'hit_rate': round(entry.hits / total, 3) if total else 0.0,
+            }
+        return stats
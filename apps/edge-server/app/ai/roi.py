@@ -0,0 +1,109 @@
+"""
+Region-of-Interest Inference
+Turns configured zones into crop rectangles so the shared detector
+only processes the parts of the frame zone-driven modules care about
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+
+def zone_polygons(zones: Any) -> List[List]:
+    """
+    Extract polygons from the zone formats used by the modules:
+    {name: [[x, y], ...]}, {name: {'polygon': [...]}} or
+    [{'name': ..., 'polygon'|'points': [...]}, [[x, y], ...]]
+    """
+    if isinstance(zones, dict):
+        items = list(zones.values())
+    elif isinstance(zones, (list, tuple)):
+        items = list(zones)
+    else:
+        return []
+
+    polygons = []
+    for item in items:
+        if isinstance(item, dict):
+            item = item.get('polygon') or item.get('points') or item.get('coordinates')
+        if item is not None and len(item) >= 3:
+            polygons.append(item)
+    return polygons
+
+
+def _rect_union(a: Rect, b: Rect) -> Rect:
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+def _rects_overlap(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def roi_rects(
+    polygons: List[List],
+    frame_shape: Tuple[int, ...],
+    margin: int = 0,
+    max_coverage: float = 1.0
+) -> Optional[List[Rect]]:
+    """
+    Union of the polygons' bounding rectangles, padded by margin pixels
+    and merged where they overlap
+
+    Returns None when there are no polygons or the rectangles cover more
+    than max_coverage of the frame (full-frame inference is then cheaper).
+    Normalized (0-1) polygon coordinates are scaled to the frame size.
+    """
+    height, width = frame_shape[:2]
+    rects: List[Rect] = []
+
+    for polygon in polygons:
+        points = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+        if points.size and points.max() <= 1.0:
+            points = points * (width, height)
+
+        x1, y1 = np.floor(points.min(axis=0)) - margin
+        x2, y2 = np.ceil(points.max(axis=0)) + margin
+        x1, y1 = max(0, int(x1)), max(0, int(y1))
+        x2, y2 = min(width, int(x2)), min(height, int(y2))
+        if x2 > x1 and y2 > y1:
+            rects.append((x1, y1, x2 - x1, y2 - y1))
+
+    if not rects:
+        return None
+
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _rects_overlap(rects[i], rects[j]):
+                    rects[i] = _rect_union(rects[i], rects.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+
+    if sum(w * h for _, _, w, h in rects) > max_coverage * width * height:
+        return None
+
+    return rects
+
+
+def offset_detections(detections: List[Dict], dx: int, dy: int) -> List[Dict]:
+    """Map detections from crop coordinates back to full-frame coordinates"""
+    if not dx and not dy:
+        return detections
+
+    mapped = []
+    for det in detections:
+        det = dict(det)
+        x, y, w, h = det['bbox']
+        det['bbox'] = [x + dx, y + dy, w, h]
+        if det.get('center') is not None:
+            cx, cy = det['center']
+            det['center'] = (cx + dx, cy + dy)
+        mapped.append(det)
+    return mapped
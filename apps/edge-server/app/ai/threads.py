@@ -0,0 +1,187 @@
+"""
+CPU Thread Budget
+Sizes the intra-op thread pools of torch, OpenCV, onnxruntime, OpenVINO
+and BLAS/OpenMP (dlib, numpy) so inference processes, concurrent modules
+and camera capture together do not oversubscribe the cores
+"""
+import math
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+LIBRARIES = ('torch', 'opencv', 'onnxruntime', 'openvino', 'blas')
+
+# Only read when numpy / torch / dlib load their BLAS and OpenMP runtimes,
+# so set_env() runs before those imports; set only when the operator did not
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+_OPERATOR_ENV = {var for var in BLAS_ENV_VARS if var in os.environ}
+
+# Cores kept free per camera for RTSP decoding in the capture threads
+CAPTURE_CORES_PER_CAMERA = 0.15
+OVERSUBSCRIPTION_WARN = 1.5
+
+
+class ThreadBudget:
+    """
+    Per-process intra-op thread counts
+
+    Cores left after the capture reserve are split between inference
+    processes (INFERENCE_WORKERS, or this one) and the modules each runs
+    concurrently (MODULE_THREADS in parallel mode). Each library gets that
+    share unless THREAD_LIMITS overrides it.
+    """
+
+    def __init__(self):
+        self.cameras = 0
+        self._applied: Optional[Dict[str, int]] = None
+        self._interop_set = False
+        self._lock = threading.Lock()
+
+    @property
+    def cores(self) -> int:
+        return settings.THREAD_BUDGET_CORES or os.cpu_count() or 1
+
+    @property
+    def processes(self) -> int:
+        return max(1, settings.INFERENCE_WORKERS)
+
+    @property
+    def module_concurrency(self) -> int:
+        return settings.MODULE_THREADS if settings.MODULE_EXECUTION == 'parallel' else 1
+
+    def capture_reserve(self) -> int:
+        return min(self.cores - 1, math.ceil(self.cameras * CAPTURE_CORES_PER_CAMERA))
+
+    def limits(self) -> Dict[str, int]:
+        """Thread count per library for one inference process"""
+        inference_cores = max(1, self.cores - self.capture_reserve())
+        share = max(1, inference_cores // (self.processes * self.module_concurrency))
+        return {library: settings.THREAD_LIMITS.get(library, share) for library in LIBRARIES}
+
+    def limit(self, library: str) -> Optional[int]:
+        """Budgeted threads for a library, None when budgeting is off"""
+        if not settings.THREAD_BUDGET:
+            return None
+        return self.limits()[library]
+
+    def set_cameras(self, cameras: int):
+        """Re-budget for a new camera count"""
+        if cameras == self.cameras:
+            return
+        self.cameras = cameras
+        if self._applied is not None:
+            self.apply()
+
+    def set_env(self):
+        """
+        Size BLAS/OpenMP through their environment variables; call before
+        numpy, cv2, torch or dlib are imported (worker processes inherit them)
+        """
+        if not settings.THREAD_BUDGET:
+            return
+        blas = str(self.limits()['blas'])
+        for var in BLAS_ENV_VARS:
+            if var not in _OPERATOR_ENV:
+                os.environ[var] = blas
+
+    def apply(self):
+        """Apply the budget to the libraries loaded in this process"""
+        if not settings.THREAD_BUDGET:
+            return
+
+        with self._lock:
+            limits = self.limits()
+            changed = limits != self._applied
+
+            try:
+                import cv2
+                cv2.setNumThreads(limits['opencv'])
+            except ImportError:
+                pass
+
+            if 'torch' in sys.modules:
+                torch = sys.modules['torch']
+                torch.set_num_threads(limits['torch'])
+                if not self._interop_set:
+                    try:
+                        torch.set_num_interop_threads(1)
+                    except RuntimeError:
+                        pass  # inter-op pool already started
+                    self._interop_set = True
+
+            try:
+                # BLAS pools already loaded only follow the budget through threadpoolctl
+                from threadpoolctl import threadpool_limits
+                threadpool_limits(limits=limits['blas'])
+            except ImportError:
+                pass
+
+            self._applied = limits
+
+        if not changed:
+            return
+
+        logger.info(
+            f"Thread budget: {limits['torch']} intra-op threads per module "
+            f"({self.cores} cores, {self.processes} process(es), "
+            f"{self.module_concurrency} concurrent module(s), {self.cameras} camera(s))"
+        )
+        stats = self.get_stats()
+        if stats['oversubscription'] > OVERSUBSCRIPTION_WARN:
+            logger.warning(
+                f"CPU oversubscribed {stats['oversubscription']}x: "
+                f"{stats['compute_threads']} compute threads on {self.cores} cores"
+            )
+
+    def _actual(self) -> Dict[str, Any]:
+        actual: Dict[str, Any] = {'process_threads': threading.active_count()}
+        try:
+            import cv2
+            actual['opencv'] = cv2.getNumThreads()
+        except ImportError:
+            pass
+        if 'torch' in sys.modules:
+            actual['torch'] = sys.modules['torch'].get_num_threads()
+        try:
+            import psutil
+            actual['process_threads'] = psutil.Process().num_threads()
+        except Exception:
+            pass
+        return actual
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Budget and measured state
+        compute_threads counts the intra-op threads all inference processes
+        can run at once, using the pool sizes the libraries report, plus the
+        cores the capture threads decode on; load_per_core is the 1-minute
+        load average.
+        """
+        actual = self._actual()
+        intra = max([actual.get('torch', 1), actual.get('opencv', 1), 1])
+        compute_threads = self.processes * self.module_concurrency * intra + math.ceil(self.cameras * CAPTURE_CORES_PER_CAMERA)
+        stats = {
+            'enabled': settings.THREAD_BUDGET,
+            'cores': self.cores,
+            'cameras': self.cameras,
+            'processes': self.processes,
+            'module_concurrency': self.module_concurrency,
+            'capture_reserve': self.capture_reserve(),
+            'limits': self.limits(),
+            'actual': actual,
+            'compute_threads': compute_threads,
+            'oversubscription': round(compute_threads / float(self.cores), 2),
+        }
+        try:
+            stats['load_per_core'] = round(os.getloadavg()[0] / self.cores, 2)
+        except (AttributeError, OSError):
+            pass
+        return stats
+
+
+thread_budget = ThreadBudget()
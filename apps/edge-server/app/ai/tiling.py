@@ -0,0 +1,73 @@
+"""
+Tiled Inference
+Splits high-resolution frames into overlapping tiles so small,
+distant objects survive the detector's input downscale, and merges
+the per-tile detections back with cross-tile NMS
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x, y, w, h
+
+MERGE_IOU = 0.5
+# Boxes cut by a tile edge overlap the full box mostly by the smaller area
+MERGE_IOS = 0.7
+
+
+def _positions(length: int, tile: int, step: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    positions = list(range(0, length - tile, step))
+    positions.append(length - tile)
+    return positions
+
+
+def tile_grid(region: Rect, tile_size: int, overlap: float) -> List[Rect]:
+    """
+    Overlapping tiles covering a region, in full-frame coordinates
+    A region smaller than one tile is returned as a single tile.
+    """
+    x0, y0, width, height = region
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    return [
+        (x0 + x, y0 + y, min(tile_size, width), min(tile_size, height))
+        for y in _positions(height, tile_size, step)
+        for x in _positions(width, tile_size, step)
+    ]
+
+
+def merge_detections(detections: List[Dict]) -> List[Dict]:
+    """
+    Class-aware greedy NMS over detections gathered from several tiles
+
+    A box is dropped when it overlaps a higher-confidence box of the same
+    class by IoU >= MERGE_IOU, or when most of it lies inside that box
+    (IoS >= MERGE_IOS), which catches people cut in half by a tile edge.
+    """
+    if len(detections) < 2:
+        return detections
+
+    boxes = np.array([det['bbox'] for det in detections], dtype=np.float32)
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    areas = np.maximum(boxes[:, 2], 0) * np.maximum(boxes[:, 3], 0)
+    classes = np.array([det.get('class_id', 0) for det in detections])
+    order = np.argsort([-det['confidence'] for det in detections])
+
+    keep = []
+    suppressed = np.zeros(len(detections), dtype=bool)
+    for i in order:
+        if suppressed[i]:
+            continue
+        keep.append(i)
+
+        iw = np.clip(np.minimum(x2[i], x2) - np.maximum(x1[i], x1), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2) - np.maximum(y1[i], y1), 0, None)
+        inter = iw * ih
+        iou = inter / np.maximum(areas[i] + areas - inter, 1e-6)
+        ios = inter / np.maximum(np.minimum(areas[i], areas), 1e-6)
+
+        suppressed |= (classes == classes[i]) & ((iou >= MERGE_IOU) | (ios >= MERGE_IOS))
+
+    return [detections[i] for i in sorted(keep)]
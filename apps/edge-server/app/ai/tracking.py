@@ -0,0 +1,148 @@
+"""
+Person Tracking
+IoU tracker and the shared person tracks computed from the manager's
+shared detections (the TRACKS product)
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.ai.detector import SharedDetector
+from app.ai.products import DETECTIONS
+from config.settings import settings
+
+
+class SimpleTracker:
+    """
+    Simple IoU-based tracker (fallback when ByteTrack not available)
+    """
+    def __init__(self):
+        self.tracks = {}
+        self.missed = {}  # track_id -> consecutive updates without a match
+        self.next_id = 1
+        self.iou_threshold = 0.3
+        self.max_missed = 30
+    
+    def update(self, detections: List[List]) -> List:
+        """Update tracks with new detections"""
+        if not detections:
+            self._age(self.tracks)
+            return []
+        
+        # Match detections to existing tracks
+        matched = set()
+        tracked = []
+        lost = []
+        
+        for track_id, track_bbox in self.tracks.items():
+            best_iou = 0
+            best_idx = -1
+            
+            for idx, det in enumerate(detections):
+                if idx in matched:
+                    continue
+                
+                iou = self._calculate_iou(track_bbox, det[:4])
+                if iou > best_iou and iou > self.iou_threshold:
+                    best_iou = iou
+                    best_idx = idx
+            
+            if best_idx >= 0:
+                # Update track
+                det = detections[best_idx]
+                self.tracks[track_id] = det[:4]
+                self.missed[track_id] = 0
+                tracked.append([*det[:4], det[4] if len(det) > 4 else 0.5, track_id])
+                matched.add(best_idx)
+            else:
+                # Track lost - keep for a few frames
+                lost.append(track_id)
+        
+        self._age(lost)
+        
+        # Create new tracks for unmatched detections
+        for idx, det in enumerate(detections):
+            if idx not in matched:
+                track_id = self.next_id
+                self.next_id += 1
+                self.tracks[track_id] = det[:4]
+                self.missed[track_id] = 0
+                tracked.append([*det[:4], det[4] if len(det) > 4 else 0.5, track_id])
+        
+        return tracked
+    
+    def _age(self, track_ids) -> None:
+        """Count a missed update, dropping tracks unmatched for more than max_missed updates"""
+        for track_id in list(track_ids):
+            self.missed[track_id] = self.missed.get(track_id, 0) + 1
+            if self.missed[track_id] > self.max_missed:
+                del self.tracks[track_id]
+                del self.missed[track_id]
+    
+    def _calculate_iou(self, box1: List, box2: List) -> float:
+        """Calculate IoU between two boxes"""
+        x1_1, y1_1, x2_1, y2_1 = box1
+        x1_2, y1_2, x2_2, y2_2 = box2
+        
+        # Calculate intersection
+        x1_i = max(x1_1, x1_2)
+        y1_i = max(y1_1, y1_2)
+        x2_i = min(x2_1, x2_2)
+        y2_i = min(y2_1, y2_2)
+        
+        if x2_i < x1_i or y2_i < y1_i:
+            return 0.0
+        
+        intersection = (x2_i - x1_i) * (y2_i - y1_i)
+        area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
+        area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
+        union = area1 + area2 - intersection
+        
+        return intersection / union if union > 0 else 0.0
+
+
+class PersonTracks:
+    """
+    Provider of the TRACKS product: one IoU tracker per camera, fed with
+    the person detections of the shared pass, so modules needing tracks
+    share one tracker instead of each detecting and tracking people
+    """
+
+    requires = (DETECTIONS,)
+
+    def __init__(self):
+        self._trackers: Dict[str, SimpleTracker] = {}
+
+    def compute(self, frame: np.ndarray, camera_id: str, inputs: Dict[str, Any], consumers: List[Any]) -> Optional[List[Dict]]:
+        shared = inputs[DETECTIONS]
+        detections = None
+        for module in consumers:
+            detections = shared.get(settings.detector_backend_for(module.module_id))
+            if detections is not None:
+                break
+        if detections is None:
+            return None
+
+        conf = min(module.params(camera_id).confidence_threshold for module in consumers)
+        return self.update(camera_id, SharedDetector.filter(detections, [0], conf))
+
+    def update(self, camera_id: str, detections: List[Dict]) -> List[Dict]:
+        """Advance the camera's tracker with person detections"""
+        tracker = self._trackers.setdefault(camera_id, SimpleTracker())
+        rows = tracker.update([
+            [x, y, x + w, y + h, det['confidence']]
+            for det in detections
+            for x, y, w, h in [det['bbox']]
+        ])
+        return [
+            {
+                'track_id': int(track_id),
+                'bbox': [int(x1), int(y1), int(x2 - x1), int(y2 - y1)],
+                'center': (int((x1 + x2) / 2), int((y1 + y2) / 2)),
+                'confidence': float(confidence),
+            }
+            for x1, y1, x2, y2, confidence, track_id in rows
+        ]
+
+    def remove_camera(self, camera_id: str):
+        self._trackers.pop(camera_id, None)
@@ -0,0 +1,136 @@
+"""
+Inference Watchdog
+Per-module latency budgets: a module call that overruns its deadline has
+its result dropped, the module is demoted to a lower rate on that camera
+for a while and the overrun is reported, so one slow module does not
+hold up the other modules and cameras
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+
+
+class DeadlineExceeded(TimeoutError):
+    """A module call overran its latency budget"""
+
+
+@dataclass
+class DeadlineStats:
+    """Overrun history of one module"""
+    calls: int = 0
+    overruns: int = 0
+    last_overrun_ms: float = 0.0
+    last_overrun_camera: Optional[str] = None
+
+
+class ModuleWatchdog:
+    """
+    Runs module calls on a watchdog thread pool and waits at most the
+    module's deadline for them
+
+    Threads cannot be interrupted, so an overrunning call keeps running in
+    the background. Until it returns, the module and every module sharing
+    one of its models are reported as stalled and skipped on all cameras,
+    since the models cannot be entered from two threads; the rate demotion
+    only applies to the camera that overran.
+    Deadlines resolve from settings.MODULE_DEADLINES_MS, the module's
+    deadline_ms, then settings.MODULE_DEADLINE_MS (0 disables).
+    """
+
+    def __init__(self, frame_scheduler, workers: int = 4):
+        self.frame_scheduler = frame_scheduler
+        self._executor = ThreadPoolExecutor(max_workers=max(2, workers), thread_name_prefix="ai-watchdog")
+        # module_id -> (camera_id, model keys, overrunning call still in flight)
+        self._stalled: Dict[str, Tuple[str, FrozenSet[str], Future]] = {}
+        self._stats: Dict[str, DeadlineStats] = {}
+        self._lock = threading.Lock()
+
+    def deadline_for(self, module) -> Optional[float]:
+        """Deadline of a module in seconds, None when unbounded"""
+        deadline_ms = settings.MODULE_DEADLINES_MS.get(module.module_id)
+        if deadline_ms is None:
+            deadline_ms = module.deadline_ms if module.deadline_ms is not None else settings.MODULE_DEADLINE_MS
+        return deadline_ms / 1000.0 if deadline_ms else None
+
+    def _prune(self):
+        """Forget overrunning calls that have returned; caller holds _lock"""
+        for module_id in [m for m, (_, _, future) in self._stalled.items() if future.done()]:
+            del self._stalled[module_id]
+
+    def is_stalled(self, module) -> bool:
+        """Check whether an overrunning call of the module, or of one sharing its models, is still running"""
+        keys = set(module.model_keys)
+        with self._lock:
+            self._prune()
+            return any(
+                module_id == module.module_id or keys & model_keys
+                for module_id, (_, model_keys, _) in self._stalled.items()
+            )
+
+    def stalled_camera(self, module_id: str) -> Optional[str]:
+        """Camera of the module's overrunning call still in flight, None when there is none"""
+        with self._lock:
+            self._prune()
+            entry = self._stalled.get(module_id)
+        return entry[0] if entry else None
+
+    def call(self, module, camera_id: str, func: Callable[..., Any], *args) -> Any:
+        """
+        Run func(*args) within the module's deadline
+        Raises DeadlineExceeded on overrun, or whatever func raised.
+        """
+        stats = self._stats.setdefault(module.module_id, DeadlineStats())
+        stats.calls += 1
+
+        deadline = self.deadline_for(module)
+        if deadline is None:
+            return func(*args)
+
+        started = time.monotonic()
+        future = self._executor.submit(func, *args)
+        try:
+            return future.result(timeout=deadline)
+        except FutureTimeout:
+            pass
+
+        with self._lock:
+            self._stalled[module.module_id] = (camera_id, frozenset(module.model_keys), future)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        stats.overruns += 1
+        stats.last_overrun_ms = round(elapsed_ms, 1)
+        stats.last_overrun_camera = camera_id
+        fps = self._demote(module, camera_id)
+
+        logger.warning(
+            f"Module '{module.module_id}' overran its {deadline * 1000:.0f} ms deadline on camera {camera_id} - "
+            f"result dropped, demoted to {fps:.2f} fps for {settings.WATCHDOG_DEMOTE_SECONDS:.0f}s"
+        )
+        raise DeadlineExceeded(f"deadline of {deadline * 1000:.0f} ms exceeded")
+
+    def _demote(self, module, camera_id: str) -> float:
+        """Lower the module's rate on the camera, compounding while already demoted"""
+        current = self.frame_scheduler.rate_for(camera_id, module) or settings.PROCESSING_FPS
+        fps = max(settings.WATCHDOG_MIN_FPS, current * settings.WATCHDOG_DEMOTE_FACTOR)
+        self.frame_scheduler.demote(camera_id, module.module_id, fps, settings.WATCHDOG_DEMOTE_SECONDS)
+        return fps
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for module_id, entry in self._stats.items():
+            stats[module_id] = {
+                'calls': entry.calls,
+                'overruns': entry.overruns,
+                'last_overrun_ms': entry.last_overrun_ms,
+                'last_overrun_camera': entry.last_overrun_camera,
+                'stalled_camera': self.stalled_camera(module_id),
+            }
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
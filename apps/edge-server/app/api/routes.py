@@ -16,6 +16,9 @@ class CameraConfig(BaseModel):
     name: str
     rtsp_url: str
     enabled_modules: List[str] = []
+    priority: Optional[str] = None  # critical | high | normal | low
+    schedules: Dict[str, List[str]] = {}  # module -> windows, e.g. {"intrusion": ["mon-fri 19:00-07:00"]}
+    module_params: Dict[str, Dict[str, float]] = {}  # module -> parameters, e.g. {"crowd": {"count_threshold": 25}}
 
 
 class AlertCreate(BaseModel):
@@ -37,6 +40,23 @@ class CommandRequest(BaseModel):
     image_reference: Optional[str] = None
 
 
+class CalibrateRequest(BaseModel):
+    apply: Optional[bool] = None  # defaults to CALIBRATION_AUTO_APPLY
+
+
+class SwapModelRequest(BaseModel):
+    model: str  # weight file or .onnx / .xml export
+    target: str = "detector"  # shared detector(s) or a module id, e.g. "fire"
+    backend: Optional[str] = None
+
+
+class QuantizeRequest(BaseModel):
+    weights: Optional[str] = None
+    backend: Optional[str] = None
+    frames: int = 200
+    interval: float = 1.0
+
+
 # ====================================================================
 # INTERNAL-ONLY ENDPOINTS (Local Network Access)
 # ====================================================================
@@ -100,10 +120,19 @@ async def list_cameras(request: Request):
 async def add_camera(camera: CameraConfig, request: Request):
     from main import state
 
-    if len(state.cameras) >= settings.MAX_CAMERAS:
+    if len(state.cameras) >= _camera_limit(len(state.cameras) + 1):
         raise HTTPException(status_code=400, detail="Maximum cameras reached")
 
     state.cameras[camera.id] = camera.dict()
+    if state.camera_service and camera.id in state.camera_service.cameras:
+        state.camera_service.set_priority(camera.id, camera.priority)
+    if state.module_scheduler and camera.schedules:
+        state.module_scheduler.set_camera_schedules(camera.id, camera.schedules)
+    engine = state.inference_workers or state.ai_manager
+    if engine:
+        engine.configure_camera(camera.id, camera.module_params)
+    _update_thread_budget(state)
+    _refit_calibration(state)
     return {"success": True, "camera_id": camera.id}
 
 
@@ -115,9 +144,52 @@ async def remove_camera(camera_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Camera not found")
 
     del state.cameras[camera_id]
+    if state.camera_service:
+        await state.camera_service.remove_camera(camera_id)
+    if state.inference_scheduler:
+        state.inference_scheduler.discard_camera(camera_id)
+    if state.inference_workers:
+        state.inference_workers.release_camera(camera_id)
+    if state.ai_manager:
+        # Between batches, so no batch of this camera is running meanwhile
+        if state.inference_scheduler:
+            await state.inference_scheduler.run_exclusive(state.ai_manager.remove_camera, camera_id)
+        else:
+            state.ai_manager.remove_camera(camera_id)
+    if state.module_scheduler:
+        state.module_scheduler.remove_camera(camera_id)
+    _update_thread_budget(state)
+    _refit_calibration(state)
     return {"success": True}
 
 
+def _update_thread_budget(state):
+    """Capture threads grow with the camera count, shrink the inference pools"""
+    if state.ai_manager:
+        state.ai_manager.set_camera_count(len(state.cameras))
+    if state.inference_workers:
+        state.inference_workers.set_camera_count(len(state.cameras))
+
+
+def _camera_limit(cameras: int) -> int:
+    """Camera limit once this many cameras run; with auto-applied calibration it follows their quality"""
+    if settings.CALIBRATION_AUTO_APPLY:
+        from app.ai.calibration import refit
+
+        recommendation = refit(cameras, apply=False)
+        if recommendation:
+            return recommendation['max_cameras']
+    return settings.MAX_CAMERAS
+
+
+def _refit_calibration(state):
+    """Re-apply the calibration for the new camera count (fps and width shrink as cameras are added)"""
+    if settings.CALIBRATION_AUTO_APPLY:
+        from app.ai.calibration import refit
+
+        refit(len(state.cameras))
+
+
 @router.get("/alerts", dependencies=[Depends(verify_hmac_signature)])
 async def list_alerts(request: Request, limit: int = 50):
     from main import state
@@ -184,6 +256,137 @@ async def list_modules(request: Request):
     return available_modules
 
 
+@router.get("/ai/models", dependencies=[Depends(verify_hmac_signature)])
+async def list_loaded_models(request: Request):
+    """
+    Models loaded in the process-wide registry with their resident memory;
+    with worker processes the models live in the workers, listed per worker
+    """
+    import asyncio
+    from main import state
+    from app.ai.model_registry import model_registry
+
+    if state.inference_workers:
+        workers = await asyncio.to_thread(state.inference_workers.get_worker_stats)
+        return {
+            "workers": [
+                {
+                    "index": worker['index'],
+                    "models": worker.get('loaded_models', []),
+                    "total_memory_bytes": worker.get('total_memory_bytes', 0),
+                }
+                for worker in workers
+            ],
+            "total_memory_bytes": sum(worker.get('total_memory_bytes', 0) for worker in workers),
+        }
+
+    return {
+        "models": model_registry.stats(),
+        "total_memory_bytes": model_registry.total_memory_bytes(),
+    }
+
+
+@router.post("/ai/models/swap", dependencies=[Depends(verify_hmac_signature)])
+async def swap_model(request: SwapModelRequest):
+    """Load, validate and hot-swap a model while the cameras keep running"""
+    import asyncio
+    from main import state
+
+    engine = state.inference_workers or state.ai_manager
+    if engine is None:
+        raise HTTPException(status_code=503, detail="AI services not running")
+
+    result = await asyncio.to_thread(engine.swap_model, request.target, request.model, request.backend)
+    if result.get('status') == 'failed':
+        raise HTTPException(status_code=422, detail=f"Model swap failed: {result.get('error')}")
+    return result
+
+
+@router.get("/ai/stats", dependencies=[Depends(verify_hmac_signature)])
+async def ai_stats(request: Request):
+    """
+    Runtime statistics of the AI inference path
+    With worker processes the per-module stats (module_rates, motion,
+    watchdog...) come from the workers, one entry per worker under each key.
+    """
+    import asyncio
+    from main import state
+    from app.services.pipeline import pipeline_stats
+
+    stats = {
+        "pipeline": pipeline_stats.get_stats(),
+        "governor": state.load_governor.get_stats() if state.load_governor else None,
+        "module_schedules": state.module_scheduler.get_stats() if state.module_scheduler else None,
+        "scheduler": state.inference_scheduler.get_stats() if state.inference_scheduler else None,
+        "workers": state.inference_workers.get_stats() if state.inference_workers else None,
+        "camera_params": (state.inference_workers or state.ai_manager).get_camera_params() if state.ai_manager else None,
+    }
+    if state.inference_workers:
+        workers = await asyncio.to_thread(state.inference_workers.get_worker_stats)
+        for worker in workers:
+            for key, value in worker.get('runtime', {}).items():
+                stats.setdefault(key, []).append({"worker": worker['index'], "stats": value})
+    elif state.ai_manager:
+        stats.update(state.ai_manager.get_runtime_stats())
+    return stats
+
+
+@router.get("/ai/calibration", dependencies=[Depends(verify_hmac_signature)])
+async def get_calibration():
+    """Last host benchmark, recommendation and the limits currently in effect"""
+    from app.ai.calibration import load_calibration
+
+    return {
+        "calibration": load_calibration(),
+        "current": {
+            "processing_fps": settings.PROCESSING_FPS,
+            "max_width": settings.PROCESSING_MAX_WIDTH,
+            "max_cameras": settings.MAX_CAMERAS,
+        },
+    }
+
+
+@router.post("/ai/calibrate", dependencies=[Depends(verify_hmac_signature)])
+async def calibrate_host(request: CalibrateRequest):
+    """Re-run the host benchmark; live inference pauses while it runs"""
+    from main import state
+    from app.ai.calibration import calibrate
+
+    if not state.inference_scheduler:
+        raise HTTPException(status_code=503, detail="AI services not running")
+
+    engine = state.inference_workers or state.ai_manager
+    cameras = len(state.camera_service.cameras) if state.camera_service else 1
+    try:
+        return await state.inference_scheduler.run_exclusive(calibrate, engine, cameras, request.apply)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Calibration failed: {e}")
+
+
+@router.post("/ai/quantize", dependencies=[Depends(verify_hmac_signature)])
+async def quantize_detector(request: QuantizeRequest):
+    """INT8-quantize a detector calibrated on frames from the live cameras"""
+    import asyncio
+    from main import state
+    from app.ai.quantize import quantize_model, sample_camera_frames
+
+    if not state.camera_service:
+        raise HTTPException(status_code=503, detail="Camera service not running")
+
+    frames = await sample_camera_frames(state.camera_service, request.frames, request.interval)
+    if not frames:
+        raise HTTPException(status_code=409, detail="No camera frames available for calibration")
+
+    weights = request.weights or settings.DETECTOR_WEIGHTS
+    backend = request.backend or settings.DETECTOR_BACKEND
+    try:
+        return await asyncio.to_thread(quantize_model, weights, frames, backend)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=f"Quantization toolkit not installed: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quantization failed: {e}")
+
+
 @router.get("/automation", dependencies=[Depends(verify_hmac_signature)])
 async def list_automation(request: Request):
     from main import state
@@ -1,12 +1,15 @@
 import asyncio
+import time
 import cv2
 import numpy as np
-from typing import Dict, Optional, Callable, List, Any
+from typing import Dict, Optional, Callable, List, Any, Set
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 
+from app.services.camera_priority import resolve_priority
+from app.services.pipeline import pipeline_stats
 from config.settings import settings
 
 
@@ -16,11 +19,18 @@ class CameraStream:
     name: str
     rtsp_url: str
     enabled_modules: List[str]
+    priority: str = 'normal'  # see camera_priority.PRIORITY_CLASSES
     capture: Optional[cv2.VideoCapture] = None
     is_active: bool = False
     last_frame: Optional[np.ndarray] = None
     last_frame_time: Optional[datetime] = None
     error_count: int = 0
+    frames: Optional[asyncio.Queue] = None  # preprocessed (frame, captured_at) awaiting inference
+    # Load shedding (LoadGovernor): rate multiplier and width cap for this camera
+    fps_scale: float = 1.0
+    max_width: int = 0
+    # Modules outside their schedule window on this camera (ModuleScheduler)
+    scheduled_off: Set[str] = field(default_factory=set)
 
 
 class CameraService:
@@ -28,14 +38,40 @@ class CameraService:
         self.cameras: Dict[str, CameraStream] = {}
         self.processors: List[Callable] = []
         self._running = False
+        self.paused_modules: Set[str] = set()  # shed by the LoadGovernor on every camera
         self._executor = ThreadPoolExecutor(max_workers=settings.MAX_CAMERAS)
-        self._frame_interval = 1.0 / settings.PROCESSING_FPS
+        self._preprocess_executor = ThreadPoolExecutor(
+            max_workers=settings.PIPELINE_PREPROCESS_THREADS,
+            thread_name_prefix="preprocess"
+        )
+        pipeline_stats.register_queue('frames', self.get_queue_depths)
+
+    @staticmethod
+    def _frame_interval(stream: CameraStream) -> float:
+        # Read on every frame so calibration and load shedding apply at runtime
+        return 1.0 / (settings.PROCESSING_FPS * stream.fps_scale)
+
+    def active_modules(self, stream: CameraStream) -> List[str]:
+        """Modules to run on the camera's frames, without paused or closed ones"""
+        if not self.paused_modules and not stream.scheduled_off:
+            return stream.enabled_modules
+        return [
+            module_id for module_id in stream.enabled_modules
+            if module_id not in self.paused_modules and module_id not in stream.scheduled_off
+        ]
 
     def register_processor(self, processor: Callable):
         """Register async processor function: async def processor(camera_id, frame, enabled_modules)"""
         self.processors.append(processor)
 
-    async def add_camera(self, camera_id: str, name: str, rtsp_url: str, modules: List[str] = None) -> bool:
+    async def add_camera(
+        self,
+        camera_id: str,
+        name: str,
+        rtsp_url: str,
+        modules: List[str] = None,
+        priority: Optional[str] = None
+    ) -> bool:
         if camera_id in self.cameras:
             logger.warning(f"Camera {camera_id} already exists")
             return False
@@ -48,7 +84,8 @@ class CameraService:
             id=camera_id,
             name=name,
             rtsp_url=rtsp_url,
-            enabled_modules=modules or []
+            enabled_modules=modules or [],
+            priority=resolve_priority(camera_id, priority, modules or [])
         )
 
         self.cameras[camera_id] = stream
@@ -59,12 +96,27 @@ class CameraService:
 
         return True
 
+    def set_priority(self, camera_id: str, priority: Optional[str]) -> bool:
+        """Apply a priority from the camera config (local CAMERA_PRIORITIES still wins)"""
+        stream = self.cameras.get(camera_id)
+        if not stream:
+            return False
+        resolved = resolve_priority(camera_id, priority, stream.enabled_modules)
+        if resolved != stream.priority:
+            logger.info(f"Camera {stream.name} priority: {stream.priority} -> {resolved}")
+            stream.priority = resolved
+        return True
+
     async def remove_camera(self, camera_id: str) -> bool:
         if camera_id not in self.cameras:
             return False
 
         stream = self.cameras[camera_id]
         stream.is_active = False
+        # Frames already captured must not reach inference any more
+        if stream.frames is not None:
+            while not stream.frames.empty():
+                stream.frames.get_nowait()
 
         if stream.capture:
             stream.capture.release()
@@ -128,15 +180,25 @@ class CameraService:
                 return None
 
             stream.error_count = 0
-            stream.last_frame = frame
-            stream.last_frame_time = datetime.utcnow()
-
             return frame
 
         except Exception as e:
             logger.error(f"Frame read error: {e}")
             return None
 
+    def _preprocess(self, stream: CameraStream, frame: np.ndarray) -> np.ndarray:
+        max_width = min(w for w in (settings.PROCESSING_MAX_WIDTH, stream.max_width, frame.shape[1]) if w)
+        if frame.shape[1] > max_width:
+            scale = max_width / frame.shape[1]
+            frame = cv2.resize(
+                frame,
+                (max_width, int(frame.shape[0] * scale)),
+                interpolation=cv2.INTER_AREA
+            )
+        stream.last_frame = frame
+        stream.last_frame_time = datetime.utcnow()
+        return frame
+
     async def _process_camera(self, camera_id: str):
         stream = self.cameras.get(camera_id)
         if not stream:
@@ -151,42 +213,81 @@ class CameraService:
         if not connected:
             return
 
-        while self._running and stream.is_active:
-            try:
-                frame = await asyncio.get_event_loop().run_in_executor(
-                    self._executor,
-                    self._read_frame,
-                    stream
-                )
-
-                if frame is not None:
-                    for processor in self.processors:
-                        try:
-                            # Processor should be async: async def processor(camera_id, frame, enabled_modules)
-                            if asyncio.iscoroutinefunction(processor):
-                                await processor(camera_id, frame, stream.enabled_modules)
-                            else:
-                                # Sync processor
-                                await asyncio.get_event_loop().run_in_executor(
-                                    self._executor,
-                                    processor,
-                                    camera_id,
-                                    frame,
-                                    stream.enabled_modules
-                                )
-                        except Exception as e:
-                            logger.error(f"Processor error: {e}")
-
-                await asyncio.sleep(self._frame_interval)
-
-            except Exception as e:
-                logger.error(f"Processing error: {e}")
-                await asyncio.sleep(1)
+        # Capture keeps its pace while inference runs; the dispatcher takes
+        # the newest preprocessed frames from a small bounded queue
+        stream.frames = asyncio.Queue(maxsize=settings.PIPELINE_FRAME_QUEUE)
+        dispatcher = asyncio.create_task(self._dispatch_frames(stream))
+        loop = asyncio.get_running_loop()
+
+        try:
+            while self._running and stream.is_active:
+                try:
+                    started = time.monotonic()
+                    frame = await loop.run_in_executor(self._executor, self._read_frame, stream)
+
+                    if frame is not None:
+                        pipeline_stats.record('capture', started)
+                        preprocessed = time.monotonic()
+                        frame = await loop.run_in_executor(self._preprocess_executor, self._preprocess, stream, frame)
+                        pipeline_stats.record('preprocess', preprocessed)
+
+                        if stream.frames.full():
+                            # Inference is behind: the oldest frame is stale, drop it
+                            stream.frames.get_nowait()
+                            pipeline_stats.drop('inference')
+                        stream.frames.put_nowait((frame, started))
+
+                    await asyncio.sleep(max(0.0, self._frame_interval(stream) - (time.monotonic() - started)))
+
+                except Exception as e:
+                    logger.error(f"Processing error: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            dispatcher.cancel()
 
         if stream.capture:
             stream.capture.release()
             stream.capture = None
 
+    async def _dispatch_frames(self, stream: CameraStream):
+        """Inference and emit stages of one camera: hand frames to the processors"""
+        loop = asyncio.get_running_loop()
+        while True:
+            frame, captured_at = await stream.frames.get()
+            if not stream.is_active:
+                break
+            modules = self.active_modules(stream)
+            if stream.enabled_modules and not modules:
+                # Every module is paused or outside its window: nothing to infer, but
+                # the frame's lag still counts so the LoadGovernor can see load drop
+                pipeline_stats.record('total', captured_at)
+                continue
+            for processor in self.processors:
+                try:
+                    # Processor should be async: async def processor(camera_id, frame, enabled_modules)
+                    if asyncio.iscoroutinefunction(processor):
+                        await processor(stream.id, frame, modules)
+                    else:
+                        # Sync processor
+                        await loop.run_in_executor(
+                            self._executor,
+                            processor,
+                            stream.id,
+                            frame,
+                            modules
+                        )
+                except Exception as e:
+                    logger.error(f"Processor error: {e}")
+            pipeline_stats.record('total', captured_at)
+
+    def get_queue_depths(self) -> Dict[str, int]:
+        """Frames waiting for inference per camera"""
+        return {
+            camera_id: stream.frames.qsize()
+            for camera_id, stream in self.cameras.items()
+            if stream.frames is not None
+        }
+
     def get_camera_status(self, camera_id: str) -> Optional[Dict]:
         stream = self.cameras.get(camera_id)
         if not stream:
@@ -196,8 +297,12 @@ class CameraService:
             "id": stream.id,
             "name": stream.name,
             "is_active": stream.is_active,
+            "priority": stream.priority,
             "last_frame_time": stream.last_frame_time.isoformat() if stream.last_frame_time else None,
-            "error_count": stream.error_count
+            "error_count": stream.error_count,
+            "fps_scale": stream.fps_scale,
+            "max_width": stream.max_width or None,
+            "scheduled_off": sorted(stream.scheduled_off),
         }
 
     def get_all_status(self) -> List[Dict]:
@@ -0,0 +1,40 @@
+"""
+Camera Priority Classes
+Order in which cameras are served by the inference scheduler and spared
+by the load governor
+"""
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+# Served in this order; critical frames also skip the batch window
+PRIORITY_CLASSES = ('critical', 'high', 'normal', 'low')
+DEFAULT_PRIORITY = 'normal'
+
+
+def priority_rank(priority: str) -> int:
+    """0 for the most urgent class"""
+    try:
+        return PRIORITY_CLASSES.index(priority)
+    except ValueError:
+        return PRIORITY_CLASSES.index(DEFAULT_PRIORITY)
+
+
+def resolve_priority(camera_id: str, configured: Optional[str] = None, modules: Iterable[str] = ()) -> str:
+    """
+    Priority class of a camera
+    settings.CAMERA_PRIORITIES wins over the cloud / API camera config;
+    without either, cameras running a critical module are 'high'.
+    """
+    for priority in (settings.CAMERA_PRIORITIES.get(camera_id), configured):
+        if not priority:
+            continue
+        if priority in PRIORITY_CLASSES:
+            return priority
+        logger.warning(f"Unknown priority '{priority}' for camera {camera_id} - expected one of {PRIORITY_CLASSES}")
+
+    if any(module_id in settings.CRITICAL_MODULES for module_id in modules):
+        return 'high'
+    return DEFAULT_PRIORITY
@@ -0,0 +1,260 @@
+"""
+Inference Scheduler
+Collects frames from every camera into micro-batches, filled by camera
+priority class, and runs them on a single inference thread so batched
+detector calls, calibration and model changes never overlap
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from app.services.camera_priority import DEFAULT_PRIORITY, PRIORITY_CLASSES, priority_rank
+from app.services.pipeline import pipeline_stats
+from config.settings import settings
+
+LATENCY_WINDOW = 100
+
+
+@dataclass
+class InferenceRequest:
+    camera_id: str
+    frame: np.ndarray
+    enabled_modules: List[str]
+    metadata: Optional[Dict]
+    future: asyncio.Future
+    priority: str = DEFAULT_PRIORITY
+    submitted_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def rank(self) -> int:
+        return priority_rank(self.priority)
+
+
+class InferenceScheduler:
+    """
+    Cross-camera micro-batching
+    Collects frames from all cameras for up to INFERENCE_BATCH_WINDOW_MS
+    (or INFERENCE_BATCH_SIZE frames), runs them through one batched
+    detector call and scatters the results back per camera.
+
+    Batches are filled by camera priority class, oldest first within a
+    class. A critical frame closes the window at once, critical and high
+    frames are never held back by the queue bound, and a frame waiting
+    longer than PRIORITY_MAX_WAIT_MS goes ahead of every class so lower
+    classes cannot starve.
+    """
+
+    def __init__(self, ai_manager, max_batch: Optional[int] = None, window_ms: Optional[int] = None):
+        self.ai_manager = ai_manager
+        self.max_batch = max(1, max_batch or settings.INFERENCE_BATCH_SIZE)
+        self.window = (window_ms if window_ms is not None else settings.INFERENCE_BATCH_WINDOW_MS) / 1000.0
+        self.max_wait = settings.PRIORITY_MAX_WAIT_MS / 1000.0
+        self._pending: List[InferenceRequest] = []
+        self._arrived: Optional[asyncio.Event] = None
+        self._room: Optional[asyncio.Condition] = None
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+        self.batches = 0
+        self.frames = 0
+        self.starved = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        self._latency: Dict[str, Deque[float]] = {
+            priority: deque(maxlen=LATENCY_WINDOW) for priority in PRIORITY_CLASSES
+        }
+
+    async def start(self):
+        if self._running:
+            return
+        self._arrived = asyncio.Event()
+        self._room = asyncio.Condition()
+        pipeline_stats.register_queue('inference', lambda: len(self._pending))
+        self._running = True
+        self._task = asyncio.create_task(self.run())
+        logger.info(f"Inference scheduler started (batch {self.max_batch}, window {self.window * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Fail any frames still waiting so camera loops do not hang
+        for request in self._pending:
+            if not request.future.done():
+                request.future.cancel()
+        self._pending.clear()
+
+        self._executor.shutdown(wait=False)
+        logger.info("Inference scheduler stopped")
+
+    async def submit(
+        self,
+        camera_id: str,
+        frame: np.ndarray,
+        enabled_modules: List[str],
+        metadata: Optional[Dict] = None,
+        priority: str = DEFAULT_PRIORITY
+    ) -> Dict[str, Any]:
+        """Queue a frame for the next batch and wait for its results"""
+        if not self._running:
+            # Never run inference on the event loop thread
+            return await asyncio.to_thread(
+                self.ai_manager.process_frame,
+                frame=frame,
+                camera_id=camera_id,
+                enabled_modules=enabled_modules,
+                metadata=metadata
+            )
+
+        request = InferenceRequest(
+            camera_id, frame, enabled_modules, metadata,
+            asyncio.get_running_loop().create_future(),
+            priority if priority in PRIORITY_CLASSES else DEFAULT_PRIORITY
+        )
+        if request.rank > priority_rank('high'):
+            # Bounded for the lower classes: when batches fall behind their
+            # dispatchers wait here and capture drops stale frames instead
+            async with self._room:
+                await self._room.wait_for(lambda: len(self._pending) < settings.PIPELINE_INFERENCE_QUEUE)
+            request.submitted_at = time.monotonic()
+
+        self._pending.append(request)
+        self._arrived.set()
+        return await request.future
+
+    def discard_camera(self, camera_id: str) -> int:
+        """Drop the queued frames of a removed camera, returns how many"""
+        kept = []
+        for request in self._pending:
+            if request.camera_id != camera_id:
+                kept.append(request)
+            elif not request.future.done():
+                request.future.cancel()
+        dropped = len(self._pending) - len(kept)
+        self._pending[:] = kept
+        if not self._pending and self._arrived is not None:
+            self._arrived.clear()
+        return dropped
+
+    def _starved(self, request: InferenceRequest, now: float) -> bool:
+        return now - request.submitted_at >= self.max_wait
+
+    def _urgent(self) -> bool:
+        """A pending frame must not wait for the batch window"""
+        now = time.monotonic()
+        return any(request.rank == 0 or self._starved(request, now) for request in self._pending)
+
+    def _take_batch(self) -> List[InferenceRequest]:
+        """Remove the next batch: starved frames, then by class, oldest first"""
+        now = time.monotonic()
+        self._pending.sort(key=lambda request: (
+            -1 if self._starved(request, now) else request.rank,
+            request.submitted_at
+        ))
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        self.starved += sum(1 for request in batch if self._starved(request, now))
+        return batch
+
+    async def run(self):
+        while self._running:
+            await self._arrived.wait()
+            if not self._pending:
+                # Woken for frames that were discarded meanwhile
+                self._arrived.clear()
+                continue
+            deadline = min(request.submitted_at for request in self._pending) + self.window
+
+            while len(self._pending) < self.max_batch and not self._urgent():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._arrived.clear()
+                try:
+                    await asyncio.wait_for(self._arrived.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._take_batch()
+            if not self._pending:
+                self._arrived.clear()
+            async with self._room:
+                self._room.notify_all()
+
+            if batch:
+                await self._run_batch(batch)
+
+    async def _run_batch(self, batch: List[InferenceRequest]):
+        requests = [
+            {
+                'frame': request.frame,
+                'camera_id': request.camera_id,
+                'enabled_modules': request.enabled_modules,
+                'metadata': request.metadata,
+            }
+            for request in batch
+        ]
+
+        started = time.monotonic()
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                self.ai_manager.process_batch,
+                requests
+            )
+        except Exception as e:
+            logger.error(f"Batched inference error: {e}")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.frames += len(batch)
+        self.last_batch_size = len(batch)
+        self.last_batch_ms = (time.monotonic() - started) * 1000
+
+        for request, result in zip(batch, results):
+            # Queue wait plus batch time
+            pipeline_stats.record('inference', request.submitted_at)
+            self._latency[request.priority].append((time.monotonic() - request.submitted_at) * 1000)
+            if not request.future.done():
+                request.future.set_result(result)
+
+    async def run_exclusive(self, func: Callable, *args) -> Any:
+        """Run func on the inference thread, between batches (e.g. calibration)"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._running,
+            "max_batch": self.max_batch,
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch_size": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_ms, 1),
+            "queued": len(self._pending),
+            "queued_by_priority": {
+                priority: sum(1 for request in self._pending if request.priority == priority)
+                for priority in PRIORITY_CLASSES
+            },
+            "latency_ms_by_priority": {
+                priority: round(sum(latencies) / len(latencies), 1) if latencies else None
+                for priority, latencies in self._latency.items()
+            },
+            "starved": self.starved,
+        }
@@ -0,0 +1,616 @@
+"""
+Inference Worker Pool
+Runs AI modules in separate processes so inference uses every core
+
+Each worker process owns its own AIModuleManager and models. Frames are
+handed over through multiprocessing.shared_memory (one slot per camera)
+and only small control messages and results travel over the pipes.
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+
+
+def _empty_result(error: str) -> Dict[str, Any]:
+    return {'detections': [], 'events': [], 'alerts': [], 'modules': {}, 'error': error}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a parent-owned segment without taking over its lifetime"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: the segment is also registered with the parent's
+        # resource tracker, which unlinks it when the parent releases it
+        return shared_memory.SharedMemory(name=name)
+
+
+def _load(index: int, manager, module_ids: List[str], warmup: bool):
+    """Enable and/or warm up modules, the slow steps the parent waits for with its start timeout"""
+    try:
+        if module_ids:
+            manager.enable_modules(module_ids)
+        if warmup:
+            manager.warmup()
+    except Exception as e:
+        logger.error(f"Inference worker {index} failed to load modules: {e}")
+
+
+def _worker_main(index: int, conn, enabled_modules: List[str]):
+    """Worker process loop: receive batches, run the manager, send results"""
+    from app.ai.manager import AIModuleManager
+    from app.ai.model_registry import model_registry
+
+    manager = AIModuleManager()
+    if enabled_modules:
+        _load(index, manager, enabled_modules, settings.WARMUP_ENABLED)
+    # Model loading is done: from here on replies are bound by INFERENCE_WORKER_TIMEOUT
+    conn.send(('ready', None))
+
+    segments: Dict[str, shared_memory.SharedMemory] = {}
+    metadata_cache: Dict[str, Dict] = {}
+
+    try:
+        while True:
+            try:
+                command, payload = conn.recv()
+            except EOFError:
+                break
+
+            if command == 'stop':
+                break
+            if command == 'enable':
+                _load(index, manager, payload, False)
+                conn.send(('ready', None))
+                continue
+            if command == 'warmup':
+                # Between batches, like every command of this loop
+                _load(index, manager, [], True)
+                conn.send(('ready', None))
+                continue
+            if command == 'disable':
+                manager.disable_modules(payload)
+                continue
+            if command == 'configure':
+                manager.configure_camera(*payload)
+                continue
+            if command == 'remove_camera':
+                manager.remove_camera(payload)
+                metadata_cache.pop(payload, None)
+                continue
+            if command == 'unload':
+                manager.unload_modules(payload)
+                continue
+            if command == 'cameras':
+                manager.set_camera_count(payload)
+                continue
+            if command == 'swap':
+                # Loads beside the running model while this loop keeps serving batches
+                threading.Thread(
+                    target=manager.swap_model, args=payload, name=f"model-swap-{index}", daemon=True
+                ).start()
+                continue
+            if command == 'benchmark':
+                try:
+                    conn.send(('ok', manager.benchmark(*payload)))
+                except Exception as e:
+                    logger.error(f"Inference worker {index} benchmark error: {e}")
+                    conn.send(('error', str(e)))
+                continue
+            if command == 'stats':
+                try:
+                    conn.send(('ok', {
+                        'runtime': manager.get_runtime_stats(),
+                        'loaded_models': model_registry.stats(),
+                        'total_memory_bytes': model_registry.total_memory_bytes(),
+                    }))
+                except Exception as e:
+                    logger.error(f"Inference worker {index} stats error: {e}")
+                    conn.send(('error', str(e)))
+                continue
+            if command == 'release':
+                segment = segments.pop(payload, None)
+                if segment:
+                    segment.close()
+                continue
+            if command != 'batch':
+                continue
+
+            try:
+                requests = []
+                for item in payload:
+                    segment = segments.get(item['shm'])
+                    if segment is None:
+                        segment = segments[item['shm']] = _attach(item['shm'])
+
+                    # Metadata values only travel when the parent's copy changed
+                    cached = metadata_cache.setdefault(item['camera_id'], {})
+                    for key in item['metadata_removed']:
+                        cached.pop(key, None)
+                    cached.update(item['metadata'])
+
+                    requests.append({
+                        'frame': np.ndarray(item['shape'], dtype=item['dtype'], buffer=segment.buf),
+                        'camera_id': item['camera_id'],
+                        'enabled_modules': item['enabled_modules'],
+                        'metadata': dict(cached),
+                    })
+
+                results = manager.process_batch(requests)
+                # Drop frame views before the next batch may resize a slot
+                del requests
+                conn.send(('ok', results))
+            except Exception as e:
+                logger.error(f"Inference worker {index} error: {e}")
+                conn.send(('error', str(e)))
+    finally:
+        manager.cleanup()
+        for segment in segments.values():
+            segment.close()
+        conn.close()
+
+
+class _FrameSlot:
+    """Parent-owned shared-memory buffer holding the latest frame of one camera"""
+
+    def __init__(self, nbytes: int):
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+
+    def write(self, frame: np.ndarray):
+        view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self.shm.buf)
+        view[...] = frame
+        del view
+
+    def close(self):
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class InferenceWorker:
+    """Handle of one worker process: its pipe, frame slots and sent metadata"""
+
+    def __init__(self, index: int, context):
+        self.index = index
+        self._context = context
+        self.process = None
+        self.conn = None
+        self.slots: Dict[str, _FrameSlot] = {}
+        self.sent_metadata: Dict[str, Dict[str, Any]] = {}
+        self.cameras: set = set()
+        self.frames = 0
+        self.busy_seconds = 0.0
+        self.restarts = 0
+
+    def start(self, enabled_modules: List[str]):
+        parent_conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(
+            target=_worker_main,
+            args=(self.index, child_conn, list(enabled_modules)),
+            name=f"inference-worker-{self.index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        # A fresh process has no cached metadata
+        self.sent_metadata.clear()
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def slot_for(self, camera_id: str, frame: np.ndarray) -> _FrameSlot:
+        slot = self.slots.get(camera_id)
+        if slot is None or slot.shm.size < frame.nbytes:
+            if slot is not None:
+                self.send('release', slot.shm.name)
+                slot.close()
+            slot = self.slots[camera_id] = _FrameSlot(frame.nbytes)
+        return slot
+
+    def metadata_delta(self, camera_id: str, metadata: Optional[Dict]) -> Tuple[Dict[str, Any], List[str]]:
+        """Metadata entries whose object changed since they were last sent, and keys no longer sent"""
+        metadata = metadata or {}
+        sent = self.sent_metadata.setdefault(camera_id, {})
+        delta = {
+            key: value for key, value in metadata.items()
+            if key not in sent or sent[key] is not value
+        }
+        removed = [key for key in sent if key not in metadata]
+        for key in removed:
+            del sent[key]
+        sent.update(delta)
+        return delta, removed
+
+    def send(self, command: str, payload: Any = None):
+        self.conn.send((command, payload))
+
+    def stop(self, timeout: float = 5.0):
+        if self.conn is not None:
+            try:
+                self.send('stop')
+            except (BrokenPipeError, OSError):
+                pass
+        if self.process is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1)
+        if self.conn is not None:
+            self.conn.close()
+        self.process = None
+        self.conn = None
+        for slot in self.slots.values():
+            slot.close()
+        self.slots.clear()
+
+
+class InferenceWorkerPool:
+    """
+    Pool of inference worker processes
+    Exposes the same process_frame / process_batch / enable_modules
+    interface as AIModuleManager so the scheduler can use either.
+
+    Cameras are pinned to one worker because modules keep per-camera
+    state (trackers, counters, dwell timers).
+    """
+
+    def __init__(self, num_workers: Optional[int] = None):
+        self.num_workers = max(1, num_workers or settings.INFERENCE_WORKERS)
+        self._context = multiprocessing.get_context('spawn')
+        self.workers = [InferenceWorker(index, self._context) for index in range(self.num_workers)]
+        self._assignments: Dict[str, InferenceWorker] = {}
+        self._enabled: List[str] = []
+        self._cameras = 0  # host camera count, for the workers' thread budget
+        self._swaps: Dict[tuple, tuple] = {}  # (target, backend) -> swap args, replayed on restart
+        self._camera_params: Dict[str, Dict] = {}  # camera_id -> module params, replayed on restart
+        # _lock guards the bookkeeping above and is only held briefly; _io_lock
+        # is held for a whole pipe round-trip, so control calls never take it
+        # blocking and are applied between batches instead
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._pending: Deque[Callable[[], None]] = deque()
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        with self._io_lock:
+            for worker in self.workers:
+                self._start_worker(worker)
+            self._running = True
+        logger.info(f"Started {self.num_workers} inference worker processes")
+
+    def stop(self):
+        with self._io_lock:
+            with self._lock:
+                self._pending.clear()
+                self._assignments.clear()
+                self._running = False
+            for worker in self.workers:
+                worker.stop()
+        logger.info("Inference workers stopped")
+
+    def _control(self, action: Callable[[], None]):
+        """Run a control action on the workers now if the pipes are idle, else before the next batch"""
+        with self._lock:
+            self._pending.append(action)
+        self._drain()
+
+    def _drain(self):
+        # Re-checked after every release so an action queued meanwhile is not left behind
+        while self._pending and self._io_lock.acquire(blocking=False):
+            try:
+                self._apply_pending()
+            finally:
+                self._io_lock.release()
+
+    def _apply_pending(self):
+        """Send the queued control actions; caller holds _io_lock"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                action = self._pending.popleft()
+            try:
+                action()
+            except (BrokenPipeError, OSError) as e:
+                logger.warning(f"Inference worker control message failed: {e}")
+
+    def enable_modules(self, module_ids: List[str]):
+        with self._lock:
+            for module_id in module_ids:
+                if module_id not in self._enabled:
+                    self._enabled.append(module_id)
+        self._broadcast('enable', list(module_ids), ready=True)
+
+    def warmup(self) -> Dict[str, Any]:
+        """Warm up newly enabled modules in every worker, between their batches"""
+        self._broadcast('warmup', None, ready=True)
+        return {'status': 'scheduled', 'workers': sum(1 for worker in self.workers if worker.is_alive())}
+
+    def disable_modules(self, module_ids: List[str]):
+        with self._lock:
+            self._enabled = [m for m in self._enabled if m not in module_ids]
+        self._broadcast('disable', list(module_ids))
+
+    def unload_modules(self, module_ids: List[str]) -> List[str]:
+        """Release the models of enabled modules in every worker, returns their ids"""
+        with self._lock:
+            unloaded = [module_id for module_id in module_ids if module_id in self._enabled]
+            # Restarted workers must not load them either
+            self._enabled = [m for m in self._enabled if m not in unloaded]
+        if unloaded:
+            self._broadcast('unload', unloaded)
+        return unloaded
+
+    def configure_camera(self, camera_id: str, module_params: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Resolve a camera's module parameters in every worker (see AIModuleManager.configure_camera)"""
+        module_params = module_params or {}
+        with self._lock:
+            if self._camera_params.get(camera_id) == module_params:
+                return
+            self._camera_params[camera_id] = module_params
+        self._broadcast('configure', (camera_id, module_params))
+
+    def get_camera_params(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Camera config parameters sent to the workers (settings overrides apply on top)"""
+        with self._lock:
+            return {camera_id: params for camera_id, params in self._camera_params.items() if params}
+
+    def release_camera(self, camera_id: str):
+        """Free the frame slot and module state of a removed camera"""
+        with self._lock:
+            self._camera_params.pop(camera_id, None)
+
+        def release():
+            with self._lock:
+                worker = self._assignments.pop(camera_id, None)
+                if worker is None:
+                    return
+                worker.cameras.discard(camera_id)
+            worker.sent_metadata.pop(camera_id, None)
+            slot = worker.slots.pop(camera_id, None)
+            if worker.is_alive():
+                worker.send('remove_camera', camera_id)
+                if slot is not None:
+                    worker.send('release', slot.shm.name)
+            if slot is not None:
+                slot.close()
+
+        self._control(release)
+
+    def set_camera_count(self, cameras: int):
+        with self._lock:
+            self._cameras = cameras
+        self._broadcast('cameras', cameras)
+
+    def swap_model(self, target: str, model: str, backend: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Hot-swap a model in every worker
+        Each worker loads and validates it on a background thread and keeps
+        serving batches meanwhile; failures are logged by the worker.
+        """
+        with self._lock:
+            self._swaps[(target, backend)] = (target, model, backend)
+        self._broadcast('swap', (target, model, backend))
+        return {
+            'target': target,
+            'model': model,
+            'backend': backend,
+            'status': 'scheduled',
+            'workers': sum(1 for worker in self.workers if worker.is_alive()),
+        }
+
+    def benchmark(self, widths: Iterable[int], runs: Optional[int] = None) -> Dict[str, Any]:
+        """Benchmark the modules inside one worker, between batches (blocks; run off the event loop)"""
+        with self._io_lock:
+            self._apply_pending()
+            worker = self.workers[0]
+            if not worker.is_alive():
+                raise RuntimeError("Inference worker 0 not running")
+            worker.send('benchmark', (list(widths), runs))
+            try:
+                status, payload = self._receive(worker, settings.INFERENCE_WORKER_BENCHMARK_TIMEOUT)
+            except (EOFError, OSError, TimeoutError) as e:
+                self._restart(worker, e)
+                raise RuntimeError(f"Inference worker 0 benchmark failed: {e}")
+        if status != 'ok':
+            raise RuntimeError(payload)
+        return payload
+
+    def get_worker_stats(self) -> List[Dict[str, Any]]:
+        """
+        Runtime stats and loaded models of every worker, collected between
+        batches (blocks; run off the event loop)
+        """
+        stats = []
+        with self._io_lock:
+            self._apply_pending()
+            for worker in self.workers:
+                entry: Dict[str, Any] = {'index': worker.index, 'alive': worker.is_alive()}
+                if worker.is_alive():
+                    try:
+                        worker.send('stats')
+                        status, payload = self._receive(worker, settings.INFERENCE_WORKER_TIMEOUT)
+                    except (BrokenPipeError, EOFError, OSError, TimeoutError) as e:
+                        self._restart(worker, e)
+                        status, payload = 'error', str(e)
+                    if status == 'ok':
+                        entry.update(payload)
+                    else:
+                        entry['error'] = payload
+                stats.append(entry)
+        return stats
+
+    @staticmethod
+    def _receive(worker: InferenceWorker, timeout: float) -> tuple:
+        """Next reply of a worker; TimeoutError when it does not answer in time"""
+        if not worker.conn.poll(timeout):
+            raise TimeoutError(f"no reply within {timeout:g} s")
+        return worker.conn.recv()
+
+    def _broadcast(self, command: str, payload: Any, ready: bool = False):
+        """Send a command to every worker; with ready, wait until each reports it done (model loads)"""
+        def send():
+            sent = [worker for worker in self.workers if worker.is_alive()]
+            for worker in sent:
+                worker.send(command, payload)
+            if ready:
+                for worker in sent:
+                    self._await_ready(worker)
+
+        self._control(send)
+
+    def _worker_for(self, camera_id: str) -> InferenceWorker:
+        with self._lock:
+            worker = self._assignments.get(camera_id)
+            if worker is None:
+                worker = min(self.workers, key=lambda w: len(w.cameras))
+                worker.cameras.add(camera_id)
+                self._assignments[camera_id] = worker
+            return worker
+
+    def process_frame(
+        self,
+        frame: np.ndarray,
+        camera_id: str,
+        enabled_modules: List[str],
+        metadata: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        return self.process_batch([{
+            'frame': frame,
+            'camera_id': camera_id,
+            'enabled_modules': enabled_modules,
+            'metadata': metadata,
+        }])[0]
+
+    def process_batch(self, requests: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Split a batch by worker, run the parts in parallel and
+        return one result per request in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+
+        with self._io_lock:
+            if not self._running:
+                return [_empty_result("Inference workers not running") for _ in requests]
+
+            # Control messages queued since the last batch go first
+            self._apply_pending()
+
+            parts: Dict[int, List[int]] = {}
+            for position, request in enumerate(requests):
+                parts.setdefault(self._worker_for(request['camera_id']).index, []).append(position)
+
+            dispatched = []
+            for index, positions in parts.items():
+                worker = self.workers[index]
+                payload = []
+                for position in positions:
+                    request = requests[position]
+                    frame = np.ascontiguousarray(request['frame'])
+                    slot = worker.slot_for(request['camera_id'], frame)
+                    slot.write(frame)
+                    metadata, removed = worker.metadata_delta(request['camera_id'], request.get('metadata'))
+                    payload.append({
+                        'shm': slot.shm.name,
+                        'shape': frame.shape,
+                        'dtype': frame.dtype.str,
+                        'camera_id': request['camera_id'],
+                        'enabled_modules': request['enabled_modules'],
+                        'metadata': metadata,
+                        'metadata_removed': removed,
+                    })
+                try:
+                    worker.send('batch', payload)
+                    dispatched.append((worker, positions, time.monotonic()))
+                except (BrokenPipeError, OSError) as e:
+                    self._restart(worker, e)
+                    for position in positions:
+                        results[position] = _empty_result(f"Worker {index} unavailable")
+
+            for worker, positions, started in dispatched:
+                try:
+                    status, payload = self._receive(worker, settings.INFERENCE_WORKER_TIMEOUT)
+                except (EOFError, OSError, TimeoutError) as e:
+                    # A hung worker is replaced; its late reply dies with the old pipe
+                    self._restart(worker, e)
+                    status, payload = 'error', f"Worker {worker.index} failed: {e}"
+
+                worker.busy_seconds += time.monotonic() - started
+                if status == 'ok':
+                    worker.frames += len(positions)
+                    for position, result in zip(positions, payload):
+                        results[position] = result
+                else:
+                    for position in positions:
+                        results[position] = _empty_result(payload)
+
+        self._drain()
+        return results
+
+    def _restart(self, worker: InferenceWorker, reason: Exception):
+        logger.error(f"Inference worker {worker.index} failed ({reason}) - restarting")
+        worker.stop(timeout=1)
+        worker.restarts += 1
+        self._start_worker(worker)
+
+    def _await_ready(self, worker: InferenceWorker) -> bool:
+        """Wait for a worker's ready reply, restarting it when none comes within INFERENCE_WORKER_START_TIMEOUT"""
+        try:
+            self._receive(worker, settings.INFERENCE_WORKER_START_TIMEOUT)
+            return True
+        except (EOFError, OSError, TimeoutError) as e:
+            self._restart(worker, e)
+            return False
+
+    def _start_worker(self, worker: InferenceWorker):
+        """Start a worker and replay the pool state; caller holds _io_lock"""
+        with self._lock:
+            enabled, cameras = list(self._enabled), self._cameras
+            swaps, camera_params = list(self._swaps.values()), dict(self._camera_params)
+        worker.start(enabled)
+        try:
+            # Loading and warming up the models is not bound by INFERENCE_WORKER_TIMEOUT
+            self._receive(worker, settings.INFERENCE_WORKER_START_TIMEOUT)
+        except (EOFError, OSError, TimeoutError) as e:
+            # Not restarted here: the next batch or command restarts it if it stays unresponsive
+            logger.error(f"Inference worker {worker.index} did not become ready: {e}")
+            return
+        if cameras:
+            worker.send('cameras', cameras)
+        for args in swaps:
+            worker.send('swap', args)
+        for camera_id, module_params in camera_params.items():
+            worker.send('configure', (camera_id, module_params))
+
+    def get_stats(self) -> Dict:
+        return {
+            "running": self._running,
+            "workers": [
+                {
+                    "index": worker.index,
+                    "pid": worker.process.pid if worker.process else None,
+                    "alive": worker.is_alive(),
+                    "cameras": sorted(worker.cameras),
+                    "frames": worker.frames,
+                    "avg_ms": round(worker.busy_seconds * 1000 / worker.frames, 1) if worker.frames else 0.0,
+                    "restarts": worker.restarts,
+                }
+                for worker in self.workers
+            ],
+        }
+
+    def cleanup(self):
+        self.stop()
@@ -0,0 +1,180 @@
+"""
+Load Governor
+Watches end-to-end frame lag and CPU load and sheds work in a fixed
+order when the host saturates, restoring it step by step once load drops:
+1. lower fps on low-priority cameras
+2. lower resolution on low-priority cameras
+3. pause non-critical modules on every camera
+Low priority means the 'normal' and 'low' camera classes; critical
+modules (settings.CRITICAL_MODULES) are never shed.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from loguru import logger
+
+from app.services.camera_priority import priority_rank
+from app.services.pipeline import pipeline_stats
+from config.settings import settings
+
+LEVELS = ('normal', 'reduce_fps', 'reduce_resolution', 'pause_modules')
+LAG_WINDOW = 20  # frames the lag signal averages over
+
+
+def cpu_percent() -> Optional[float]:
+    """Host CPU use in percent, from psutil or the load average"""
+    try:
+        import psutil
+        return psutil.cpu_percent(interval=None)
+    except ImportError:
+        pass
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+    except (AttributeError, OSError):
+        return None
+
+
+class LoadGovernor:
+    """
+    Shedding level controller
+
+    The level rises one step after the host has been overloaded (lag above
+    GOVERNOR_MAX_LAG_MS or CPU above GOVERNOR_MAX_CPU) for
+    GOVERNOR_ESCALATE_SECONDS, and falls one step after it has been below
+    half the lag limit and GOVERNOR_RECOVER_CPU for GOVERNOR_RECOVER_SECONDS.
+    """
+
+    def __init__(self, camera_service):
+        self.camera_service = camera_service
+        self.level = 0
+        self.cpu: Optional[float] = None
+        self.lag_ms = 0.0
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self._overloaded_since: Optional[float] = None
+        self._relaxed_since: Optional[float] = None
+        self._changed_at = time.time()
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    async def start(self):
+        if self._running:
+            return
+        self._running = True
+        cpu_percent()  # psutil measures from the previous call
+        self._task = asyncio.create_task(self.run())
+        logger.info("Load governor started")
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_level(0, 'stopped')
+
+    async def run(self):
+        while self._running:
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Load governor error: {e}")
+            await asyncio.sleep(settings.GOVERNOR_INTERVAL)
+
+    def check(self, now: Optional[float] = None):
+        """Sample the load signals and move the shedding level if due"""
+        now = time.monotonic() if now is None else now
+        self.cpu = cpu_percent()
+        self.lag_ms = pipeline_stats.latency_ms('total', LAG_WINDOW)
+
+        overloaded = self.lag_ms > settings.GOVERNOR_MAX_LAG_MS or (
+            self.cpu is not None and self.cpu > settings.GOVERNOR_MAX_CPU
+        )
+        relaxed = self.lag_ms < settings.GOVERNOR_MAX_LAG_MS / 2 and (
+            self.cpu is None or self.cpu < settings.GOVERNOR_RECOVER_CPU
+        )
+
+        if overloaded:
+            self._relaxed_since = None
+            if self._overloaded_since is None:
+                self._overloaded_since = now
+            if self.level < len(LEVELS) - 1 and now - self._overloaded_since >= settings.GOVERNOR_ESCALATE_SECONDS:
+                self._set_level(self.level + 1, self._reason())
+                self._overloaded_since = now
+        elif relaxed:
+            self._overloaded_since = None
+            if self._relaxed_since is None:
+                self._relaxed_since = now
+            if self.level > 0 and now - self._relaxed_since >= settings.GOVERNOR_RECOVER_SECONDS:
+                self._set_level(self.level - 1, self._reason())
+                self._relaxed_since = now
+        else:
+            self._overloaded_since = None
+            self._relaxed_since = None
+
+        # Cameras added while shedding get the current level too
+        self._apply()
+
+    def _reason(self) -> str:
+        cpu = f"{self.cpu:.0f}%" if self.cpu is not None else "n/a"
+        return f"lag {self.lag_ms:.0f} ms, cpu {cpu}"
+
+    def is_low_priority(self, stream) -> bool:
+        """Cameras below the 'high' class are shed first"""
+        return priority_rank(stream.priority) > priority_rank('high')
+
+    def _set_level(self, level: int, reason: str):
+        if level == self.level:
+            return
+        previous, self.level = self.level, level
+        self._changed_at = time.time()
+        self._apply()
+
+        self.history.append({
+            'at': self._changed_at,
+            'from': LEVELS[previous],
+            'to': LEVELS[level],
+            'reason': reason,
+        })
+        if level > previous:
+            logger.warning(f"Load shedding: {LEVELS[previous]} -> {LEVELS[level]} ({reason})")
+        else:
+            logger.info(f"Load recovering: {LEVELS[previous]} -> {LEVELS[level]} ({reason})")
+
+    def _apply(self):
+        """Set every camera's shedding state to match the level"""
+        for stream in list(self.camera_service.cameras.values()):
+            low = self.is_low_priority(stream)
+            stream.fps_scale = settings.GOVERNOR_FPS_FACTOR if low and self.level >= 1 else 1.0
+            stream.max_width = settings.GOVERNOR_SHED_WIDTH if low and self.level >= 2 else 0
+
+        self.camera_service.paused_modules = self._paused_modules() if self.level >= 3 else set()
+
+    def _paused_modules(self) -> set:
+        enabled = set()
+        for stream in self.camera_service.cameras.values():
+            enabled.update(stream.enabled_modules)
+        return {module_id for module_id in enabled if module_id not in settings.CRITICAL_MODULES}
+
+    def get_stats(self) -> Dict[str, Any]:
+        low_priority: List[str] = [
+            camera_id for camera_id, stream in self.camera_service.cameras.items()
+            if self.is_low_priority(stream)
+        ]
+        return {
+            'enabled': self._running,
+            'level': self.level,
+            'state': LEVELS[self.level],
+            'since': self._changed_at,
+            'lag_ms': round(self.lag_ms, 1),
+            'cpu_percent': round(self.cpu, 1) if self.cpu is not None else None,
+            'low_priority_cameras': low_priority,
+            'paused_modules': sorted(self.camera_service.paused_modules),
+            'critical_modules': list(settings.CRITICAL_MODULES),
+            'history': list(self.history),
+        }
@@ -0,0 +1,276 @@
+"""
+Module Schedules
+Weekly time windows in which a module runs on a camera, e.g. intrusion
+after closing time or attendance around shift changes.
+
+A window is "[days] [HH:MM-HH:MM]": days as "mon-fri", "sat,sun" or
+"daily" (the default), times in the schedule timezone; a window whose
+end is not after its start runs past midnight into the next day.
+Outside its windows a module is skipped on that camera, its models are
+released once no camera needs it and loaded again shortly before the
+next window opens.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Any, Deque, Dict, FrozenSet, List, Optional, Set
+
+from loguru import logger
+
+from config.settings import settings
+
+DAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+ALL_CAMERAS = '*'
+
+
+@dataclass(frozen=True)
+class Window:
+    days: FrozenSet[int]  # weekday of the window start, 0 = Monday
+    start: int  # minutes after midnight
+    end: int  # minutes after midnight, up to 1440
+
+    @property
+    def overnight(self) -> bool:
+        return self.end <= self.start
+
+    def contains(self, now: datetime) -> bool:
+        minute = now.hour * 60 + now.minute + now.second / 60
+        if not self.overnight:
+            return now.weekday() in self.days and self.start <= minute < self.end
+        # Started yesterday and runs until end, or starts today
+        return (now.weekday() in self.days and minute >= self.start) or (
+            (now.weekday() - 1) % 7 in self.days and minute < self.end
+        )
+
+    def seconds_until_open(self, now: datetime) -> float:
+        """0 while the window is open, else seconds until it next opens"""
+        if self.contains(now):
+            return 0.0
+        for offset in range(8):
+            day = now.date() + timedelta(days=offset)
+            opens = datetime(day.year, day.month, day.day, self.start // 60, self.start % 60, tzinfo=now.tzinfo)
+            if opens > now and opens.weekday() in self.days:
+                return opens.timestamp() - now.timestamp()
+        return float('inf')
+
+
+def _parse_days(spec: str) -> FrozenSet[int]:
+    if spec == 'daily':
+        return frozenset(range(7))
+    days: Set[int] = set()
+    for part in spec.split(','):
+        first, _, last = part.partition('-')
+        start = DAYS.index(first[:3])
+        end = DAYS.index(last[:3]) if last else start
+        # "fri-mon" wraps over the weekend
+        days.update(day % 7 for day in range(start, end + 1 if end >= start else end + 8))
+    return frozenset(days)
+
+
+def _parse_minutes(spec: str) -> int:
+    hours, _, minutes = spec.partition(':')
+    value = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(f"time out of range: {spec}")
+    return value
+
+
+@lru_cache(maxsize=256)
+def parse_window(spec: str) -> Window:
+    """Parse "mon-fri 18:00-07:00", "sat,sun" or "08:00-10:00"; raises ValueError"""
+    days, times = frozenset(range(7)), None
+    for part in spec.lower().split():
+        if part[0].isdigit():
+            times = part
+        else:
+            try:
+                days = _parse_days(part)
+            except ValueError:
+                raise ValueError(f"invalid days '{part}' in schedule '{spec}'")
+
+    start, end = 0, 24 * 60
+    if times:
+        first, _, last = times.partition('-')
+        start, end = _parse_minutes(first), _parse_minutes(last)
+        if start == 24 * 60:
+            raise ValueError(f"window cannot start at 24:00 in schedule '{spec}'")
+    return Window(days, start, end)
+
+
+def schedule_timezone() -> Optional[tzinfo]:
+    """settings.SCHEDULE_TIMEZONE, None for the host's local time"""
+    if not settings.SCHEDULE_TIMEZONE:
+        return None
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(settings.SCHEDULE_TIMEZONE)
+    except Exception as e:
+        logger.warning(f"Unknown schedule timezone '{settings.SCHEDULE_TIMEZONE}' ({e}) - using local time")
+        return None
+
+
+class ModuleScheduler:
+    """
+    Turns modules on and off per camera by their schedules
+
+    Schedules come from settings.MODULE_SCHEDULES (per camera, or "*" for
+    every camera), which win over the 'schedules' of the cloud camera
+    config. A module without a schedule on a camera runs there always.
+    Closed modules are left out of the camera's active modules; models
+    are unloaded between batches once no camera needs them within
+    SCHEDULE_PRELOAD_SECONDS and loaded again, also between batches, when one does.
+    """
+
+    def __init__(self, camera_service, inference_engine, inference_scheduler):
+        self.camera_service = camera_service
+        self.inference_engine = inference_engine
+        self.inference_scheduler = inference_scheduler
+        self.timezone = schedule_timezone()
+        self.unloaded: Set[str] = set()  # modules this scheduler released and will reload
+        self._cloud: Dict[str, Dict[str, List[str]]] = {}  # camera_id -> module -> windows
+        self._invalid: Set[str] = set()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    async def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._task = asyncio.create_task(self.run())
+        logger.info(f"Module scheduler started ({settings.SCHEDULE_TIMEZONE or 'local time'})")
+
+    async def stop(self):
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while self._running:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error(f"Module scheduler error: {e}")
+            await asyncio.sleep(settings.SCHEDULE_INTERVAL)
+
+    def set_camera_schedules(self, camera_id: str, schedules: Optional[Dict[str, List[str]]]):
+        """Schedules from the cloud camera config: {module_id: [window, ...]}"""
+        if schedules:
+            self._cloud[camera_id] = {module_id: list(windows) for module_id, windows in schedules.items()}
+        else:
+            self._cloud.pop(camera_id, None)
+
+    def remove_camera(self, camera_id: str):
+        self._cloud.pop(camera_id, None)
+
+    def now(self) -> datetime:
+        return datetime.now(self.timezone) if self.timezone else datetime.now().astimezone()
+
+    def specs_for(self, camera_id: str, module_id: str) -> Optional[List[str]]:
+        """Window specs of a module on a camera, None when it is unscheduled"""
+        for schedules in (
+            settings.MODULE_SCHEDULES.get(camera_id),
+            settings.MODULE_SCHEDULES.get(ALL_CAMERAS),
+            self._cloud.get(camera_id),
+        ):
+            if schedules and module_id in schedules:
+                return schedules[module_id]
+        return None
+
+    def windows_for(self, camera_id: str, module_id: str) -> Optional[List[Window]]:
+        specs = self.specs_for(camera_id, module_id)
+        if specs is None:
+            return None
+        windows = []
+        for spec in specs:
+            try:
+                windows.append(parse_window(spec))
+            except (ValueError, IndexError) as e:
+                if spec not in self._invalid:
+                    self._invalid.add(spec)
+                    logger.warning(f"Ignoring module schedule '{spec}': {e}")
+        # Nothing valid left: run always rather than never
+        return windows or None
+
+    def seconds_until_open(self, camera_id: str, module_id: str, now: datetime) -> float:
+        windows = self.windows_for(camera_id, module_id)
+        if windows is None:
+            return 0.0
+        return min(window.seconds_until_open(now) for window in windows)
+
+    async def check(self, now: Optional[datetime] = None):
+        """Apply the windows to every camera and load or release models as due"""
+        now = now or self.now()
+        needed: Dict[str, bool] = {}  # scheduled module -> open or opening soon on some camera
+
+        for stream in list(self.camera_service.cameras.values()):
+            closed = set()
+            for module_id in stream.enabled_modules:
+                windows = self.windows_for(stream.id, module_id)
+                if windows is None:
+                    needed[module_id] = True
+                    continue
+                wait = min(window.seconds_until_open(now) for window in windows)
+                if wait > 0:
+                    closed.add(module_id)
+                needed[module_id] = needed.get(module_id, False) or wait <= settings.SCHEDULE_PRELOAD_SECONDS
+
+            if closed != stream.scheduled_off:
+                for module_id in sorted(closed ^ stream.scheduled_off):
+                    self._record(stream.id, module_id, 'closed' if module_id in closed else 'opened')
+                stream.scheduled_off = closed
+
+        preload = sorted(module_id for module_id in self.unloaded if needed.get(module_id))
+        if preload:
+            logger.info(f"Preloading scheduled modules: {', '.join(preload)}")
+            self.unloaded.difference_update(preload)
+            # The modules stay closed until their window opens
+            await self.inference_scheduler.run_exclusive(self._load, preload)
+
+        release = sorted(module_id for module_id, need in needed.items() if not need and module_id not in self.unloaded)
+        if release:
+            unloaded = await self.inference_scheduler.run_exclusive(self.inference_engine.unload_modules, release)
+            if unloaded:
+                logger.info(f"Released models of modules outside their schedule: {', '.join(unloaded)}")
+                self.unloaded.update(unloaded)
+
+    def _load(self, module_ids: List[str]):
+        """Load and warm up modules; runs on the inference thread"""
+        self.inference_engine.enable_modules(module_ids)
+        if settings.WARMUP_ENABLED:
+            self.inference_engine.warmup()
+
+    def _record(self, camera_id: str, module_id: str, change: str):
+        self.history.append({'at': time.time(), 'camera_id': camera_id, 'module': module_id, 'change': change})
+        logger.info(f"Module '{module_id}' window {change} on camera {camera_id}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = self.now()
+        cameras: Dict[str, Dict[str, Any]] = {}
+        for camera_id, stream in list(self.camera_service.cameras.items()):
+            for module_id in stream.enabled_modules:
+                specs = self.specs_for(camera_id, module_id)
+                if specs is None:
+                    continue
+                wait = self.seconds_until_open(camera_id, module_id, now)
+                cameras.setdefault(camera_id, {})[module_id] = {
+                    'windows': specs,
+                    'open': module_id not in stream.scheduled_off,
+                    'opens_in_s': round(wait) if wait not in (0.0, float('inf')) else None,
+                }
+        return {
+            'enabled': self._running,
+            'timezone': str(now.tzinfo),
+            'now': now.isoformat(),
+            'cameras': cameras,
+            'unloaded_modules': sorted(self.unloaded),
+            'history': list(self.history),
+        }
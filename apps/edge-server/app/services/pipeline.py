@@ -0,0 +1,136 @@
+"""
+Frame Pipeline
+Bookkeeping and the emit stage of the staged frame path:
+capture -> preprocess -> inference -> emit
+
+Capture and preprocessing run on CameraService executors, inference on
+the InferenceScheduler executor (or worker processes) and emitting on a
+task draining a bounded queue, so the event loop only moves frames and
+does I/O. Each stage reports its latency and each queue its depth.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+STAGES = ('capture', 'preprocess', 'inference', 'emit', 'total')
+LATENCY_WINDOW = 200
+
+
+class StageStats:
+    """Latency and drop counters of one stage"""
+
+    def __init__(self):
+        self.count = 0
+        self.dropped = 0
+        self.max_ms = 0.0
+        self.recent: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def record(self, elapsed_ms: float):
+        self.count += 1
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.recent.append(elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            'count': self.count,
+            'dropped': self.dropped,
+            'avg_ms': round(sum(recent) / len(recent), 1) if recent else 0.0,
+            'p95_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 1) if recent else 0.0,
+            'max_ms': round(self.max_ms, 1),
+        }
+
+
+class PipelineStats:
+    """
+    Per-stage latency plus the depth of every registered queue
+    'total' is capture-to-results latency of a frame (its age once the
+    inference results are in).
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {stage: StageStats() for stage in STAGES}
+        self._queues: Dict[str, Callable[[], Any]] = {}
+
+    def record(self, stage: str, started: float):
+        """Record a stage that started at time.monotonic() value started"""
+        self.stages[stage].record((time.monotonic() - started) * 1000)
+
+    def drop(self, stage: str):
+        self.stages[stage].dropped += 1
+
+    def register_queue(self, name: str, depth: Callable[[], Any]):
+        """Report a queue's depth (an int, or a dict per camera) under name"""
+        self._queues[name] = depth
+
+    def latency_ms(self, stage: str, window: int = LATENCY_WINDOW) -> float:
+        """Mean latency of a stage over its last `window` records"""
+        recent = list(self.stages[stage].recent)[-window:]
+        return sum(recent) / len(recent) if recent else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'stages': {stage: entry.get_stats() for stage, entry in self.stages.items()},
+            'queues': {name: depth() for name, depth in self._queues.items()},
+        }
+
+
+pipeline_stats = PipelineStats()
+
+
+class EmitQueue:
+    """
+    Emit stage: alerts and events go out from one task draining a
+    bounded queue, so a slow cloud API never holds up a camera. When the
+    queue is full put() refuses the item (counted as dropped) and the
+    caller keeps it elsewhere, e.g. in the offline queue.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize or settings.PIPELINE_EMIT_QUEUE
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.create_task(self.run())
+        pipeline_stats.register_queue('emit', lambda: self._queue.qsize() if self._queue else 0)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, send: Callable[[], Awaitable[Any]]) -> bool:
+        """Queue a coroutine factory for sending; False when dropped"""
+        if self._queue is None:
+            return False
+        try:
+            self._queue.put_nowait(send)
+            return True
+        except asyncio.QueueFull:
+            pipeline_stats.drop('emit')
+            if pipeline_stats.stages['emit'].dropped % 100 == 1:
+                logger.warning(f"Emit queue full ({self.maxsize}) - results refused")
+            return False
+
+    async def run(self):
+        while True:
+            send = await self._queue.get()
+            started = time.monotonic()
+            try:
+                await send()
+            except Exception as e:
+                logger.error(f"Emit error: {e}")
+            pipeline_stats.record('emit', started)
@@ -170,6 +170,7 @@ class SyncService:
             self.cached_vehicles = await self.db.get_registered_vehicles(org_id)
             self.cached_rules = await self.db.get_automation_rules(org_id)
             self.cached_cameras = await self.db.get_cameras(org_id)
+            self._apply_camera_config()
 
             self._last_sync = datetime.utcnow()
 
@@ -181,6 +182,21 @@ class SyncService:
         except Exception as e:
             logger.error(f"Configuration sync failed: {e}")
 
+    def _apply_camera_config(self):
+        """Push priority classes, module schedules and module parameters from the cloud camera config"""
+        from main import state
+
+        engine = state.inference_workers or state.ai_manager
+        for camera in self.cached_cameras:
+            camera_id = camera.get('id')
+            if engine and camera_id:
+                # Re-resolved only when the parameters changed
+                engine.configure_camera(camera_id, camera.get('module_params'))
+            if state.camera_service and camera_id in state.camera_service.cameras:
+                state.camera_service.set_priority(camera_id, camera.get('priority'))
+            if state.module_scheduler and camera_id:
+                state.module_scheduler.set_camera_schedules(camera_id, camera.get('schedules'))
+
     async def _poll_commands(self):
         from main import state
 
@@ -205,15 +221,39 @@ class SyncService:
 
             # TODO: route command to integrations (Modbus/Arduino/GPIO)
             handled = True
+            status = "acknowledged"
             result: Dict[str, Any] = {
                 "received_at": datetime.utcnow().isoformat(),
                 "payload": payload,
                 "note": "Command acknowledged by edge",
             }
 
+            if cmd_type == 'swap_model':
+                swap = await self._swap_model(payload or {})
+                result["swap"] = swap
+                status = "failed" if swap.get('status') == 'failed' else "executed"
+
             if handled and cmd_id:
                 edge_id = state.edge_id or state.server_id
-                await self.db.acknowledge_command(edge_id, cmd_id, status="acknowledged", result=result)
+                await self.db.acknowledge_command(edge_id, cmd_id, status=status, result=result)
+
+    async def _swap_model(self, payload: Dict) -> Dict[str, Any]:
+        """Hot-swap a model (payload: target, model, backend) without stopping cameras"""
+        from main import state
+        from app.ai.hot_swap import DETECTOR_TARGET
+
+        engine = state.inference_workers or state.ai_manager
+        if engine is None:
+            return {"status": "failed", "error": "AI services not running"}
+        if not payload.get('model'):
+            return {"status": "failed", "error": "No model given"}
+
+        return await asyncio.to_thread(
+            engine.swap_model,
+            payload.get('target') or DETECTOR_TARGET,
+            payload['model'],
+            payload.get('backend')
+        )
 
     def queue_alert(self, alert_data: Dict):
         self.offline_queue.add('alert', alert_data)
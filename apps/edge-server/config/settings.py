@@ -1,5 +1,5 @@
 import os
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -27,6 +27,119 @@ class Settings(BaseSettings):
 
     MAX_CAMERAS: int = 16
     PROCESSING_FPS: int = 5
+    # Frames wider than this are downscaled before processing (0 = native)
+    PROCESSING_MAX_WIDTH: int = 0
+
+    # Host benchmark deriving fps / width / camera limits (cache/calibration.json)
+    CALIBRATION_ON_BOOT: bool = True  # run once when no calibration is stored
+    CALIBRATION_AUTO_APPLY: bool = False  # apply the recommendation instead of only reporting it
+    CALIBRATION_RUNS: int = 5  # frames per module and width
+    CALIBRATION_HEADROOM: float = 0.7  # share of measured capacity to plan for
+    CALIBRATION_MAX_FPS: int = 10
+
+    # Staged frame pipeline: capture -> preprocess -> inference -> emit
+    PIPELINE_FRAME_QUEUE: int = 2  # preprocessed frames per camera awaiting inference (oldest dropped)
+    PIPELINE_PREPROCESS_THREADS: int = 2
+    PIPELINE_INFERENCE_QUEUE: int = 64  # frames waiting for a batch
+    PIPELINE_EMIT_QUEUE: int = 1000  # alerts/events waiting to be sent (overflow goes offline)
+
+    # Camera priority classes: critical | high | normal | low (wins over the cloud config)
+    CAMERA_PRIORITIES: Dict[str, str] = {}  # e.g. {"fire-exit-2": "critical"}
+    PRIORITY_MAX_WAIT_MS: int = 2000  # any frame waiting longer is served next
+
+    # Weekly module windows per camera ("*" = every camera), wins over the cloud config,
+    # e.g. {"*": {"intrusion": ["mon-fri 19:00-07:00", "sat,sun"]}}
+    MODULE_SCHEDULES: Dict[str, Dict[str, List[str]]] = {}
+    SCHEDULE_TIMEZONE: str = ""  # IANA name, e.g. "Europe/Istanbul"; empty = host local time
+    SCHEDULE_PRELOAD_SECONDS: int = 300  # load models this long before a window opens
+    SCHEDULE_INTERVAL: float = 15.0
+
+    # Load shedding under saturation; critical modules are never paused
+    GOVERNOR_ENABLED: bool = True
+    CRITICAL_MODULES: List[str] = ["fire", "intrusion"]
+    GOVERNOR_INTERVAL: float = 2.0  # seconds between load checks
+    GOVERNOR_MAX_LAG_MS: float = 2000.0  # capture-to-result latency considered overloaded
+    GOVERNOR_MAX_CPU: float = 90.0
+    GOVERNOR_RECOVER_CPU: float = 70.0
+    GOVERNOR_ESCALATE_SECONDS: float = 6.0
+    GOVERNOR_RECOVER_SECONDS: float = 30.0
+    GOVERNOR_FPS_FACTOR: float = 0.5  # fps multiplier for low-priority cameras
+    GOVERNOR_SHED_WIDTH: int = 640  # frame width cap for low-priority cameras
+
+    INFERENCE_BATCH_SIZE: int = 8
+    INFERENCE_BATCH_WINDOW_MS: int = 20
+    # Inference worker processes (0 = run modules in the server process)
+    INFERENCE_WORKERS: int = 0
+    INFERENCE_WORKER_TIMEOUT: float = 30.0  # seconds a batch may take before the worker is restarted
+    INFERENCE_WORKER_BENCHMARK_TIMEOUT: float = 600.0
+    INFERENCE_WORKER_START_TIMEOUT: float = 300.0  # seconds for a worker to load and warm up its models
+    # serial | parallel (independent modules of a frame run on a thread pool)
+    MODULE_EXECUTION: str = "serial"
+    MODULE_THREADS: int = 4
+
+    # Intra-op thread budget for torch / OpenCV / onnxruntime / OpenVINO / BLAS
+    THREAD_BUDGET: bool = True
+    THREAD_BUDGET_CORES: int = 0  # 0 = all cores
+    THREAD_LIMITS: Dict[str, int] = {}  # per-library override, e.g. {"torch": 2}
+
+    # Module rate overrides in fps (0 = every frame), e.g. {"fire": 1}
+    MODULE_FPS: Dict[str, float] = {}
+    # Per camera, e.g. {"cam-lobby": {"crowd": 0.5}}
+    CAMERA_MODULE_FPS: Dict[str, Dict[str, float]] = {}
+
+    # Per-camera module parameters (confidence_threshold, count_threshold, ...),
+    # win over the cloud camera config, e.g. {"entrance": {"crowd": {"count_threshold": 25}}}
+    CAMERA_MODULE_PARAMS: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+    # Per-module latency budget in ms (0 = unbounded); overruns are dropped and demoted
+    MODULE_DEADLINE_MS: int = 2000
+    MODULE_DEADLINES_MS: Dict[str, int] = {}  # e.g. {"vehicle": 1500}
+    WATCHDOG_DEMOTE_FACTOR: float = 0.5  # rate multiplier per overrun
+    WATCHDOG_DEMOTE_SECONDS: float = 60.0
+    WATCHDOG_MIN_FPS: float = 0.2
+
+    # Skip detector-based modules while a camera's scene is static
+    MOTION_GATE: bool = True
+    MOTION_MIN_AREA: float = 0.002  # fraction of the frame that must change
+    MOTION_FORCE_INTERVAL: float = 10.0  # seconds between forced passes
+    MOTION_DOWNSCALE_WIDTH: int = 160
+
+    # Reuse detections of opted-in modules while the frame is unchanged
+    STATIC_CACHE: bool = True
+    STATIC_CACHE_THRESHOLD: float = 0.01  # mean abs difference of 32x32 thumbnails (0-1)
+    STATIC_CACHE_MAX_AGE: float = 5.0  # seconds a result may be reused
+
+    # Restrict the shared detector to zone crops for zone-driven modules
+    ROI_INFERENCE: bool = True
+    ROI_MARGIN_PX: int = 48
+    ROI_MAX_COVERAGE: float = 0.6  # above this share of the frame use the full frame
+
+    # Tiled inference for dense scenes: modules on every camera, or per camera
+    TILED_MODULES: List[str] = []  # e.g. ["crowd"]
+    CAMERA_TILED_MODULES: Dict[str, List[str]] = {}  # e.g. {"hall-1": ["crowd"]}
+    TILE_SIZE: int = 640
+    TILE_OVERLAP: float = 0.2
+
+    # Per-camera detector input size tuned from detected object sizes
+    ADAPTIVE_RESOLUTION: bool = True
+    ADAPTIVE_IMGSZ_MIN: int = 320
+    ADAPTIVE_IMGSZ_MAX: int = 1280
+    CAMERA_IMGSZ: Dict[str, int] = {}  # fixed size per camera, e.g. {"parking": 1280}
+
+    # Detector backend: ultralytics | onnxruntime | openvino
+    DETECTOR_BACKEND: str = "ultralytics"
+    DETECTOR_WEIGHTS: str = "yolov8n.pt"
+    # Per-module override, e.g. {"fire": "openvino", "crowd": "onnxruntime"}
+    MODULE_DETECTOR_BACKENDS: Dict[str, str] = {}
+    # fp32 | int8 (int8 needs a quantized export, see app.ai.quantize)
+    DETECTOR_PRECISION: str = "fp32"
+    # Keep compiled detector graphs (OpenVINO) in the cache dir across restarts
+    DETECTOR_COMPILE_CACHE: bool = True
+
+    # Warm up models when modules are enabled, at each camera's last seen resolution
+    WARMUP_ENABLED: bool = True
+    WARMUP_RUNS: int = 2
+    WARMUP_RESOLUTIONS: List[List[int]] = [[1080, 1920]]  # [height, width] when no camera was seen yet
 
     FACE_CONFIDENCE: float = 0.6
     OBJECT_CONFIDENCE: float = 0.5
@@ -65,6 +178,13 @@ class Settings(BaseSettings):
         for d in dirs:
             os.makedirs(d, exist_ok=True)
 
+    def detector_backend_for(self, module_id: str) -> str:
+        return self.MODULE_DETECTOR_BACKENDS.get(module_id, self.DETECTOR_BACKEND)
+
+    def tiled_inference_for(self, camera_id: str, module_id: str) -> bool:
+        """Per-camera list wins over the global TILED_MODULES"""
+        return module_id in self.CAMERA_TILED_MODULES.get(camera_id, self.TILED_MODULES)
+
     def is_configured(self) -> bool:
         return bool(self.CLOUD_API_URL)
 
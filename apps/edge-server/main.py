@@ -14,6 +14,11 @@ sys.path.insert(0, str(BASE_DIR))
 os.chdir(BASE_DIR)
 
 from config.settings import settings
+from app.ai.threads import thread_budget
+
+# BLAS/OpenMP read their thread counts once, when numpy / torch / dlib load
+thread_budget.set_env()
+
 from app.core.license import LocalLicenseStore
 
 settings.ensure_directories()
@@ -51,6 +56,11 @@ class EdgeServerState:
         self.modules_loaded = False
         self.ai_manager = None  # AI Module Manager
         self.camera_service = None  # Camera Service
+        self.inference_scheduler = None  # Cross-camera batching
+        self.inference_workers = None  # Multi-process inference pool
+        self.emit_queue = None  # Alert/event upload stage
+        self.load_governor = None  # Load shedding
+        self.module_scheduler = None  # Module time windows
         self.sync_service = None  # Sync Service
 
 
@@ -152,15 +162,54 @@ async def register_server():
     return False
 
 
+async def calibrate_host(inference_scheduler, inference_engine):
+    """Benchmark on first boot, else re-apply the stored benchmark for the camera count"""
+    from app.ai.calibration import calibrate, load_calibration, refit
+
+    # Sized for the configured limit until cameras are added (routes refit on each change)
+    cameras = len(state.cameras) or settings.MAX_CAMERAS
+    if load_calibration() is None:
+        if settings.CALIBRATION_ON_BOOT:
+            try:
+                await inference_scheduler.run_exclusive(calibrate, inference_engine, cameras)
+            except Exception as e:
+                logger.warning(f"Host calibration failed: {e}")
+    elif settings.CALIBRATION_AUTO_APPLY:
+        refit(cameras)
+
+
 async def start_services():
     from app.services.sync import SyncService
     from app.services.camera import CameraService
+    from app.services.inference_scheduler import InferenceScheduler
+    from app.services.inference_workers import InferenceWorkerPool
+    from app.services.pipeline import EmitQueue
+    from app.services.load_governor import LoadGovernor
+    from app.services.module_schedule import ModuleScheduler
     from app.ai.manager import AIModuleManager
 
     # Initialize AI Module Manager
     ai_manager = AIModuleManager()
     state.ai_manager = ai_manager
 
+    # Run modules in worker processes when configured, else in-process
+    inference_engine = ai_manager
+    if settings.INFERENCE_WORKERS > 0:
+        inference_engine = InferenceWorkerPool(settings.INFERENCE_WORKERS)
+        # Waits for every worker to report ready
+        await asyncio.to_thread(inference_engine.start)
+        state.inference_workers = inference_engine
+
+    # Batch frames from all cameras into shared detector calls
+    inference_scheduler = InferenceScheduler(inference_engine)
+    state.inference_scheduler = inference_scheduler
+    await inference_scheduler.start()
+
+    # Alerts and events leave through their own stage
+    emit_queue = EmitQueue()
+    state.emit_queue = emit_queue
+    await emit_queue.start()
+
     # Initialize Camera Service
     camera_service = CameraService()
     state.camera_service = camera_service
@@ -180,39 +229,57 @@ async def start_services():
                 'rules': state.sync_service.get_rules(),
             }
         
-        # Process frame
-        results = state.ai_manager.process_frame(
-            frame=frame,
+        # Process frame (batched with other cameras, by camera priority)
+        stream = camera_service.cameras.get(camera_id)
+        results = await state.inference_scheduler.submit(
             camera_id=camera_id,
+            frame=frame,
             enabled_modules=enabled_modules,
-            metadata=metadata
+            metadata=metadata,
+            priority=stream.priority if stream else 'normal'
         )
         
         # Send alerts and events to Cloud
-        if state.db and state.is_connected:
-            for alert in results.get('alerts', []):
-                alert_data = {
-                    'camera_id': camera_id,
-                    'module': alert.get('module', 'unknown'),
-                    'type': alert.get('type') or alert.get('event_type', 'alert'),
-                    'severity': alert.get('severity', 'medium'),
-                    'title': alert.get('title', 'Alert'),
-                    'description': alert.get('description'),
-                    'metadata': alert.get('metadata', {}),
-                }
-                await state.db.create_alert(alert_data)
-            
-            for event in results.get('events', []):
-                event_data = {
-                    'camera_id': camera_id,
-                    'type': event.get('type') or event.get('event_type', 'event'),
-                    'severity': event.get('severity', 'info'),
-                    'metadata': event,
-                }
-                await state.db.create_event(event_data)
+        if state.db and state.is_connected and (results.get('alerts') or results.get('events')):
+            if not emit_queue.put(lambda: emit_results(camera_id, results)) and state.sync_service:
+                # Emit stage saturated: keep them for the next sync
+                for alert in results.get('alerts', []):
+                    state.sync_service.queue_alert(alert_payload(camera_id, alert))
+                for event in results.get('events', []):
+                    state.sync_service.queue_event(event_payload(camera_id, event))
+
+    def alert_payload(camera_id: str, alert: dict) -> dict:
+        return {
+            'camera_id': camera_id,
+            'module': alert.get('module', 'unknown'),
+            'type': alert.get('type') or alert.get('event_type', 'alert'),
+            'severity': alert.get('severity', 'medium'),
+            'title': alert.get('title', 'Alert'),
+            'description': alert.get('description'),
+            'metadata': alert.get('metadata', {}),
+        }
+
+    def event_payload(camera_id: str, event: dict) -> dict:
+        return {
+            'camera_id': camera_id,
+            'type': event.get('type') or event.get('event_type', 'event'),
+            'severity': event.get('severity', 'info'),
+            'metadata': event,
+        }
+
+    async def emit_results(camera_id: str, results: dict):
+        for alert in results.get('alerts', []):
+            await state.db.create_alert(alert_payload(camera_id, alert))
+        for event in results.get('events', []):
+            await state.db.create_event(event_payload(camera_id, event))
 
     camera_service.register_processor(ai_processor)
 
+    if settings.GOVERNOR_ENABLED:
+        load_governor = LoadGovernor(camera_service)
+        state.load_governor = load_governor
+        await load_governor.start()
+
     # Initialize Sync Service
     sync_service = SyncService(state.db)
     state.sync_service = sync_service
@@ -224,9 +291,20 @@ async def start_services():
     if state.license_data:
         enabled_modules = state.license_data.get('modules', [])
         if enabled_modules:
-            ai_manager.enable_modules(enabled_modules)
+            # Loading and warm-up run on the inference thread, never beside a batch
+            await inference_scheduler.run_exclusive(inference_engine.enable_modules, enabled_modules)
+            if settings.WARMUP_ENABLED:
+                await inference_scheduler.run_exclusive(inference_engine.warmup)
             logger.info(f"Enabled AI modules: {', '.join(enabled_modules)}")
 
+            # Size fps / frame width / camera limits to this host
+            await calibrate_host(inference_scheduler, inference_engine)
+
+    # Switch modules by their time windows; releases models of closed ones
+    module_scheduler = ModuleScheduler(camera_service, inference_engine, inference_scheduler)
+    state.module_scheduler = module_scheduler
+    await module_scheduler.start()
+
     logger.info("Services started")
 
 
@@ -264,9 +342,24 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down...")
     
     # Cleanup services
+    if state.module_scheduler:
+        await state.module_scheduler.stop()
+
+    if state.load_governor:
+        await state.load_governor.stop()
+
     if state.camera_service:
         await state.camera_service.stop()
     
+    if state.inference_scheduler:
+        await state.inference_scheduler.stop()
+
+    if state.emit_queue:
+        await state.emit_queue.stop()
+    
+    if state.inference_workers:
+        state.inference_workers.stop()
+    
     if state.ai_manager:
         state.ai_manager.cleanup()
     